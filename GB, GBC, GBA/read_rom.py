@@ -1,423 +1,435 @@
-import argparse
-from rich.console import Console
-from rich.spinner import Spinner
+from dataclasses import dataclass
 import os
-import subprocess
-
-console = Console()
-
-def launch_mgba(file_path):
-    """Startet das Spiel in mGBA."""
-    try:
-        
-        # Path to mGBA executable file
-        mgba_path = 'c:\\Program Files\\mGBA\\mGBA.exe'  # Default name if mGBA is in PATH. Adjust if necessary.
-        
-        if not os.path.isfile(file_path):
-            console.print("[bold red]ROM file not found![/bold red]")
-            return
-        
-        # Check if mGBA is installed (accessible)
-        result = subprocess.run([mgba_path, "--version"], capture_output=True, text=True)
-        if result.returncode != 0:
-            console.print("[bold red]mGBA could not be found. Make sure it is installed and in the PATH.[/bold red]")
-            return
-        
-        # Start game with mGBA
-        subprocess.Popen([mgba_path, file_path])
-        console.print(f"[bold green]Game is started in mGBA: {file_path}[/bold green]")
-    except FileNotFoundError:
-        console.print("[bold red]The mGBA executable was not found. Check the path to the mGBA installation.[/bold red]")
-    except Exception as e:
-        console.print(f"[bold red]An error has occurred: [/bold red] {e}")
-
-def display_rom_content(file_path):
-    """Displays the complete contents of the ROM with addresses."""
-    try:
-        with open(file_path, "rb") as rom_file:
-            console.print("[bold cyan]=== Complete ROM content ===[/bold cyan]")
-            address = 0
-            while True:
-                block = rom_file.read(16)  # 16 Bytes pro Zeile anzeigen
-                if not block:
-                    break
-                hex_data = " ".join(f"{byte:02X}" for byte in block)
-                ascii_data = "".join(chr(byte) if 32 <= byte <= 126 else '.' for byte in block)
-                console.print(f"[bold yellow]0x{address:08X}[/bold yellow]: {hex_data:<47} | {ascii_data}")
-                address += 16
-    except Exception as e:
-        console.print(f"[bold red]Error displaying ROM contents: [/bold red] {e}")
-
-def export_to_hex_file(file_path):
-    """Exports the entire ROM contents as a HEX file."""
-    try:
-        output_path = file_path + "_dump.hex"
-        with open(file_path, "rb") as rom_file, open(output_path, "w") as hex_file:
-            address = 0
-            while True:
-                block = rom_file.read(16)
-                if not block:
-                    break
-                hex_data = " ".join(f"{byte:02X}" for byte in block)
-                ascii_data = "".join(chr(byte) if 32 <= byte <= 126 else '.' for byte in block)
-                hex_file.write(f"0x{address:08X}: {hex_data:<47} | {ascii_data}\n")
-                address += 16
-        console.print(f"[bold green]HEX dump created successfully: {output_path}[/bold green]")
-    except Exception as e:
-        console.print(f"[bold red]Error exporting HEX file:[/bold red] {e}")
-
-def view_specific_address(file_path):
-    """Displays the contents of a specific address."""
-    try:
-        with open(file_path, "rb") as rom_file:
-            rom_size = os.path.getsize(file_path)
-            while True:
-                user_input = console.input("[bold yellow]Enter an address (hex, e.g. 0x00001000) or 'exit' to cancel: [/bold yellow]")
-                if user_input.lower() == "exit":
-                    break
-                try:
-                    address = int(user_input, 16)
-                    if 0 <= address < rom_size:
-                        rom_file.seek(address)
-                        block = rom_file.read(16)
-                        hex_data = " ".join(f"{byte:02X}" for byte in block)
-                        ascii_data = "".join(chr(byte) if 32 <= byte <= 126 else '.' for byte in block)
-                        console.print(f"[bold yellow]0x{address:08X}[/bold yellow]: {hex_data:<47} | {ascii_data}")
-                    else:
-                        console.print("[bold red]The entered address is outside the ROM size.[/bold red]")
-                except ValueError:
-                    console.print("[bold red]Invalid address. Please enter a valid hex address.[/bold red]")
-    except Exception as e:
-        console.print(f"[bold red]Error displaying address:[/bold red] {e}")
-
-def read_gba_rom(file_path):
-    try:
-        with open(file_path, "rb") as rom_file:
-            rom_size = os.path.getsize(file_path)
-            console.print(f"[bold green]ROM size:[/bold green] {rom_size} Bytes")
-            
-            console.print("\n[bold cyan]=== GBA ROM Header Information ===[/bold cyan] \n")
-            header = rom_file.read(192)
-
-            entry_point = header[0:4]
-            console.print(f"[bold yellow]Entry Point:[/bold yellow] {entry_point.hex().upper()}")
-
-            nintendo_logo = header[4:0xA0]
-            console.print(f"[bold yellow]Nintendo-Logo (hex):[/bold yellow] {nintendo_logo.hex().upper()}")
-
-            game_title = header[0xA0:0xAC].decode('ascii', errors='replace').strip()
-            console.print(f"[bold yellow]Game title:[/bold yellow] {game_title}")
-
-            game_code = header[0xAC:0xB0].decode('ascii', errors='replace')
-            console.print(f"[bold yellow]Spielcode:[/bold yellow] {game_code}")
-
-            maker_code = header[0xB0:0xB2].decode('ascii', errors='replace')
-            console.print(f"[bold yellow]Manufacturer code:[/bold yellow] {maker_code}")
-
-            fixed_value = header[0xB2]
-            console.print(f"[bold yellow]Fixed Value:[/bold yellow] 0x{fixed_value:02X}")
-
-            unit_code = header[0xB3]
-            console.print(f"[bold yellow]Unit code:[/bold yellow] 0x{unit_code:02X}")
-
-            device_capacity = header[0xB4]
-            console.print(f"[bold yellow]Device capacity:[/bold yellow] 0x{device_capacity:02X}")
-
-            software_version = header[0xB7]
-            console.print(f"[bold yellow]Software-Version:[/bold yellow] {software_version}")
-
-            checksum = header[0xB8]
-            console.print(f"[bold yellow]Checksum (Complement Check):[/bold yellow] 0x{checksum:02X}")
-
-            console.print("\n[bold cyan]=== ROM search ===[/bold cyan]")
-
-            rom_file.seek(0)
-            important_info = []
-
-            with console.status("[bold cyan]Search ROM...", spinner="dots") as status:
-                block_size = 4096
-                block_count = 0
-                total_blocks = rom_size // block_size + (1 if rom_size % block_size != 0 else 0)
-
-                while True:
-                    block = rom_file.read(block_size)
-                    if not block:
-                        break
-                    if b"SAVE" in block or b"GAME" in block:
-                        important_info.append((rom_file.tell() - block_size, block[:16]))
-                    block_count += 1
-
-            console.print(f"\n[bold green]Search completed:[/bold green] {block_count} Blöcke verarbeitet.")
-
-            console.print("\n[bold cyan]=== Important information found ===[/bold cyan]")
-            if important_info:
-                for address, data in important_info:
-                    console.print(f"[bold yellow]Address:[/bold yellow] 0x{address:08X} [bold yellow]Data (Hex):[/bold yellow] {data.hex().upper()}...")
-            else:
-                console.print("[bold red]No specific patterns found.[/bold red]")
-
-            while True:
-                console.print("\n[bold cyan]What would you like to do?[/bold cyan]")
-                console.print("[1] Show complete ROM contents")
-                console.print("[2] Create HEX file")
-                console.print("[3] Show specific address")
-                console.print("[4] Start game in mGBA")
-                console.print("[5] Exit")
-
-                choice = console.input("[bold yellow]Please enter selection (1/2/3/4/5): [/bold yellow]")
-
-                if choice == "1":
-                    display_rom_content(file_path)
-                elif choice == "2":
-                    export_to_hex_file(file_path)
-                elif choice == "3":
-                    view_specific_address(file_path)
-                elif choice == "4":
-                    launch_mgba(file_path)
-                elif choice == "5":
-                    console.print("[bold green]Program ended.[/bold green]")
-                    break
-                else:
-                    console.print("[bold red]Invalid selection. Please try again.[/bold red]")
-
-    except FileNotFoundError:
-        console.print("[bold red]The specified file was not found.[/bold red]")
-    except Exception as e:
-        console.print(f"[bold red]An error has occurred:[/bold red] {e}")
-
-def read_gb_rom(file_path):
+import random
+import sys
+
+# The infrastructure shared with the other family script lives in rom_common.py in the top directory;
+# it is appended to sys.path so "read_rom" keeps meaning this script for spawned worker processes
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+# ROM_READERS, SNIFFED_EXTENSIONS and rom_extension are also used by the top-level read_rom.py
+from rom_common import (
+    BENCH_ROMS, byte_sum, console, DEFAULT_PATTERNS, Disassembler, FAMILY, FLOW_BRANCH, FLOW_END,
+    FLOW_JUMP, FLOW_NEXT, main, np, read_rom_file, ROM_CHECKSUM_BYTES, ROM_CHECKSUMS,
+    ROM_DISASSEMBLERS, rom_extension, ROM_INSPECTORS, ROM_READERS, RomFormat, signed_byte,
+    SNIFFED_EXTENSIONS, TILE_DEFAULT_LENGTH, TILE_FORMATS,
+)
+
+def gb_header_checksum(rom):
+    """Header checksum over 0x0134-0x014C as computed by the boot ROM (stored at 0x014D)."""
+    checksum = 0
+    for byte in rom.slice(0x0134, 0x19):
+        checksum = (checksum - byte - 1) & 0xFF
+    return checksum
+
+def gb_global_checksum(rom):
+    """16-bit sum of all bytes except the global checksum itself (stored big-endian at 0x014E)."""
+    return (byte_sum(rom) - rom.u8(0x014E) - rom.u8(0x014F)) & 0xFFFF
+
+def verify_gb_checksums(rom):
+    """Returns (name, stored, computed, digits) for the GB/GBC header and global checksum."""
+    return [
+        ("Header checksum", rom.u8(0x014D), gb_header_checksum(rom), 2),
+        ("Global checksum", rom.u16be(0x014E), gb_global_checksum(rom), 4),
+    ]
+
+def verify_gba_checksums(rom):
+    """Returns (name, stored, computed, digits) for the GBA complement check at 0x00BD."""
+    computed = (-byte_sum(rom, 0xA0, 0xBD) - 0x19) & 0xFF
+    return [("Complement check", rom.u8(0x00BD), computed, 2)]
+
+@dataclass(slots=True)
+class GbaHeader:
+    entry_point: bytes
+    nintendo_logo: bytes
+    game_title: str
+    game_code: str
+    maker_code: str
+    fixed_value: int
+    unit_code: int
+    device_capacity: int
+    software_version: int
+    checksum: int
+
+@dataclass(slots=True)
+class GbHeader:
+    entry_point: bytes
+    nintendo_logo: bytes
+    game_title: str
+    maker_code: int
+    fixed_value: int
+    unit_code: int
+    device_capacity: int
+    software_version: int
+    entry_code: str = ""  # Disassembled entry point, see describe_entry
+
+@dataclass(slots=True)
+class GbcHeader:
+    entry_point: bytes
+    nintendo_logo: bytes
+    game_title: str
+    maker_code: bytes
+    fixed_value: bytes
+    unit_code: bytes
+    device_capacity: bytes
+    software_version: int
+    entry_code: str = ""  # Disassembled entry point, see describe_entry
+
+def inspect_gba(rom):
+    """Parses the GBA header (first 192 bytes) without any output."""
+    header = rom.read(0, 192)
+    return GbaHeader(
+        entry_point=header[0:4],
+        nintendo_logo=header[4:0xA0],
+        game_title=header[0xA0:0xAC].decode('ascii', errors='replace').strip(),
+        game_code=header[0xAC:0xB0].decode('ascii', errors='replace'),
+        maker_code=header[0xB0:0xB2].decode('ascii', errors='replace'),
+        fixed_value=header[0xB2],
+        unit_code=header[0xB3],
+        device_capacity=header[0xB4],
+        software_version=header[0xB7],
+        checksum=header[0xBD],
+    )
+
+def inspect_gb(rom):
+    """Parses the GB header at 0x0100-0x014F without any output."""
+    return GbHeader(
+        entry_point=rom.read(0x0100, 4),
+        nintendo_logo=rom.read(0x0104, 48),  # 48 Bytes für das Nintendo-Logo
+        game_title=rom.ascii(0x0134, 16).strip(),
+        maker_code=rom.u8(0x0143),
+        fixed_value=rom.u8(0x0144),
+        unit_code=rom.u8(0x0145),
+        device_capacity=rom.u8(0x0146),
+        software_version=rom.u8(0x0147),
+    )
+
+def inspect_gbc(rom):
+    """Parses the GBC header at 0x0100-0x014F without any output."""
+    return GbcHeader(
+        entry_point=rom.read(0x0100, 4),  # Standard ist oft 0x0100
+        nintendo_logo=rom.read(0x0104, 48),  # 48 Bytes für das Nintendo-Logo
+        game_title=rom.ascii(0x0134, 16).strip(),  # bis 16 Zeichen
+        maker_code=rom.read(0x013F, 2),  # 2 Bytes für den Hersteller-Code
+        fixed_value=rom.read(0x014D, 2),  # 2 Bytes für den Fixed Value
+        unit_code=rom.read(0x0144, 2),  # 2 Bytes für den Einheitencode
+        device_capacity=rom.read(0x0146, 1),  # 1 Byte für die Gerätekapazität
+        software_version=rom.u8(0x014C),
+    )
+
+def render_gba_header(rom, header):
+    """Prints the GBA header fields."""
+    entry_target = arm_branch_target(int.from_bytes(header.entry_point, "little"))
+    entry_code = f" (B 0x{entry_target:08X})" if entry_target is not None else ""
+    console.print(f"[bold yellow]Entry Point:[/bold yellow] {header.entry_point.hex().upper()}{entry_code}")
+    console.print(f"[bold yellow]Nintendo-Logo (hex):[/bold yellow] {header.nintendo_logo.hex().upper()}")
+    console.print(f"[bold yellow]Game title:[/bold yellow] {header.game_title}")
+    console.print(f"[bold yellow]Spielcode:[/bold yellow] {header.game_code}")
+    console.print(f"[bold yellow]Manufacturer code:[/bold yellow] {header.maker_code}")
+    console.print(f"[bold yellow]Fixed Value:[/bold yellow] 0x{header.fixed_value:02X}")
+    console.print(f"[bold yellow]Unit code:[/bold yellow] 0x{header.unit_code:02X}")
+    console.print(f"[bold yellow]Device capacity:[/bold yellow] 0x{header.device_capacity:02X}")
+    console.print(f"[bold yellow]Software-Version:[/bold yellow] {header.software_version}")
+    console.print(f"[bold yellow]Checksum (Complement Check):[/bold yellow] 0x{header.checksum:02X}")
+
+def describe_entry(rom, header):
+    """The instructions at the GB/GBC entry point 0x0100; kept in the header, so a cached report shows them without disassembling."""
+    if not header.entry_code:
+        header.entry_code = Disassembler(rom, Sm83Cpu, recursive=False).describe(0x100, 0x104)
+    return header.entry_code
+
+def render_gb_header(rom, header):
+    """Prints the GB header fields."""
+    console.print(f"[bold yellow]Entry Point:[/bold yellow] {header.entry_point.hex().upper()} ({describe_entry(rom, header)})")
+    console.print(f"[bold yellow]Nintendo-Logo (hex):[/bold yellow] {header.nintendo_logo.hex().upper()}")
+    console.print(f"[bold yellow]Game title:[/bold yellow] {header.game_title}")
+    console.print(f"[bold yellow]Manufacturer code:[/bold yellow] 0x{header.maker_code:02X}")
+    console.print(f"[bold yellow]Fixed Value:[/bold yellow] 0x{header.fixed_value:02X}")
+    console.print(f"[bold yellow]Unit code:[/bold yellow] 0x{header.unit_code:02X}")
+    console.print(f"[bold yellow]Device capacity:[/bold yellow] 0x{header.device_capacity:02X}")
+    console.print(f"[bold yellow]Software-Version:[/bold yellow] {header.software_version}")
+
+def render_gbc_header(rom, header):
+    """Prints the GBC header fields."""
+    console.print(f"[bold yellow]Entry Point:[/bold yellow] {header.entry_point.hex().upper()} ({describe_entry(rom, header)})")
+    console.print(f"[bold yellow]Nintendo-Logo (hex):[/bold yellow] {header.nintendo_logo.hex().upper()}")
+    console.print(f"[bold yellow]Game title:[/bold yellow] {header.game_title}")
+    console.print(f"[bold yellow]Manufacturer code:[/bold yellow] 0x{header.maker_code.hex().upper()}")
+    console.print(f"[bold yellow]Fixed Value[/bold yellow] 0x{header.fixed_value.hex().upper()}")
+    console.print(f"[bold yellow]Unit code:[/bold yellow] 0x{header.unit_code.hex().upper()}")
+    console.print(f"[bold yellow]Device capacity:[/bold yellow] 0x{header.device_capacity.hex().upper()}")
+    console.print(f"[bold yellow]Software-Version:[/bold yellow] {header.software_version}")
+
+# Header parser, header printer and checksum verification of every format, for read_rom_file.
+# GB und GBC: Header- und Global-Checksumme (0x014D, 0x014E-0x014F)
+GBA_FORMAT = RomFormat("gba", "GBA", GbaHeader, inspect_gba, render_gba_header, verify_gba_checksums)
+GB_FORMAT = RomFormat("gb", "GB", GbHeader, inspect_gb, render_gb_header, verify_gb_checksums)
+GBC_FORMAT = RomFormat("gbc", "GB", GbcHeader, inspect_gbc, render_gbc_header, verify_gb_checksums)
+
+def read_gba_rom(file_path, patterns=DEFAULT_PATTERNS, interactive=True, cache=None):
+    """Reads header information specific to GBA ROMs and scans the ROM for patterns."""
+    return read_rom_file(file_path, GBA_FORMAT, patterns, interactive, cache)
+
+def read_gb_rom(file_path, patterns=DEFAULT_PATTERNS, interactive=True, cache=None):
     """Reads GB ROM specific header information and scans the ROM for patterns."""
-    try:
-        with open(file_path, "rb") as rom_file:
-            rom_size = os.path.getsize(file_path)
-            console.print(f"[bold green]ROM size:[/bold green] {rom_size} Bytes")
-
-            console.print("\n[bold cyan]=== GB ROM Header Information ===[/bold cyan] \n")
-
-            # Entry Point
-            rom_file.seek(0x0100)
-            entry_point = rom_file.read(4)
-            console.print(f"[bold yellow]Entry Point:[/bold yellow] {entry_point.hex().upper()}")
-
-            # Nintendo-Logo (hex)
-            rom_file.seek(0x0104)
-            nintendo_logo = rom_file.read(48)  # 48 Bytes für das Nintendo-Logo
-            console.print(f"[bold yellow]Nintendo-Logo (hex):[/bold yellow] {nintendo_logo.hex().upper()}")
-
-            # Spieltitel
-            rom_file.seek(0x0134)
-            game_title = rom_file.read(16).decode('ascii', errors='replace').strip()
-            console.print(f"[bold yellow]Game title:[/bold yellow] {game_title}")
-
-            # Hersteller-Code
-            rom_file.seek(0x0143)
-            maker_code = rom_file.read(1)[0]
-            console.print(f"[bold yellow]Manufacturer code:[/bold yellow] 0x{maker_code:02X}")
-
-            # Fixed Value
-            rom_file.seek(0x0144)
-            fixed_value = rom_file.read(1)[0]
-            console.print(f"[bold yellow]Fixed Value:[/bold yellow] 0x{fixed_value:02X}")
-
-            # Einheitencode
-            rom_file.seek(0x0145)
-            unit_code = rom_file.read(1)[0]
-            console.print(f"[bold yellow]Unit code:[/bold yellow] 0x{unit_code:02X}")
-
-            # Gerätekapazität
-            rom_file.seek(0x0146)
-            device_capacity = rom_file.read(1)[0]
-            console.print(f"[bold yellow]Device capacity:[/bold yellow] 0x{device_capacity:02X}")
-
-            # Software-Version
-            rom_file.seek(0x0147)
-            software_version = rom_file.read(1)[0]
-            console.print(f"[bold yellow]Software-Version:[/bold yellow] {software_version}")
-
-            # === ROM-Durchsuchung ===
-            console.print("\n[bold cyan]=== ROM search ===[/bold cyan]")
-
-            rom_file.seek(0)
-            important_info = []
-
-            with console.status("[bold cyan]Search ROM...", spinner="dots") as status:
-                block_size = 4096
-                block_count = 0
-                total_blocks = rom_size // block_size + (1 if rom_size % block_size != 0 else 0)
-
-                while True:
-                    block = rom_file.read(block_size)
-                    if not block:
-                        break
-                    if b"SAVE" in block or b"GAME" in block:
-                        important_info.append((rom_file.tell() - block_size, block[:16]))
-                    block_count += 1
-
-            console.print(f"\n[bold green]Search completed:[/bold green] {block_count} Blöcke verarbeitet.")
-
-            console.print("\n[bold cyan]=== Important information found ===[/bold cyan]")
-            if important_info:
-                for address, data in important_info:
-                    console.print(f"[bold yellow]Address:[/bold yellow] 0x{address:08X} [bold yellow]Data (Hex):[/bold yellow] {data.hex().upper()}...")
-            else:
-                console.print("[bold red]No specific patterns found.[/bold red]")
-
-            # Interactive menu for further options
-            while True:
-                console.print("\n[bold cyan]What would you like to do?[/bold cyan]")
-                console.print("[1] Show complete ROM contents")
-                console.print("[2] Create HEX file")
-                console.print("[3] Show specific address")
-                console.print("[4] Start game in mGBA")
-                console.print("[5] Exit")
-
-                choice = console.input("[bold yellow]Please enter selection (1/2/3/4/5): [/bold yellow]")
-
-                if choice == "1":
-                    display_rom_content(file_path)
-                elif choice == "2":
-                    export_to_hex_file(file_path)
-                elif choice == "3":
-                    view_specific_address(file_path)
-                elif choice == "4":
-                    launch_mgba(file_path)
-                elif choice == "5":
-                    console.print("[bold green]Program ended.[/bold green]")
-                    break
-                else:
-                    console.print("[bold red]Invalid selection. Please try again.[/bold red]")
-
-    except FileNotFoundError:
-        console.print("[bold red]The specified file was not found.[/bold red]")
-    except Exception as e:
-        console.print(f"[bold red]An error has occurred:[/bold red] {e}")
-
-def read_gbc_rom(file_path):
+    return read_rom_file(file_path, GB_FORMAT, patterns, interactive, cache)
+
+def read_gbc_rom(file_path, patterns=DEFAULT_PATTERNS, interactive=True, cache=None):
     """Reads header information specific to GBC ROMs and scans the ROM for patterns."""
-    try:
-        with open(file_path, "rb") as rom_file:
-            rom_size = os.path.getsize(file_path)
-            console.print(f"[bold green]ROM size:[/bold green] {rom_size} Bytes")
-
-            console.print("\n[bold cyan]=== GB ROM Header Information ===[/bold cyan] \n")
-
-            # Entry Point (Standard ist oft 0x0100)
-            rom_file.seek(0x0100)
-            entry_point = rom_file.read(4)
-            console.print(f"[bold yellow]Entry Point:[/bold yellow] {entry_point.hex().upper()}")
-
-            # Nintendo-Logo (hex) (bleibt unverändert)
-            rom_file.seek(0x0104)
-            nintendo_logo = rom_file.read(48)  # 48 Bytes für das Nintendo-Logo
-            console.print(f"[bold yellow]Nintendo-Logo (hex):[/bold yellow] {nintendo_logo.hex().upper()}")
-
-            # Spieltitel (bis 16 Zeichen, ab Adresse 0x0134)
-            rom_file.seek(0x0134)
-            game_title = rom_file.read(16).decode('ascii', errors='replace').strip()
-            console.print(f"[bold yellow]Game title:[/bold yellow] {game_title}")
-
-            # Hersteller-Code (ab Adresse 0x013F bis 0x0141)
-            rom_file.seek(0x013F)
-            maker_code = rom_file.read(2)  # 2 Bytes für den Hersteller-Code
-            console.print(f"[bold yellow]Manufacturer code:[/bold yellow] 0x{maker_code.hex().upper()}")
-
-            # Fixed Value (ab Adresse 0x014D bis 0x014E)
-            rom_file.seek(0x014D)
-            fixed_value = rom_file.read(2)  # 2 Bytes für den Fixed Value
-            console.print(f"[bold yellow]Fixed Value[/bold yellow] 0x{fixed_value.hex().upper()}")
-
-            # Einheitencode (ab Adresse 0x0144 bis 0x0145)
-            rom_file.seek(0x0144)
-            unit_code = rom_file.read(2)  # 2 Bytes für den Einheitencode
-            console.print(f"[bold yellow]Unit code:[/bold yellow] 0x{unit_code.hex().upper()}")
-
-            # Gerätekapazität (ab Adresse 0x0146)
-            rom_file.seek(0x0146)
-            device_capacity = rom_file.read(1)  # 1 Byte für die Gerätekapazität
-            console.print(f"[bold yellow]Device capacity:[/bold yellow] 0x{device_capacity.hex().upper()}")
-
-            # Software-Version (ab Adresse 0x014C)
-            rom_file.seek(0x014C)
-            software_version = rom_file.read(1)  # 1 Byte für die Software-Version
-            console.print(f"[bold yellow]Software-Version:[/bold yellow] {software_version[0]}")
-
-
-            # === ROM search ===
-            console.print("\n[bold cyan]=== ROM search ===[/bold cyan]")
-
-            rom_file.seek(0)
-            important_info = []
-
-            with console.status("[bold cyan]Search ROM...", spinner="dots") as status:
-                block_size = 4096
-                block_count = 0
-                total_blocks = rom_size // block_size + (1 if rom_size % block_size != 0 else 0)
-
-                while True:
-                    block = rom_file.read(block_size)
-                    if not block:
-                        break
-                    if b"SAVE" in block or b"GAME" in block:
-                        important_info.append((rom_file.tell() - block_size, block[:16]))
-                    block_count += 1
-
-            console.print(f"\n[bold green]Search completed:[/bold green] {block_count} Blöcke verarbeitet.")
-
-            console.print("\n[bold cyan]=== Important information found ===[/bold cyan]")
-            if important_info:
-                for address, data in important_info:
-                    console.print(f"[bold yellow]Address:[/bold yellow] 0x{address:08X} [bold yellow]Data (Hex):[/bold yellow] {data.hex().upper()}...")
-            else:
-                console.print("[bold red]No specific patterns found.[/bold red]")
-
-            # Interactive menu for further options
-            while True:
-                console.print("\n[bold cyan]What would you like to do?[/bold cyan]")
-                console.print("[1] Show complete ROM contents")
-                console.print("[2] Create HEX file")
-                console.print("[3] Show specific address")
-                console.print("[4] Start game in mGBA")
-                console.print("[5] Exit")
-
-                choice = console.input("[bold yellow]Please enter selection (1/2/3/4/5): [/bold yellow]")
-
-                if choice == "1":
-                    display_rom_content(file_path)
-                elif choice == "2":
-                    export_to_hex_file(file_path)
-                elif choice == "3":
-                    view_specific_address(file_path)
-                elif choice == "4":
-                    launch_mgba(file_path)
-                elif choice == "5":
-                    console.print("[bold green]Program ended.[/bold green]")
-                    break
-                else:
-                    console.print("[bold red]Invalid selection. Please try again.[/bold red]")
-
-    except FileNotFoundError:
-        console.print("[bold red]The specified file was not found.[/bold red]")
-    except Exception as e:
-        console.print(f"[bold red]An error has occurred:[/bold red] {e}")
-
-def check_file_extension(file_path_extension):
-    # Extract the file name and extension
-    file_name, file_extension = os.path.splitext(file_path_extension)
-
-    # Check if the file has a .gb, .gba or .gbc extension
-    if file_extension.lower() == '.gb':
-        read_gb_rom(file_path_extension)
-    elif file_extension.lower() == '.gba':
-        read_gba_rom(file_path_extension)
-    elif file_extension.lower() == '.gbc':
-        read_gbc_rom(file_path_extension)
+    return read_rom_file(file_path, GBC_FORMAT, patterns, interactive, cache)
+
+# Reader for every supported file extension
+ROM_READERS.update({
+    ".gb": read_gb_rom,
+    ".gba": read_gba_rom,
+    ".gbc": read_gbc_rom,
+})
+
+# Format name and headless header parser for every supported file extension
+ROM_INSPECTORS.update({
+    ".gb": ("gb", inspect_gb),
+    ".gba": ("gba", inspect_gba),
+    ".gbc": ("gbc", inspect_gbc),
+})
+
+# Checksum verification for every supported file extension
+ROM_CHECKSUMS.update({
+    ".gb": verify_gb_checksums,
+    ".gba": verify_gba_checksums,
+    ".gbc": verify_gb_checksums,
+})
+
+# Bytes each checksum verification reads: the header checksum and the global sum over the
+# whole ROM for GB/GBC, only the 29 header bytes 0xA0-0xBC for the GBA complement check
+ROM_CHECKSUM_BYTES.update({
+    ".gb": lambda rom: 0x19 + rom.size,
+    ".gba": lambda rom: 0xBD - 0xA0,
+    ".gbc": lambda rom: 0x19 + rom.size,
+})
+
+# Benchmark: synthetic ROMs (format, extension, size), random address lookups and viewer pages per run
+BENCH_ROMS.extend((
+    ("gb", ".gb", 32 * 1024),
+    ("gbc", ".gbc", 1024 * 1024),
+    ("gba", ".gba", 4 * 1024 * 1024),
+    ("gba", ".gba", 32 * 1024 * 1024),
+))
+
+def make_synthetic_rom(file_path, rom_format, size, seed=0):
+    """Writes a deterministic pseudo-random ROM image with a valid header and checksums.
+
+    One of the default search patterns is placed every 16 KB so the scan has work to do.
+    """
+    rng = random.Random(f"{rom_format}:{size}:{seed}")
+    data = bytearray(rng.randbytes(size))
+    for offset in range(0x200, size - 4, 0x4000):
+        data[offset:offset + 4] = DEFAULT_PATTERNS[offset // 0x4000 % len(DEFAULT_PATTERNS)]
+    if rom_format == "gba":
+        data[0x00:0x04] = b"\x2E\x00\x00\xEA"
+        data[0xA0:0xB2] = b"BENCHMARK\x00\x00\x00BNCE01"
+        data[0xB2:0xBD] = b"\x96" + bytes(10)
+        data[0xBD] = (-sum(data[0xA0:0xBD]) - 0x19) & 0xFF
     else:
-        print(f"{file_path_extension} has an unknown extension.")
+        data[0x100:0x104] = b"\x00\xC3\x50\x01"
+        data[0x134:0x144] = b"BENCHMARK".ljust(15, b"\x00") + (b"\x80" if rom_format == "gbc" else b"\x00")
+        data[0x144:0x14D] = b"01" + bytes((0x00, 0x19, (size // 0x8000).bit_length() - 1, 0x00, 0x01, 0x33, 0x00))
+        data[0x14D] = (-sum(data[0x134:0x14D]) - 25) & 0xFF
+        data[0x14E:0x150] = ((sum(data) - data[0x14E] - data[0x14F]) & 0xFFFF).to_bytes(2, "big")
+    with open(file_path, "wb") as rom_file:
+        rom_file.write(data)
+
+def decode_gb_tiles(data):
+    """Decodes GB/GBC 2bpp tiles (16 bytes: per row one low-plane and one high-plane byte) into (tiles, 8, 8) colour indices."""
+    rows = np.frombuffer(data, dtype=np.uint8)[:len(data) // 16 * 16].reshape(-1, 8, 2, 1)
+    bits = np.unpackbits(rows, axis=3)
+    return bits[:, :, 0] | bits[:, :, 1] << 1
+
+def decode_gba_4bpp_tiles(data):
+    """Decodes GBA 4bpp tiles (32 bytes, two pixels per byte, low nibble left) into (tiles, 8, 8) colour indices."""
+    pairs = np.frombuffer(data, dtype=np.uint8)[:len(data) // 32 * 32].reshape(-1, 8, 4)
+    return np.stack((pairs & 0x0F, pairs >> 4), axis=3).reshape(-1, 8, 8)
+
+def decode_gba_8bpp_tiles(data):
+    """Decodes GBA 8bpp tiles (64 bytes, one byte per pixel) into (tiles, 8, 8) colour indices."""
+    return np.frombuffer(data, dtype=np.uint8)[:len(data) // 64 * 64].reshape(-1, 8, 8)
+
+# Tile formats: name -> (bytes per tile, bits per pixel, decoder)
+TILE_FORMATS.update({
+    "gb": (16, 2, decode_gb_tiles),
+    "gba4": (32, 4, decode_gba_4bpp_tiles),
+    "gba8": (64, 8, decode_gba_8bpp_tiles),
+})
+
+def default_tile_range(rom, tile_format):
+    """GB and GBA ROMs have no dedicated tile area; the first TILE_DEFAULT_LENGTH bytes are decoded."""
+    return 0, min(rom.size, TILE_DEFAULT_LENGTH)
+
+def _sm83_tables():
+    """Builds the SM83 opcode tables: (template, length, flow, jump target) for the base and the CB-prefixed opcodes."""
+    r8 = ("B", "C", "D", "E", "H", "L", "(HL)", "A")
+    r16 = ("BC", "DE", "HL", "SP")
+    r16_stack = ("BC", "DE", "HL", "AF")
+    r16_memory = ("(BC)", "(DE)", "(HL+)", "(HL-)")
+    conditions = ("NZ", "Z", "NC", "C")
+    alu = ("ADD A,", "ADC A,", "SUB ", "SBC A,", "AND ", "XOR ", "OR ", "CP ")
+    # Unused opcodes (D3, DB, DD, E3, E4, EB, EC, ED, F4, FC, FD) stay data and stop the trace
+    base = [(f"DB ${opcode:02X}", 1, FLOW_END, None) for opcode in range(256)]
+
+    def put(opcode, template, length=1, flow=FLOW_NEXT, target=None):
+        base[opcode] = (template, length, flow, target)
+
+    put(0x00, "NOP")
+    put(0x08, "LD ({n16}),SP", 3)
+    put(0x10, "STOP", 2)
+    put(0x18, "JR {e8}", 2, FLOW_JUMP, "rel")
+    for index, name in enumerate(("RLCA", "RRCA", "RLA", "RRA", "DAA", "CPL", "SCF", "CCF")):
+        put(0x07 + 8 * index, name)
+    for index in range(4):
+        put(0x01 + 16 * index, f"LD {r16[index]},{{n16}}", 3)
+        put(0x02 + 16 * index, f"LD {r16_memory[index]},A")
+        put(0x03 + 16 * index, f"INC {r16[index]}")
+        put(0x09 + 16 * index, f"ADD HL,{r16[index]}")
+        put(0x0A + 16 * index, f"LD A,{r16_memory[index]}")
+        put(0x0B + 16 * index, f"DEC {r16[index]}")
+        put(0x20 + 8 * index, f"JR {conditions[index]},{{e8}}", 2, FLOW_BRANCH, "rel")
+        put(0xC0 + 8 * index, f"RET {conditions[index]}")
+        put(0xC2 + 8 * index, f"JP {conditions[index]},{{n16}}", 3, FLOW_BRANCH, "abs")
+        put(0xC4 + 8 * index, f"CALL {conditions[index]},{{n16}}", 3, FLOW_BRANCH, "abs")
+        put(0xC1 + 16 * index, f"POP {r16_stack[index]}")
+        put(0xC5 + 16 * index, f"PUSH {r16_stack[index]}")
+    for index in range(8):
+        put(0x04 + 8 * index, f"INC {r8[index]}")
+        put(0x05 + 8 * index, f"DEC {r8[index]}")
+        put(0x06 + 8 * index, f"LD {r8[index]},{{n8}}", 2)
+        put(0xC6 + 8 * index, f"{alu[index]}{{n8}}", 2)
+        put(0xC7 + 8 * index, f"RST ${8 * index:02X}", 1, FLOW_BRANCH, 8 * index)
+        for source in range(8):
+            put(0x40 + 8 * index + source, f"LD {r8[index]},{r8[source]}")
+            put(0x80 + 8 * index + source, f"{alu[index]}{r8[source]}")
+    put(0x76, "HALT")
+    put(0xC3, "JP {n16}", 3, FLOW_JUMP, "abs")
+    put(0xC9, "RET", 1, FLOW_END)
+    put(0xCB, "PREFIX CB", 2)
+    put(0xCD, "CALL {n16}", 3, FLOW_BRANCH, "abs")
+    put(0xD9, "RETI", 1, FLOW_END)
+    put(0xE0, "LDH ({a8}),A", 2)
+    put(0xE2, "LD ($FF00+C),A")
+    put(0xE8, "ADD SP,{s8}", 2)
+    put(0xE9, "JP HL", 1, FLOW_END)
+    put(0xEA, "LD ({n16}),A", 3)
+    put(0xF0, "LDH A,({a8})", 2)
+    put(0xF2, "LD A,($FF00+C)")
+    put(0xF3, "DI")
+    put(0xF8, "LD HL,SP{s8}", 2)
+    put(0xF9, "LD SP,HL")
+    put(0xFA, "LD A,({n16})", 3)
+    put(0xFB, "EI")
+
+    rotations = ("RLC", "RRC", "RL", "RR", "SLA", "SRA", "SWAP", "SRL")
+    prefixed = []
+    for opcode in range(256):
+        register, index = r8[opcode & 7], (opcode >> 3) & 7
+        if opcode < 0x40:
+            prefixed.append((f"{rotations[index]} {register}", 2, FLOW_NEXT, None))
+        else:
+            prefixed.append((f"{('BIT', 'RES', 'SET')[(opcode >> 6) - 1]} {index},{register}", 2, FLOW_NEXT, None))
+    return tuple(base), tuple(prefixed)
+
+SM83_OPCODES, SM83_CB_OPCODES = _sm83_tables()
+
+class Sm83Cpu:
+    """SM83 (GB/GBC): bank 0 is mapped at 0x0000-0x3FFF, the switchable bank at 0x4000-0x7FFF.
+
+    Targets in the switchable window are resolved to the bank of the calling code (bank 1 from bank 0).
+    """
+
+    name = "SM83"
+    max_length = 3
+
+    def __init__(self, rom):
+        self.rom = rom
+
+    def entry_points(self):
+        """The entry point at 0x0100, the RST vectors and the interrupt vectors."""
+        return [offset for offset in [0x100] + list(range(0x00, 0x40, 8)) + list(range(0x40, 0x68, 8)) if offset < self.rom.size]
+
+    def offset_of(self, address, origin):
+        if address < 0x4000:
+            offset = address
+        elif address < 0x8000:
+            offset = max(1, origin // 0x4000) * 0x4000 + address - 0x4000
+        else:
+            return None  # RAM, I/O or HRAM
+        return offset if offset < self.rom.size else None
+
+    def address(self, offset):
+        bank = offset // 0x4000
+        return f"{bank:02X}:{offset if bank == 0 else 0x4000 + offset % 0x4000:04X}"
+
+    def _entry(self, offset):
+        view = self.rom.view
+        entry = SM83_OPCODES[view[offset]]
+        if offset + entry[1] > self.rom.size:
+            return f"DB ${view[offset]:02X}", 1, FLOW_END, None
+        if view[offset] == 0xCB:
+            return SM83_CB_OPCODES[view[offset + 1]]
+        return entry
+
+    def decode(self, offset):
+        """(length, flow, target offset) of the instruction at `offset`."""
+        template, length, flow, target = self._entry(offset)
+        if target is None:
+            return length, flow, None
+        if target == "rel":
+            target_offset = offset + length + signed_byte(self.rom.view[offset + 1])
+            return length, flow, target_offset if 0 <= target_offset < self.rom.size else None
+        if target == "abs":
+            return length, flow, self.offset_of(self.rom.u16le(offset + 1), offset)
+        return length, flow, self.offset_of(target, offset)
+
+    def format(self, offset):
+        template, length, flow, target = self._entry(offset)
+        if "{" not in template:
+            return template
+        view = self.rom.view
+        value = view[offset + 1]
+        relative = offset + length + signed_byte(value)
+        jump = relative if relative < 0x4000 else 0x4000 + relative % 0x4000
+        return template.format(
+            n8=f"${value:02X}",
+            n16=f"${self.rom.u16le(offset + 1):04X}" if length == 3 else "",
+            a8=f"$FF{value:02X}",
+            e8=f"${jump:04X}",
+            s8=f"{'-' if value & 0x80 else '+'}${abs(signed_byte(value)):02X}",
+        )
+
+def arm_branch_target(word, base=0x08000000):
+    """Target of an ARM B instruction (such as the GBA entry point), or None for other instructions."""
+    if (word >> 25) & 0x07 != 0x05 or word & 0x01000000:
+        return None
+    offset = (word & 0x00FFFFFF) << 2
+    if offset & 0x02000000:
+        offset -= 0x04000000
+    return base + 8 + offset
+
+# Disassembler CPU for every supported file extension (no ARM/Thumb decoder for GBA)
+ROM_DISASSEMBLERS.update({
+    ".gb": Sm83Cpu,
+    ".gbc": Sm83Cpu,
+})
+
+FAMILY.update(
+    module=__name__,
+    description="GBA-ROM-Inspektor",
+    rom_help="Path to the GBA ROM file",
+    default_tile_format="gb",
+    disasm_help="Disassemble code (SM83 for GB/GBC)",
+    default_tile_range=default_tile_range,
+    make_synthetic_rom=make_synthetic_rom,
+)
 
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="GBA-ROM-Inspektor")
-    parser.add_argument("rom_path", type=str, help="Path to the GBA ROM file")
-    args = parser.parse_args()
-
-    check_file_extension(args.rom_path)
+    main()
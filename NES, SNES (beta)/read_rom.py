@@ -1,293 +1,568 @@
-import argparse
-from rich.console import Console
-from rich.spinner import Spinner
+from dataclasses import dataclass
 import os
-import subprocess
-
-console = Console()
-
-def launch_mgba(file_path):
-    """Starts the game in mGBA."""
-
-    try:
-
-        # Path to the mGBA executable
-
-        mgba_path = 'c:\\Program Files\\mGBA\\mGBA.exe' # Default name if mGBA is in PATH. Adjust if necessary.
-
-        if not os.path.isfile(file_path):
-            console.print("[bold red]ROM file not found![/bold red]")
-            return
-
-        # Check if mGBA is installed (callable)
-        result = subprocess.run([mgba_path, "--version"], capture_output=True, text=True)
-        if result.returncode != 0:
-            console.print("[bold red]mGBA could not be found. Make sure it is installed and in the PATH.[/bold red]")
-            return
-
-        # Start game with mGBA
-        subprocess.Popen([mgba_path, file_path])
-        console.print(f"[bold green]Game is starting in mGBA: {file_path}[/bold green]")
-    except FileNotFoundError:
-        console.print("[bold red]The mGBA executable was not found. Check the path to the mGBA installation.[/bold red]")
-    except Exception as e:
-        console.print(f"[bold red]An error occurred:[/bold red] {e}")
-def display_rom_content(file_path):
-    """Displays the complete contents of the ROM with addresses."""
-    try:
-        with open(file_path, "rb") as rom_file:
-            console.print("[bold cyan]=== Complete ROM content ===[/bold cyan]")
-            address = 0
-            whileTrue:
-                block = rom_file.read(16) # Display 16 bytes per line
-                if not block:
-                    break
-                hex_data = " ".join(f"{byte:02X}" for byte in block)
-                ascii_data = "".join(chr(byte) if 32 <= byte <= 126 else '.' for byte in block)
-                console.print(f"[bold yellow]0x{address:08X}[/bold yellow]: {hex_data:<47} | {ascii_data}")
-                address += 16
-    except Exception as e:
-        console.print(f"[bold red]Error displaying ROM contents:[/bold red] {e}")
-    
-def export_to_hex_file(file_path):
-    """Exports the entire ROM content as a HEX file."""
-    try:
-        output_path = file_path + "_dump.hex"
-        with open(file_path, "rb") as rom_file, open(output_path, "w") as hex_file:
-            address = 0
-            whileTrue:
-                block = rom_file.read(16)
-                if not block:
-                    break
-                hex_data = " ".join(f"{byte:02X}" for byte in block)
-                ascii_data = "".join(chr(byte) if 32 <= byte <= 126 else '.' for byte in block)
-                hex_file.write(f"0x{address:08X}: {hex_data:<47} | {ascii_data}\n")
-                address += 16
-        console.print(f"[bold green]HEX dump created successfully: {output_path}[/bold green]")
-    except Exception as e:
-        console.print(f"[bold red]Error exporting HEX file:[/bold red] {e}")
-        
-def view_specific_address(file_path):
-    """Displays the contents of a specific address."""
-    try:
-        with open(file_path, "rb") as rom_file:
-            rom_size = os.path.getsize(file_path)
-            while True:
-                user_input = console.input("[bold yellow]Enter an address (hex, e.g. 0x00001000) or 'exit' to cancel: [/bold yellow]")
-                if user_input.lower() == "exit":
-                    break
-                try:
-                    address = int(user_input, 16)
-                    if 0 <= address < rom_size:
-                        rom_file.seek(address)
-                        block = rom_file.read(16)
-                        hex_data = " ".join(f"{byte:02X}" for byte in block)
-                        ascii_data = "".join(chr(byte) if 32 <= byte <= 126 else '.' for byte in block)
-                        console.print(f"[bold yellow]0x{address:08X}[/bold yellow]: {hex_data:<47} | {ascii_data}")
-                    else:
-                        console.print("[bold red]The entered address is outside the ROM size.[/bold red]")
-                except ValueError:
-                    console.print("[bold red]Invalid address. Please enter a valid hex address.[/bold red]")
-    except Exception as e:
-        console.print(f"[bold red]Error displaying address:[/bold red] {e}")
-
-def read_nes_rom(file_path):
-    try:
-        with open(file_path, "rb") as rom_file:
-            rom_size = os.path.getsize(file_path)
-            console.print(f"[bold green]ROM size:[/bold green] {rom_size} Bytes")
-            
-            console.print("\n[bold cyan]=== NES ROM Header Information ===[/bold cyan] \n")
-            header = rom_file.read(16)
-
-            magic_number = header[0:4].decode('ascii', errors='replace')
-            console.print(f"[bold yellow]Magic Number (iNES):[/bold yellow] {magic_number}")
-
-            prg_rom_size = header[4]
-            console.print(f"[bold yellow]PRG-ROM size (16 KB blocks):[/bold yellow] {prg_rom_size} Blöcke")
-
-            chr_rom_size = header[5]
-            console.print(f"[bold yellow]CHR-ROM size (8 KB blocks):[/bold yellow] {chr_rom_size} Blöcke")
-
-            flags_6 = header[6]
-            console.print(f"[bold yellow]Flags 6 (Mapper, Mirroring, Battery):[/bold yellow] 0x{flags_6:02X}")
-
-            flags_7 = header[7]
-            console.print(f"[bold yellow]Flags 7 (Mapper, NES 2.0 Identification):[/bold yellow] 0x{flags_7:02X}")
-
-            prg_ram_size = header[8] if header[8] != 0 else 8
-            console.print(f"[bold yellow]PRG-RAM size (8 KB blocks):[/bold yellow] {prg_ram_size} KB")
-
-            flags_9 = header[9]
-            console.print(f"[bold yellow]Flags 9 (TV System):[/bold yellow] 0x{flags_9:02X}")
-
-            flags_10 = header[10]
-            console.print(f"[bold yellow]Flags 10 (TV System, PRG-RAM):[/bold yellow] 0x{flags_10:02X}")
-
-            console.print("\n[bold cyan]=== ROM search ===[/bold cyan]")
-
-            rom_file.seek(0)
-            important_info = []
-
-            with console.status("[bold cyan]Search ROM...", spinner="dots") as status:
-                block_size = 4096
-                block_count = 0
-                total_blocks = rom_size // block_size + (1 if rom_size % block_size != 0 else 0)
-
-                while True:
-                    block = rom_file.read(block_size)
-                    if not block:
-                        break
-                    if b"SAVE" in block or b"GAME" in block:
-                        important_info.append((rom_file.tell() - block_size, block[:16]))
-                    block_count += 1
-
-            console.print(f"\n[bold green]Search completed:[/bold green] {block_count} Blöcke verarbeitet.")
-
-            console.print("\n[bold cyan]=== Important information found ===[/bold cyan]")
-            if important_info:
-                for address, data in important_info:
-                    console.print(f"[bold yellow]Address:[/bold yellow] 0x{address:08X} [bold yellow]Data (Hex):[/bold yellow] {data.hex().upper()}...")
-            else:
-                console.print("[bold red]No specific patterns found.[/bold red]")
-
-            while True:
-                console.print("\n[bold cyan]What would you like to do?[/bold cyan]")
-                console.print("[1] Show complete ROM contents")
-                console.print("[2] Create HEX file")
-                console.print("[3] Show specific address")
-                console.print("[4] Start game in mGBA")
-                console.print("[5] Exit")
-
-                choice = console.input("[bold yellow]Please enter selection (1/2/3/4/5): [/bold yellow]")
-
-                if choice == "1":
-                    display_rom_content(file_path)
-                elif choice == "2":
-                    export_to_hex_file(file_path)
-                elif choice == "3":
-                    view_specific_address(file_path)
-                elif choice == "4":
-                    launch_mgba(file_path)
-                elif choice == "5":
-                    console.print("[bold green]Program ended.[/bold green]")
-                    break
-                else:
-                    console.print("[bold red]Invalid selection. Please try again.[/bold red]")
-
-    except FileNotFoundError:
-        console.print("[bold red]The specified file was not found.[/bold red]")
-    except Exception as e:
-        console.print(f"[bold red]An error has occurred:[/bold red] {e}")
-
-def read_snes_rom(file_path):
+import random
+import struct
+import sys
+
+from snes_header import SNES_HEADER_LAYOUTS, SNES_MAP_MODES, score_header
+
+# The infrastructure shared with the other family script lives in rom_common.py in the top directory;
+# it is appended to sys.path so "read_rom" keeps meaning this script for spawned worker processes
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+# ROM_READERS, SNIFFED_EXTENSIONS and rom_extension are also used by the top-level read_rom.py
+from rom_common import (
+    BENCH_ROMS, byte_sum, console, DEFAULT_PATTERNS, FAMILY, FLOW_BRANCH, FLOW_END, FLOW_JUMP,
+    FLOW_NEXT, main, np, read_rom_file, ROM_CHECKSUM_BYTES, ROM_CHECKSUMS, ROM_DISASSEMBLERS,
+    rom_extension, ROM_INSPECTORS, ROM_READERS, RomFormat, RomImage, signed_byte,
+    SNIFFED_EXTENSIONS, TILE_DEFAULT_LENGTH, TILE_FORMATS,
+)
+
+def verify_nes_checksums(rom):
+    """iNES has no checksum; the image size is checked against the PRG/CHR sizes in the header."""
+    if rom.size < 16:
+        return [("Image size", 16, rom.size, 8)]  # Not even the header is complete
+    flags_6 = rom.u8(6)
+    expected = 16 + (512 if flags_6 & 0x04 else 0) + rom.u8(4) * 16384 + rom.u8(5) * 8192
+    return [("Image size", expected, rom.size, 8)]
+
+def snes_copier_header_size(rom):
+    """Copier headers (SMC/SWC/FIG) add 512 bytes in front of the ROM."""
+    return 512 if rom.size % 1024 == 512 else 0
+
+def score_snes_header(rom, offset, layout):
+    """Plausibility score of the header candidate at file `offset`; None if it lies outside the ROM.
+
+    Only the 64-byte candidate window is read; the points are given in snes_header.py,
+    which the top-level read_rom.py also uses to sniff SNES images.
+    """
+    return score_header(rom.read(offset, 0x40), layout)
+
+def detect_snes_header(rom):
+    """Finds the internal SNES header without reading the whole image.
+
+    Returns (layout, file offset, score) of the best candidate among LoROM (0x7FC0),
+    HiROM (0xFFC0) and ExHiROM (0x40FFC0), shifted by a copier header if present.
+    """
+    base = snes_copier_header_size(rom)
+    best = ("LoROM", base + 0x7FC0, -1)
+    for layout, offset in SNES_HEADER_LAYOUTS:
+        score = score_snes_header(rom, base + offset, layout)
+        if score is not None and score > best[2]:
+            best = (layout, base + offset, score)
+    return best
+
+def snes_checksum(rom, start=None):
+    """16-bit sum of the ROM (without copier header) with the SNES mirroring rule.
+
+    Images whose size is not a power of two are summed as if the part above the
+    largest power of two were mirrored until it fills the same size again.
+    """
+    start = snes_copier_header_size(rom) if start is None else start
+
+    def mirror_sum(offset, length, mask):
+        while mask and not length & mask:
+            mask >>= 1
+        part1 = byte_sum(rom, offset, offset + mask)
+        part2 = 0
+        next_length = length - mask
+        if next_length:
+            part2, next_length = mirror_sum(offset + mask, next_length, mask >> 1)
+            while next_length < mask:
+                next_length += next_length
+                part2 += part2
+            length = mask + mask
+        return part1 + part2, length
+
+    length = rom.size - start
+    if length <= 0:
+        return 0
+    return mirror_sum(start, length, 1 << (length.bit_length() - 1))[0] & 0xFFFF
+
+def verify_no_checksums(rom):
+    """UNIF and FDS images have neither a checksum nor size fields to check them against."""
+    return []
+
+def verify_snes_checksums(rom):
+    """Returns (name, stored, computed, digits) for the SNES checksum and its complement."""
+    layout, header, score = detect_snes_header(rom)
+    computed = snes_checksum(rom)
+    return [
+        ("Checksum", rom.u16le(header + 0x1E), computed, 4),
+        ("Checksum complement", rom.u16le(header + 0x1C), computed ^ 0xFFFF, 4),
+    ]
+
+@dataclass(slots=True)
+class NesHeader:
+    magic_number: str
+    prg_rom_size: int
+    chr_rom_size: int
+    flags_6: int
+    flags_7: int
+    prg_ram_size: int
+    flags_9: int
+    flags_10: int
+    header_size: int
+
+@dataclass(slots=True)
+class UnifHeader:
+    magic_number: str
+    revision: int
+    board: str
+    game_title: str
+    chunks: str  # Chunk IDs in file order
+
+@dataclass(slots=True)
+class FdsHeader:
+    header_size: int  # 16 with fwNES header, 0 for a raw disk image
+    disk_sides: int
+    disk_info_valid: bool
+    manufacturer_code: int
+    game_code: str
+    revision: int
+    side_number: int
+    disk_number: int
+
+@dataclass(slots=True)
+class SnesHeader:
+    layout: str
+    header_offset: int
+    header_size: int
+    score: int
+    game_title: str
+    rom_makeup: int
+    cartridge_type: int
+    rom_size: int
+    sram_size: int
+    region: int
+    license_code: int
+    version: int
+    checksum: int
+    complement_checksum: int
+
+def inspect_nes(rom):
+    """Parses the iNES header (first 16 bytes) without any output."""
+    header = rom.read(0, 16)
+    return NesHeader(
+        magic_number=header[0:4].decode('ascii', errors='replace'),
+        prg_rom_size=header[4],
+        chr_rom_size=header[5],
+        flags_6=header[6],
+        flags_7=header[7],
+        prg_ram_size=header[8] if header[8] != 0 else 8,
+        flags_9=header[9],
+        flags_10=header[10],
+        header_size=16 if header[0:4] == b"NES\x1a" else 0,
+    )
+
+def inspect_unif(rom):
+    """Parses the UNIF header (first 32 bytes) and walks its chunks without any output."""
+    header = rom.read(0, 32)
+    chunks, texts = [], {}
+    offset = 32
+    while offset + 8 <= rom.size:
+        chunk_id, length = struct.unpack("<4sI", rom.read(offset, 8))
+        chunk_id = chunk_id.decode('ascii', errors='replace')
+        chunks.append(chunk_id)
+        if chunk_id in ("MAPR", "NAME"):
+            texts[chunk_id] = rom.read(offset + 8, min(length, 256)).split(b"\x00")[0].decode('utf-8', errors='replace')
+        offset += 8 + length
+    return UnifHeader(
+        magic_number=header[0:4].decode('ascii', errors='replace'),
+        revision=int.from_bytes(header[4:8], "little"),
+        board=texts.get("MAPR", ""),
+        game_title=texts.get("NAME", ""),
+        chunks=" ".join(chunks),
+    )
+
+# Size of one FDS disk side (without the CRCs of the real disk)
+FDS_SIDE_SIZE = 65500
+
+def inspect_fds(rom):
+    """Parses the fwNES header, if any, and the disk info block of the first side without any output."""
+    header = rom.read(0, 16)
+    header_size = 16 if header[0:4] == b"FDS\x1a" else 0
+    info = rom.read(header_size, 0x38).ljust(0x38, b"\x00")
+    return FdsHeader(
+        header_size=header_size,
+        disk_sides=header[4] if header_size else (rom.size + FDS_SIDE_SIZE - 1) // FDS_SIDE_SIZE,
+        disk_info_valid=info[0:15] == b"\x01*NINTENDO-HVC*",
+        manufacturer_code=info[15],
+        game_code=info[16:19].decode('ascii', errors='replace'),
+        revision=info[20],
+        side_number=info[21],
+        disk_number=info[22],
+    )
+
+def inspect_snes(rom):
+    """Detects and parses the SNES internal header without any output."""
+    layout, header_offset, score = detect_snes_header(rom)
+    header = rom.read(header_offset, 0x40)
+    complement_checksum, checksum = struct.unpack_from("<HH", header, 0x1C)
+    return SnesHeader(
+        layout=layout,
+        header_offset=header_offset,
+        header_size=snes_copier_header_size(rom),
+        score=score,
+        game_title=header[0x00:0x15].decode('ascii', errors='replace').strip(),
+        rom_makeup=header[0x15],
+        cartridge_type=header[0x16],
+        rom_size=header[0x17],
+        sram_size=header[0x18],
+        region=header[0x19],
+        license_code=header[0x1A],
+        version=header[0x1B],
+        checksum=checksum,
+        complement_checksum=complement_checksum,
+    )
+
+def render_nes_header(rom, header):
+    """Prints the iNES header fields."""
+    console.print(f"[bold yellow]Magic Number (iNES):[/bold yellow] {header.magic_number}")
+    console.print(f"[bold yellow]PRG-ROM size (16 KB blocks):[/bold yellow] {header.prg_rom_size} Blöcke")
+    console.print(f"[bold yellow]CHR-ROM size (8 KB blocks):[/bold yellow] {header.chr_rom_size} Blöcke")
+    console.print(f"[bold yellow]Flags 6 (Mapper, Mirroring, Battery):[/bold yellow] 0x{header.flags_6:02X}")
+    console.print(f"[bold yellow]Flags 7 (Mapper, NES 2.0 Identification):[/bold yellow] 0x{header.flags_7:02X}")
+    console.print(f"[bold yellow]PRG-RAM size (8 KB blocks):[/bold yellow] {header.prg_ram_size} KB")
+    console.print(f"[bold yellow]Flags 9 (TV System):[/bold yellow] 0x{header.flags_9:02X}")
+    console.print(f"[bold yellow]Flags 10 (TV System, PRG-RAM):[/bold yellow] 0x{header.flags_10:02X}")
+
+def render_unif_header(rom, header):
+    """Prints the UNIF header fields; a UNIF image has no iNES header."""
+    console.print(f"[bold yellow]Magic Number (UNIF):[/bold yellow] {header.magic_number}")
+    console.print(f"[bold yellow]UNIF revision:[/bold yellow] {header.revision}")
+    console.print(f"[bold yellow]Board (MAPR):[/bold yellow] {header.board or 'not given'}")
+    console.print(f"[bold yellow]Game title (NAME):[/bold yellow] {header.game_title or 'not given'}")
+    console.print(f"[bold yellow]Chunks:[/bold yellow] {header.chunks}")
+
+def render_fds_header(rom, header):
+    """Prints the fwNES header and the disk info block; an FDS image has no iNES header."""
+    console.print(f"[bold yellow]fwNES header:[/bold yellow] {f'{header.header_size} Bytes' if header.header_size else 'none (raw disk image)'}")
+    console.print(f"[bold yellow]Disk sides:[/bold yellow] {header.disk_sides}")
+    if not header.disk_info_valid:
+        console.print("[bold red]No disk info block (*NINTENDO-HVC*) at the start of the first side.[/bold red]")
+        return
+    console.print(f"[bold yellow]Manufacturer code:[/bold yellow] 0x{header.manufacturer_code:02X}")
+    console.print(f"[bold yellow]Game code:[/bold yellow] {header.game_code}")
+    console.print(f"[bold yellow]Revision:[/bold yellow] {header.revision}")
+    console.print(f"[bold yellow]Side / disk number:[/bold yellow] {header.side_number} / {header.disk_number}")
+
+def render_snes_header(rom, header):
+    """Prints the SNES internal header fields and where they were found."""
+    console.print(f"[bold yellow]Header layout:[/bold yellow] {header.layout} at 0x{header.header_offset:06X} (copier header: {header.header_size} Bytes, score {header.score})")
+    console.print(f"[bold yellow]Game title:[/bold yellow] {header.game_title}")
+    console.print(f"[bold yellow]ROM Makeup (Speed/Type):[/bold yellow] 0x{header.rom_makeup:02X}")
+    console.print(f"[bold yellow]Cartridge type:[/bold yellow] 0x{header.cartridge_type:02X}")
+    console.print(f"[bold yellow]ROM size (2^N KB):[/bold yellow] 0x{header.rom_size:02X} ({2 ** header.rom_size} KB)")
+    console.print(f"[bold yellow]SRAM size (2^N KB):[/bold yellow] 0x{header.sram_size:02X} ({2 ** header.sram_size if header.sram_size else 0} KB)")
+    console.print(f"[bold yellow]Region:[/bold yellow] 0x{header.region:02X}")
+    console.print(f"[bold yellow]License code:[/bold yellow] 0x{header.license_code:02X}")
+    console.print(f"[bold yellow]Version:[/bold yellow] {header.version}")
+    console.print(f"[bold yellow]Checksum:[/bold yellow] 0x{header.checksum:04X}")
+    console.print(f"[bold yellow]Checksum Complement:[/bold yellow] 0x{header.complement_checksum:04X}")
+
+# Header parser, header printer and checksum verification of every format, for read_rom_file
+NES_FORMAT = RomFormat("nes", "NES", NesHeader, inspect_nes, render_nes_header, verify_nes_checksums)
+UNIF_FORMAT = RomFormat("unif", "UNIF", UnifHeader, inspect_unif, render_unif_header, verify_no_checksums)
+FDS_FORMAT = RomFormat("fds", "FDS", FdsHeader, inspect_fds, render_fds_header, verify_no_checksums)
+SNES_FORMAT = RomFormat("snes", "SNES", SnesHeader, inspect_snes, render_snes_header, verify_snes_checksums)
+
+def read_nes_rom(file_path, patterns=DEFAULT_PATTERNS, interactive=True, cache=None):
+    """Reads iNES header information and scans the ROM for patterns."""
+    return read_rom_file(file_path, NES_FORMAT, patterns, interactive, cache)
+
+def read_unif_rom(file_path, patterns=DEFAULT_PATTERNS, interactive=True, cache=None):
+    """Reads the UNIF header and chunk list and scans the ROM for patterns."""
+    return read_rom_file(file_path, UNIF_FORMAT, patterns, interactive, cache)
+
+def read_fds_rom(file_path, patterns=DEFAULT_PATTERNS, interactive=True, cache=None):
+    """Reads the disk info block of an FDS image and scans the ROM for patterns."""
+    return read_rom_file(file_path, FDS_FORMAT, patterns, interactive, cache)
+
+def read_snes_rom(file_path, patterns=DEFAULT_PATTERNS, interactive=True, cache=None):
     """Reads header information specific to SNES ROMs and scans the ROM for patterns."""
-    try:
-        with open(file_path, "rb") as rom_file:
-            rom_size = os.path.getsize(file_path)
-            console.print(f"[bold green]ROM size:[/bold green] {rom_size} Bytes")
-
-            console.print("\n[bold cyan]=== SNES ROM Header Information ===[/bold cyan] \n")
-            header = rom_file.read(512)  # SNES header is often at 0x7FC0 (LoROM) or 0xFFC0 (HiROM)
-
-            game_title = header[0x10:0x20].decode('ascii', errors='replace').strip()
-            console.print(f"[bold yellow]Game title:[/bold yellow] {game_title}")
-
-            rom_makeup = header[0x25]
-            console.print(f"[bold yellow]ROM Makeup (Speed/Type):[/bold yellow] 0x{rom_makeup:02X}")
-
-            rom_size = header[0x27]
-            console.print(f"[bold yellow]ROM size (2^N KB):[/bold yellow] 0x{rom_size:02X} ({2 ** rom_size} KB)")
-
-            sram_size = header[0x28]
-            console.print(f"[bold yellow]SRAM size (2^N KB):[/bold yellow] 0x{sram_size:02X} ({2 ** sram_size} KB)")
-
-            license_code = header[0x29]
-            console.print(f"[bold yellow]License code:[/bold yellow] 0x{license_code:02X}")
-
-            version_number = header[0x2A]
-            console.print(f"[bold yellow]Version:[/bold yellow] {version_number}")
-
-            checksum = header[0x2C:0x2E]
-            console.print(f"[bold yellow]Checksum:[/bold yellow] {checksum.hex().upper()}")
-
-            complement_checksum = header[0x2E:0x30]
-            console.print(f"[bold yellow]Checksum Complement:[/bold yellow] {complement_checksum.hex().upper()}")
-
-            # === ROM search ===
-            console.print("\n[bold cyan]=== ROM search ===[/bold cyan]")
-
-            rom_file.seek(0)
-            important_info = []
-
-            with console.status("[bold cyan]Search ROM...", spinner="dots") as status:
-                block_size = 4096
-                block_count = 0
-                total_blocks = rom_size // block_size + (1 if rom_size % block_size != 0 else 0)
-
-                while True:
-                    block = rom_file.read(block_size)
-                    if not block:
-                        break
-                    if b"SAVE" in block or b"GAME" in block:
-                        important_info.append((rom_file.tell() - block_size, block[:16]))
-                    block_count += 1
-
-            console.print(f"\n[bold green]Search completed:[/bold green] {block_count} Blöcke verarbeitet.")
-
-            console.print("\n[bold cyan]=== Important information found ===[/bold cyan]")
-            if important_info:
-                for address, data in important_info:
-                    console.print(f"[bold yellow]Address:[/bold yellow] 0x{address:08X} [bold yellow]Data (Hex):[/bold yellow] {data.hex().upper()}...")
-            else:
-                console.print("[bold red]No specific patterns found.[/bold red]")
-
-            # Interactive menu for further options
-            while True:
-                console.print("\n[bold cyan]What would you like to do?[/bold cyan]")
-                console.print("[1] Show complete ROM contents")
-                console.print("[2] Create HEX file")
-                console.print("[3] Show specific address")
-                console.print("[4] Start game in mGBA")
-                console.print("[5] Exit")
-                choice = console.input("[bold yellow]Please enter selection (1/2/3/4/5): [/bold yellow]")
-
-                if choice == "1":
-                    display_rom_content(file_path)
-                elif choice == "2":
-                    export_to_hex_file(file_path)
-                elif choice == "3":
-                    view_specific_address(file_path)
-                elif choice == "4":
-                    launch_mgba(file_path)
-                elif choice == "5":
-                    console.print("[bold green]Program ended.[/bold green]")
-                    break
-                else:
-                    console.print("[bold red]Invalid selection. Please try again.[/bold red]")
-
-    except FileNotFoundError:
-        console.print("[bold red]The specified file was not found.[/bold red]")
-    except Exception as e:
-        console.print(f"[bold red]An error has occurred:[/bold red] {e}")
-
-
-def check_file_extension(file_path_extension):
-    # Extract the file name and extension
-    file_name, file_extension = os.path.splitext(file_path_extension)
-
-    # Check if the file has one of the file extensions
-    if file_extension.lower() in ('.nes', '.unf', '.fds'):
-        read_nes_rom(file_path_extension)
-    elif file_extension.lower() in ('.sfc', '.smc', '.fig', '.bs', '.st'):
-        read_snes_rom(file_path_extension)
+    return read_rom_file(file_path, SNES_FORMAT, patterns, interactive, cache)
+
+
+# Reader for every supported file extension
+ROM_READERS.update({
+    ".nes": read_nes_rom,
+    ".unf": read_unif_rom,
+    ".fds": read_fds_rom,
+    ".sfc": read_snes_rom,
+    ".smc": read_snes_rom,
+    ".fig": read_snes_rom,
+    ".bs": read_snes_rom,
+    ".st": read_snes_rom,
+})
+
+# Format name and headless header parser for every supported file extension
+ROM_INSPECTORS.update({
+    ".nes": ("nes", inspect_nes),
+    ".unf": ("unif", inspect_unif),
+    ".fds": ("fds", inspect_fds),
+    ".sfc": ("snes", inspect_snes),
+    ".smc": ("snes", inspect_snes),
+    ".fig": ("snes", inspect_snes),
+    ".bs": ("snes", inspect_snes),
+    ".st": ("snes", inspect_snes),
+})
+
+# Checksum verification for every supported file extension
+ROM_CHECKSUMS.update({
+    ".nes": verify_nes_checksums,
+    ".unf": verify_no_checksums,
+    ".fds": verify_no_checksums,
+    ".sfc": verify_snes_checksums,
+    ".smc": verify_snes_checksums,
+    ".fig": verify_snes_checksums,
+    ".bs": verify_snes_checksums,
+    ".st": verify_snes_checksums,
+})
+
+# Bytes each checksum verification reads: none for iNES (only the image size is compared) and
+# the formats without checksum, the ROM without copier header for SNES
+ROM_CHECKSUM_BYTES.update({
+    ".nes": lambda rom: 0,
+    ".unf": lambda rom: 0,
+    ".fds": lambda rom: 0,
+    **{extension: lambda rom: rom.size - snes_copier_header_size(rom) for extension in (".sfc", ".smc", ".fig", ".bs", ".st")},
+})
+
+# Benchmark: synthetic ROMs (format, extension, size), random address lookups and viewer pages per run
+BENCH_ROMS.extend((
+    ("nes", ".nes", 16 + 2 * 16384 + 8192),
+    ("nes", ".nes", 16 + 32 * 16384 + 32 * 8192),
+    ("LoROM", ".smc", 512 + 512 * 1024),
+    ("HiROM", ".smc", 512 + 4 * 1024 * 1024),
+    ("ExHiROM", ".smc", 512 + 6 * 1024 * 1024),
+))
+
+def make_synthetic_rom(file_path, rom_format, size, seed=0):
+    """Writes a deterministic pseudo-random ROM image with a valid header and checksums.
+
+    `rom_format` is "nes" or a SNES layout (LoROM, HiROM, ExHiROM); SNES images of
+    size 512 mod 1024 get a copier header. One of the default search patterns is
+    placed every 16 KB so the scan has work to do.
+    """
+    rng = random.Random(f"{rom_format}:{size}:{seed}")
+    data = bytearray(rng.randbytes(size))
+    for offset in range(0x1000, size - 4, 0x4000):
+        data[offset:offset + 4] = DEFAULT_PATTERNS[offset // 0x4000 % len(DEFAULT_PATTERNS)]
+    if rom_format == "nes":
+        prg_blocks = (size - 16) // 16384
+        chr_blocks = (size - 16 - prg_blocks * 16384) // 8192
+        data[0:16] = b"NES\x1a" + bytes((prg_blocks, chr_blocks, 0x01)) + bytes(9)
     else:
-        print(f"{file_path_extension} has an unknown extension.")
+        copier_size = 512 if size % 1024 == 512 else 0
+        data[:copier_size] = bytes(copier_size)
+        header = copier_size + dict(SNES_HEADER_LAYOUTS)[rom_format]
+        map_mode = 0x20 | SNES_MAP_MODES[rom_format][0]
+        rom_size = ((size - copier_size) // 1024 - 1).bit_length()
+        data[header:header + 0x1C] = b"BENCHMARK".ljust(21) + bytes((map_mode, 0x02, rom_size, 0x03, 0x01, 0x01, 0x00))
+        data[header + 0x1C:header + 0x20] = b"\xFF\xFF\x00\x00"
+        data[header + 0x3C:header + 0x3E] = b"\x00\x80"
+    with open(file_path, "wb") as rom_file:
+        rom_file.write(data)
+    if rom_format != "nes":
+        # The SNES checksum depends on the mirroring rule, so it is computed on the written image
+        with RomImage(file_path) as rom:
+            checksum = snes_checksum(rom)
+        with open(file_path, "r+b") as rom_file:
+            rom_file.seek(header + 0x1C)
+            rom_file.write(struct.pack("<HH", checksum ^ 0xFFFF, checksum))
+
+def decode_nes_tiles(data):
+    """Decodes NES 2bpp planar tiles (16 bytes: 8 rows of plane 0, then 8 rows of plane 1) into (tiles, 8, 8) colour indices."""
+    planes = np.frombuffer(data, dtype=np.uint8)[:len(data) // 16 * 16].reshape(-1, 2, 8, 1)
+    bits = np.unpackbits(planes, axis=3)
+    return bits[:, 0] | bits[:, 1] << 1
+
+# Tile formats: name -> (bytes per tile, bits per pixel, decoder)
+TILE_FORMATS.update({
+    "nes": (16, 2, decode_nes_tiles),
+})
+
+def default_tile_range(rom, tile_format):
+    """The CHR-ROM of an iNES image (after header, trainer and PRG-ROM); without CHR-ROM the first TILE_DEFAULT_LENGTH bytes."""
+    header = inspect_nes(rom)
+    if header.header_size and header.chr_rom_size:
+        offset = header.header_size + (512 if header.flags_6 & 0x04 else 0) + header.prg_rom_size * 16384
+        return offset, min(header.chr_rom_size * 8192, rom.size - offset)
+    return 0, min(rom.size, TILE_DEFAULT_LENGTH)
+
+# 6502 addressing modes: operand template and instruction length
+MOS6502_MODES = {
+    "imp": ("", 1),
+    "acc": (" A", 1),
+    "imm": (" #${0:02X}", 2),
+    "zp": (" ${0:02X}", 2),
+    "zpx": (" ${0:02X},X", 2),
+    "zpy": (" ${0:02X},Y", 2),
+    "izx": (" (${0:02X},X)", 2),
+    "izy": (" (${0:02X}),Y", 2),
+    "rel": (" ${0:04X}", 2),
+    "abs": (" ${0:04X}", 3),
+    "abx": (" ${0:04X},X", 3),
+    "aby": (" ${0:04X},Y", 3),
+    "ind": (" (${0:04X})", 3),
+}
+
+# Official 6502 opcodes: opcode -> (mnemonic, addressing mode)
+MOS6502_OPCODES = {
+    0x00: ("BRK", "imp"), 0x01: ("ORA", "izx"), 0x05: ("ORA", "zp"), 0x06: ("ASL", "zp"), 0x08: ("PHP", "imp"), 0x09: ("ORA", "imm"),
+    0x0A: ("ASL", "acc"), 0x0D: ("ORA", "abs"), 0x0E: ("ASL", "abs"), 0x10: ("BPL", "rel"), 0x11: ("ORA", "izy"), 0x15: ("ORA", "zpx"),
+    0x16: ("ASL", "zpx"), 0x18: ("CLC", "imp"), 0x19: ("ORA", "aby"), 0x1D: ("ORA", "abx"), 0x1E: ("ASL", "abx"), 0x20: ("JSR", "abs"),
+    0x21: ("AND", "izx"), 0x24: ("BIT", "zp"), 0x25: ("AND", "zp"), 0x26: ("ROL", "zp"), 0x28: ("PLP", "imp"), 0x29: ("AND", "imm"),
+    0x2A: ("ROL", "acc"), 0x2C: ("BIT", "abs"), 0x2D: ("AND", "abs"), 0x2E: ("ROL", "abs"), 0x30: ("BMI", "rel"), 0x31: ("AND", "izy"),
+    0x35: ("AND", "zpx"), 0x36: ("ROL", "zpx"), 0x38: ("SEC", "imp"), 0x39: ("AND", "aby"), 0x3D: ("AND", "abx"), 0x3E: ("ROL", "abx"),
+    0x40: ("RTI", "imp"), 0x41: ("EOR", "izx"), 0x45: ("EOR", "zp"), 0x46: ("LSR", "zp"), 0x48: ("PHA", "imp"), 0x49: ("EOR", "imm"),
+    0x4A: ("LSR", "acc"), 0x4C: ("JMP", "abs"), 0x4D: ("EOR", "abs"), 0x4E: ("LSR", "abs"), 0x50: ("BVC", "rel"), 0x51: ("EOR", "izy"),
+    0x55: ("EOR", "zpx"), 0x56: ("LSR", "zpx"), 0x58: ("CLI", "imp"), 0x59: ("EOR", "aby"), 0x5D: ("EOR", "abx"), 0x5E: ("LSR", "abx"),
+    0x60: ("RTS", "imp"), 0x61: ("ADC", "izx"), 0x65: ("ADC", "zp"), 0x66: ("ROR", "zp"), 0x68: ("PLA", "imp"), 0x69: ("ADC", "imm"),
+    0x6A: ("ROR", "acc"), 0x6C: ("JMP", "ind"), 0x6D: ("ADC", "abs"), 0x6E: ("ROR", "abs"), 0x70: ("BVS", "rel"), 0x71: ("ADC", "izy"),
+    0x75: ("ADC", "zpx"), 0x76: ("ROR", "zpx"), 0x78: ("SEI", "imp"), 0x79: ("ADC", "aby"), 0x7D: ("ADC", "abx"), 0x7E: ("ROR", "abx"),
+    0x81: ("STA", "izx"), 0x84: ("STY", "zp"), 0x85: ("STA", "zp"), 0x86: ("STX", "zp"), 0x88: ("DEY", "imp"), 0x8A: ("TXA", "imp"),
+    0x8C: ("STY", "abs"), 0x8D: ("STA", "abs"), 0x8E: ("STX", "abs"), 0x90: ("BCC", "rel"), 0x91: ("STA", "izy"), 0x94: ("STY", "zpx"),
+    0x95: ("STA", "zpx"), 0x96: ("STX", "zpy"), 0x98: ("TYA", "imp"), 0x99: ("STA", "aby"), 0x9A: ("TXS", "imp"), 0x9D: ("STA", "abx"),
+    0xA0: ("LDY", "imm"), 0xA1: ("LDA", "izx"), 0xA2: ("LDX", "imm"), 0xA4: ("LDY", "zp"), 0xA5: ("LDA", "zp"), 0xA6: ("LDX", "zp"),
+    0xA8: ("TAY", "imp"), 0xA9: ("LDA", "imm"), 0xAA: ("TAX", "imp"), 0xAC: ("LDY", "abs"), 0xAD: ("LDA", "abs"), 0xAE: ("LDX", "abs"),
+    0xB0: ("BCS", "rel"), 0xB1: ("LDA", "izy"), 0xB4: ("LDY", "zpx"), 0xB5: ("LDA", "zpx"), 0xB6: ("LDX", "zpy"), 0xB8: ("CLV", "imp"),
+    0xB9: ("LDA", "aby"), 0xBA: ("TSX", "imp"), 0xBC: ("LDY", "abx"), 0xBD: ("LDA", "abx"), 0xBE: ("LDX", "aby"), 0xC0: ("CPY", "imm"),
+    0xC1: ("CMP", "izx"), 0xC4: ("CPY", "zp"), 0xC5: ("CMP", "zp"), 0xC6: ("DEC", "zp"), 0xC8: ("INY", "imp"), 0xC9: ("CMP", "imm"),
+    0xCA: ("DEX", "imp"), 0xCC: ("CPY", "abs"), 0xCD: ("CMP", "abs"), 0xCE: ("DEC", "abs"), 0xD0: ("BNE", "rel"), 0xD1: ("CMP", "izy"),
+    0xD5: ("CMP", "zpx"), 0xD6: ("DEC", "zpx"), 0xD8: ("CLD", "imp"), 0xD9: ("CMP", "aby"), 0xDD: ("CMP", "abx"), 0xDE: ("DEC", "abx"),
+    0xE0: ("CPX", "imm"), 0xE1: ("SBC", "izx"), 0xE4: ("CPX", "zp"), 0xE5: ("SBC", "zp"), 0xE6: ("INC", "zp"), 0xE8: ("INX", "imp"),
+    0xE9: ("SBC", "imm"), 0xEA: ("NOP", "imp"), 0xEC: ("CPX", "abs"), 0xED: ("SBC", "abs"), 0xEE: ("INC", "abs"), 0xF0: ("BEQ", "rel"),
+    0xF1: ("SBC", "izy"), 0xF5: ("SBC", "zpx"), 0xF6: ("INC", "zpx"), 0xF8: ("SED", "imp"), 0xF9: ("SBC", "aby"), 0xFD: ("SBC", "abx"),
+    0xFE: ("INC", "abx"),
+}
+
+def _mos6502_table():
+    """Expands MOS6502_OPCODES into a 256-entry table of (template, length, flow, jump target)."""
+    table = []
+    for opcode in range(256):
+        if opcode not in MOS6502_OPCODES:
+            # Undocumented opcodes are treated as data and stop the trace
+            table.append((f".DB ${opcode:02X}", 1, FLOW_END, None))
+            continue
+        mnemonic, mode = MOS6502_OPCODES[opcode]
+        operand, length = MOS6502_MODES[mode]
+        flow, target = FLOW_NEXT, None
+        if mode == "rel":
+            flow, target = FLOW_BRANCH, "rel"
+        elif mnemonic == "JSR":
+            flow, target = FLOW_BRANCH, "abs"
+        elif opcode == 0x4C:
+            flow, target = FLOW_JUMP, "abs"
+        elif mnemonic in ("JMP", "RTS", "RTI", "BRK"):
+            flow = FLOW_END
+        table.append((mnemonic + operand, length, flow, target))
+    return tuple(table)
+
+MOS6502_TABLE = _mos6502_table()
+
+class Mos6502Cpu:
+    """6502 (NES): PRG-ROM is mapped at 0x8000-0xFFFF.
+
+    Up to 32 KB of PRG-ROM are mapped as a whole (16 KB mirrored); with larger PRG-ROMs the last
+    bank is fixed at 0xC000 and 0x8000-0xBFFF resolves to the bank of the calling code.
+    """
+
+    name = "6502"
+    max_length = 3
+
+    def __init__(self, rom):
+        self.rom = rom
+        header = inspect_nes(rom)
+        self.prg_start = header.header_size + (512 if header.header_size and header.flags_6 & 0x04 else 0)
+        prg_size = header.prg_rom_size * 16384 if header.header_size else rom.size
+        self.prg_size = max(0, min(prg_size, rom.size - self.prg_start))
+
+    def entry_points(self):
+        """The RESET, NMI and IRQ/BRK vectors."""
+        if self.prg_size < 6:
+            return []
+        vectors = self.offset_of(0xFFFA, self.prg_start + self.prg_size - 1)
+        entry_points = []
+        for vector in (vectors + 2, vectors, vectors + 4):
+            offset = self.offset_of(self.rom.u16le(vector), self.prg_start + self.prg_size - 1)
+            if offset is not None and offset not in entry_points:
+                entry_points.append(offset)
+        return entry_points
+
+    def offset_of(self, address, origin):
+        if address < 0x8000 or not self.prg_size:
+            return None  # RAM, PPU/APU registers or PRG-RAM
+        if self.prg_size <= 0x8000:
+            return self.prg_start + (address - 0x8000) % self.prg_size
+        if address >= 0xC000:
+            return self.prg_start + self.prg_size - 0x4000 + address - 0xC000
+        bank = (origin - self.prg_start) // 0x4000
+        if not 0 <= bank < self.prg_size // 0x4000 - 1:
+            bank = 0
+        return self.prg_start + bank * 0x4000 + address - 0x8000
+
+    def cpu_address(self, offset):
+        relative = offset - self.prg_start
+        if not 0 <= relative < self.prg_size:
+            return None
+        if self.prg_size <= 0x8000:
+            return 0x10000 - self.prg_size + relative
+        if relative >= self.prg_size - 0x4000:
+            return 0xC000 + relative - (self.prg_size - 0x4000)
+        return 0x8000 + relative % 0x4000
+
+    def address(self, offset):
+        address = self.cpu_address(offset)
+        return "-----" if address is None else f"${address:04X}"
+
+    def _entry(self, offset):
+        entry = MOS6502_TABLE[self.rom.view[offset]]
+        if offset + entry[1] > self.rom.size:
+            return f".DB ${self.rom.view[offset]:02X}", 1, FLOW_END, None
+        return entry
+
+    def decode(self, offset):
+        """(length, flow, target offset) of the instruction at `offset`."""
+        template, length, flow, target = self._entry(offset)
+        if target == "rel":
+            target_offset = offset + length + signed_byte(self.rom.view[offset + 1])
+            return length, flow, target_offset if 0 <= target_offset < self.rom.size else None
+        if target == "abs":
+            return length, flow, self.offset_of(self.rom.u16le(offset + 1), offset)
+        return length, flow, None
+
+    def format(self, offset):
+        template, length, flow, target = self._entry(offset)
+        if length == 1:
+            return template
+        if target == "rel":
+            address = self.cpu_address(offset)
+            value = ((offset if address is None else address) + length + signed_byte(self.rom.view[offset + 1])) & 0xFFFF
+        elif length == 3:
+            value = self.rom.u16le(offset + 1)
+        else:
+            value = self.rom.view[offset + 1]
+        return template.format(value)
+
+# Disassembler CPU for every supported file extension (no 65816 decoder for SNES)
+ROM_DISASSEMBLERS.update({
+    ".nes": Mos6502Cpu,
+})
+
+FAMILY.update(
+    module=__name__,
+    description="NES-ROM/SNES-Inspektor",
+    rom_help="Path to the NES/SNES ROM file",
+    default_tile_format="nes",
+    disasm_help="Disassemble code (6502 for NES)",
+    default_tile_range=default_tile_range,
+    make_synthetic_rom=make_synthetic_rom,
+)
 
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="NES-ROM/SNES-Inspektor")
-    parser.add_argument("rom_path", type=str, help="Path to the NES/SNES ROM file")
-    args = parser.parse_args()
-
-    check_file_extension(args.rom_path)
+    main()
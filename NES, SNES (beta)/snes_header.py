@@ -0,0 +1,41 @@
+import struct
+
+# SNES header scoring, shared by read_rom.py in this folder and the format sniffing in the
+# top-level read_rom.py. Only the standard library is used, so sniffing stays cheap.
+
+# SNES internal header candidates (offset without copier header) and the map mode nibbles that fit them
+SNES_HEADER_LAYOUTS = (("LoROM", 0x7FC0), ("HiROM", 0xFFC0), ("ExHiROM", 0x40FFC0))
+SNES_MAP_MODES = {"LoROM": (0x0, 0x2, 0x3), "HiROM": (0x1, 0xA), "ExHiROM": (0x5,)}
+
+
+def plausible_title_byte(byte):
+    """ASCII or JIS X 0201 half-width katakana, as used in SNES header titles."""
+    return 0x20 <= byte <= 0x7E or 0xA1 <= byte <= 0xDF
+
+def score_header(header, layout):
+    """Plausibility score of a 64-byte header candidate; None if fewer bytes are given.
+
+    Points are given for a checksum that matches its complement, a map mode that fits
+    the layout, a plausible title, a plausible ROM size and a reset vector pointing into ROM.
+    """
+    if len(header) < 0x40:
+        return None
+    score = 0
+    complement, checksum = struct.unpack_from("<HH", header, 0x1C)
+    if checksum ^ complement == 0xFFFF:
+        score += 4
+    map_mode = header[0x15]
+    if map_mode & 0xE0 == 0x20:
+        score += 1
+        if (map_mode & 0x0F) in SNES_MAP_MODES[layout]:
+            score += 2
+    title = header[0x00:0x15]
+    if all(plausible_title_byte(byte) for byte in title):
+        score += 2
+    elif sum(plausible_title_byte(byte) for byte in title) >= 16:
+        score += 1
+    if 0x07 <= header[0x17] <= 0x0D:
+        score += 1
+    if struct.unpack_from("<H", header, 0x3C)[0] >= 0x8000:
+        score += 1
+    return score
@@ -0,0 +1,278 @@
+import argparse
+import gzip
+import importlib
+import importlib.util
+import json
+import os
+import struct
+import sys
+import zipfile
+
+# Single entry point for all ROM formats.
+# The format is sniffed from the first bytes of the file (not from the extension), and only the
+# script that handles it is imported. "identify" never loads a script; the scripts themselves
+# import rich and NumPy only when they print to a terminal or sum whole ROMs.
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# One read of this many bytes covers the iNES, Game Boy and GBA headers and the SNES
+# LoROM/HiROM header candidates, also behind a 512-byte copier header
+SNIFF_BYTES = 0x10000 + 512
+ARCHIVE_SEPARATOR = "::"
+
+# Nintendo logo at 0x104 that the Game Boy boot ROM checks
+GB_LOGO = bytes.fromhex(
+    "CEED6666CC0D000B03730083000C000D0008111F8889000E"
+    "DCCC6EE6DDDDD999BBBB67636E0EECCCDDDC999FBBB9333E"
+)
+
+SNES_MIN_SCORE = 6  # A checksum pair that matches alone is not enough, a plausible title or map mode must fit too
+
+# Script that handles every family of formats
+FORMAT_FAMILIES = {
+    "gb": os.path.join(ROOT_DIR, "GB, GBC, GBA", "read_rom.py"),
+    "nes": os.path.join(ROOT_DIR, "NES, SNES (beta)", "read_rom.py"),
+}
+
+def _load_snes_header():
+    """SNES header scoring from the NES/SNES folder, loaded by path so that folder stays off sys.path.
+
+    It is registered as "snes_header", so the NES/SNES script finds the same module when it is loaded.
+    """
+    path = os.path.join(os.path.dirname(FORMAT_FAMILIES["nes"]), "snes_header.py")
+    spec = importlib.util.spec_from_file_location("snes_header", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["snes_header"] = module
+    spec.loader.exec_module(module)
+    return module
+
+snes_header = _load_snes_header()
+
+# Subcommands of the format scripts that take a single ROM as first positional argument
+SINGLE_ROM_COMMANDS = {"read", "export", "diff", "patch", "regions", "tiles", "disasm"}
+HANDLER_COMMANDS = SINGLE_ROM_COMMANDS | {"batch", "bench", "text", "index", "fingerprint", "verify", "dat", "cache", "serve"}
+
+
+def split_archive_path(file_path):
+    """Splits "library.zip::folder/game.gb" into the zip file and the entry name (None for plain files)."""
+    container, separator, entry = file_path.partition(ARCHIVE_SEPARATOR)
+    if separator and container.lower().endswith(".zip"):
+        return container, entry
+    return file_path, None
+
+def read_head(file_path):
+    """First SNIFF_BYTES of a ROM and its size; zip entries and .gz files are only decompressed that far."""
+    container, entry = split_archive_path(file_path)
+    if entry is None and container.lower().endswith(".zip"):
+        # A zip with a single file is sniffed like that file
+        with zipfile.ZipFile(container) as archive:
+            names = [info.filename for info in archive.infolist() if not info.is_dir()]
+        if len(names) != 1:
+            return b"", 0
+        entry = names[0]
+    if entry is not None:
+        with zipfile.ZipFile(container) as archive:
+            info = archive.getinfo(entry)
+            with archive.open(info) as handle:
+                return handle.read(SNIFF_BYTES), info.file_size
+    if container.lower().endswith(".gz"):
+        with open(container, "rb") as handle:
+            handle.seek(-4, os.SEEK_END)
+            size = struct.unpack("<I", handle.read(4))[0]  # ISIZE: uncompressed size modulo 2^32
+        with gzip.open(container, "rb") as handle:
+            return handle.read(SNIFF_BYTES), size
+    with open(container, "rb") as handle:
+        return handle.read(SNIFF_BYTES), os.fstat(handle.fileno()).st_size
+
+def read_at(file_path, offset, length):
+    """Reads a window further into the ROM (only for plain files; archives stay with the first read)."""
+    container, entry = split_archive_path(file_path)
+    if entry is not None or container.lower().endswith((".zip", ".gz")):
+        return b""
+    with open(container, "rb") as handle:
+        handle.seek(offset)
+        return handle.read(length)
+
+def sniff_ines(head, size, file_path):
+    return head[:4] == b"NES\x1a"
+
+def sniff_unif(head, size, file_path):
+    return head[:4] == b"UNIF"
+
+def sniff_fds(head, size, file_path):
+    # fwNES header or a bare disk side that starts with the disk info block
+    return head[:4] == b"FDS\x1a" or head[:15] == b"\x01*NINTENDO-HVC*"
+
+def sniff_gba(head, size, file_path):
+    """Fixed value 0x96 at 0xB2 and a header complement that matches the bytes 0xA0-0xBC."""
+    if len(head) < 0xC0 or head[0xB2] != 0x96:
+        return False
+    return (-(sum(head[0xA0:0xBD]) + 0x19)) & 0xFF == head[0xBD]
+
+def sniff_gbc(head, size, file_path):
+    """Game Boy logo at 0x104 and the CGB flag (0x80: also runs on DMG, 0xC0: GBC only) at 0x143."""
+    return len(head) > 0x143 and head[0x104:0x134] == GB_LOGO and head[0x143] in (0x80, 0xC0)
+
+def sniff_gb(head, size, file_path):
+    return head[0x104:0x134] == GB_LOGO
+
+def sniff_snes(head, size, file_path):
+    """Best-scoring SNES header candidate; the ExHiROM header (at 4 MB) needs a second small read."""
+    base = 512 if size % 1024 == 512 else 0
+    for layout, offset in snes_header.SNES_HEADER_LAYOUTS:
+        if base + offset + 0x40 <= len(head):
+            header = head[base + offset:base + offset + 0x40]
+        elif base + offset + 0x40 <= size:
+            header = read_at(file_path, base + offset, 0x40)
+        else:
+            continue
+        score = snes_header.score_header(header, layout)
+        if score is not None and score >= SNES_MIN_SCORE:
+            return True
+    return False
+
+# Format registry: name, family script, extension the script reads it as, and the sniffer.
+# Checked in this order; cheap magic numbers come first and SNES scoring, the weakest check, last.
+FORMAT_HANDLERS = (
+    ("NES", "nes", ".nes", sniff_ines),
+    ("UNIF", "nes", ".unf", sniff_unif),
+    ("FDS", "nes", ".fds", sniff_fds),
+    ("GBA", "gb", ".gba", sniff_gba),
+    ("GBC", "gb", ".gbc", sniff_gbc),
+    ("GB", "gb", ".gb", sniff_gb),
+    ("SNES", "nes", ".sfc", sniff_snes),
+)
+
+def sniff_format(file_path):
+    """Identifies a ROM by its content; returns (format, family, extension) or None."""
+    head, size = read_head(file_path)
+    for name, family, extension, sniffer in FORMAT_HANDLERS:
+        if sniffer(head, size, file_path):
+            return name, family, extension
+    return None
+
+def load_handler(family):
+    """Imports the script of a format family on first use.
+
+    It is imported as "read_rom" from its own folder (put first on sys.path), as it sees
+    itself when started directly, so worker processes started with "spawn" (Windows,
+    macOS) can import it again to unpickle their jobs. One process loads one family.
+    """
+    script = FORMAT_FAMILIES[family]
+    module = sys.modules.get("read_rom")
+    if module is not None and os.path.abspath(module.__file__) != script:
+        raise RuntimeError(f"{module.__file__} is already loaded; only one ROM family can be handled per process.")
+    if module is None:
+        sys.path.insert(0, os.path.dirname(script))
+        module = importlib.import_module("read_rom")
+    return module
+
+def iter_files(paths):
+    """Files given directly and every file below the given directories; zips with several files are listed by entry."""
+    for path in paths:
+        if os.path.isdir(path):
+            files = (os.path.join(directory, name) for directory, _, names in sorted(os.walk(path)) for name in sorted(names))
+        else:
+            files = (path,)
+        for file_path in files:
+            if file_path.lower().endswith(".zip") and zipfile.is_zipfile(file_path):
+                with zipfile.ZipFile(file_path) as archive:
+                    names = [info.filename for info in archive.infolist() if not info.is_dir()]
+                if len(names) > 1:
+                    yield from (f"{file_path}{ARCHIVE_SEPARATOR}{name}" for name in names)
+                    continue
+            yield file_path
+
+def identify(paths, json_output=False):
+    """Prints the sniffed format of every file without loading a handler (and without rich)."""
+    for file_path in iter_files(paths):
+        try:
+            result = sniff_format(file_path)
+        except (OSError, KeyError, zipfile.BadZipFile, EOFError) as e:
+            print(f"{file_path}: {e}", file=sys.stderr)
+            continue
+        name, family, _ = result or ("unknown", None, None)
+        if json_output:
+            print(json.dumps({"path": file_path, "format": name, "family": family}))
+        else:
+            print(f"{name:<8} {family or '-':<4} {file_path}")
+
+def load_common():
+    """rom_common.py next to this script, which also holds the command line of the family scripts."""
+    if ROOT_DIR not in sys.path:
+        sys.path.append(ROOT_DIR)
+    return importlib.import_module("rom_common")
+
+def rom_arguments(argv):
+    """Positional arguments after the subcommand, i.e. the ROM paths and patterns.
+
+    Values of options are skipped; which options take one comes from the parser of the
+    family scripts. Commands on a single ROM only give the first one; the second ROM of
+    "diff" and the patch file of "patch" are not sniffed.
+    """
+    value_options = load_common().value_options()
+    arguments = []
+    remaining = iter(argv[1:])
+    for argument in remaining:
+        if argument in value_options:
+            next(remaining, None)
+        elif not argument.startswith("-"):
+            arguments.append(argument)
+    return arguments[:1] if argv[0] in SINGLE_ROM_COMMANDS else arguments
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] == "identify":
+        parser = argparse.ArgumentParser(prog="read_rom.py identify", description="Identify ROMs by their content")
+        parser.add_argument("paths", nargs="+", help="ROM files, zip entries or directories")
+        parser.add_argument("--json", action="store_true", help="One JSON object per file")
+        args = parser.parse_args(argv[1:])
+        identify(args.paths, args.json)
+        return
+
+    family = None
+    if argv[:1] == ["--family"] and len(argv) > 1:
+        family, argv = argv[1], argv[2:]
+        if family not in FORMAT_FAMILIES:
+            sys.exit(f"Unknown family {family!r}; choose one of: {', '.join(FORMAT_FAMILIES)}")
+    if not argv or argv[0] in ("-h", "--help"):
+        print("usage: read_rom.py [--family {gb,nes}] <rom> | <command> ... | identify <paths>\n\n"
+              "The format is detected from the file content and the command is passed to the\n"
+              f"script that handles it. Commands: {', '.join(sorted(HANDLER_COMMANDS))}, identify.\n"
+              "Library commands on directories need --family, e.g. read_rom.py --family nes batch roms/")
+        return
+    # "read_rom.py <rom>" keeps working without naming the command
+    if argv[0] not in HANDLER_COMMANDS:
+        argv.insert(0, "read")
+
+    # Every ROM file named on the command line is sniffed; a mislabeled or unnamed one
+    # is read with the extension of its content
+    sniffed = {}
+    for argument in rom_arguments(argv):
+        container, _ = split_archive_path(argument)
+        if not os.path.isfile(container):
+            continue
+        try:
+            result = sniff_format(argument)
+        except (OSError, KeyError, zipfile.BadZipFile, EOFError):
+            result = None
+        if result is not None:
+            sniffed[argument] = result
+    if family is None:
+        families = {result[1] for result in sniffed.values()}
+        if len(families) != 1:
+            reason = "mixes formats of both scripts" if families else "names no ROM file with a known format"
+            sys.exit(f"The command line {reason}; choose the script with --family {{{','.join(FORMAT_FAMILIES)}}}.")
+        family = families.pop()
+
+    handler = load_handler(family)
+    for argument, (_, result_family, extension) in sniffed.items():
+        # A bare zip is opened through its single entry, whose name the script checks itself
+        if result_family != family or argument.lower().endswith(".zip"):
+            continue
+        if handler.ROM_READERS.get(handler.rom_extension(argument)) is not handler.ROM_READERS[extension]:
+            handler.SNIFFED_EXTENSIONS[argument] = extension
+    handler.main(argv)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3569 @@
+import argparse
+import bisect
+import contextlib
+import cProfile
+from array import array
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from itertools import chain
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+import csv
+import fnmatch
+import glob
+import gzip
+import hashlib
+import importlib
+import importlib.util
+import json
+import math
+import mmap
+import os
+import platform
+import random
+import re
+import string
+import sqlite3
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.parse
+import xml.etree.ElementTree as ElementTree
+import zipfile
+import zlib
+
+# Infrastructure shared by the family scripts "GB, GBC, GBA/read_rom.py" and "NES, SNES (beta)/read_rom.py":
+# ROM access (also inside zip and gzip archives), hex dump and export, pattern search, result cache,
+# hashes and DAT index, diff and patches, region map, text and tile extraction, disassembler,
+# n-gram index, signatures, HTTP service, profiling, benchmark and the command line.
+# A family script fills the format tables below with its readers, checksums and CPUs on import.
+
+class LazyModule:
+    """Module that is imported on first attribute access (NumPy alone takes longer to import than a cached batch run)."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, name):
+        return getattr(self._import(), name)
+
+    def _import(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+# NumPy is optional; without it checksums are summed in plain Python
+np = LazyModule("numpy") if importlib.util.find_spec("numpy") is not None else None
+
+class Console:
+    """Stand-in for rich's Console that imports rich on first use.
+
+    Runs that print nothing to the terminal, such as batch runs with redirected
+    stderr, skip the rich import.
+    """
+
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._console = None
+
+    def _rich(self):
+        if self._console is None:
+            from rich.console import Console as RichConsole
+            self._console = RichConsole(**self._kwargs)
+        return self._console
+
+    def __getattr__(self, name):
+        return getattr(self._rich(), name)
+
+    def __setattr__(self, name, value):
+        # Settings belong to the rich console, except quiet, which the stand-in keeps until rich is loaded
+        if name.startswith("_") or name == "quiet":
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._rich(), name, value)
+
+    @property
+    def quiet(self):
+        return self._console.quiet if self._console is not None else self._kwargs.get("quiet", False)
+
+    @quiet.setter
+    def quiet(self, value):
+        if self._console is not None:
+            self._console.quiet = value
+        else:
+            self._kwargs["quiet"] = value
+
+console = Console()
+
+class PlainConsole:
+    """Status output on a stream that is no terminal: the markup is stripped and rich is not imported."""
+
+    _markup = re.compile(r"\[/?[a-z#@][^\[\]]*\]")
+
+    def __init__(self, file):
+        self.file = file
+
+    def print(self, *objects, **kwargs):
+        print(*(self._markup.sub("", str(text)) for text in objects), file=self.file, flush=True)
+
+def stderr_console():
+    """Console for status lines on stderr; plain text when stderr is redirected (scripts, logs)."""
+    return Console(stderr=True) if sys.stderr.isatty() else PlainConsole(sys.stderr)
+
+# Extensions assigned by content sniffing (top-level read_rom.py) to ROMs whose file name does not tell the format
+SNIFFED_EXTENSIONS = {}
+
+# Format tables, filled by the family script that imports this module: reader, format name with
+# headless header parser, checksum verification and the bytes it reads per file extension, tile
+# formats, CPUs per file extension and the synthetic ROMs of the benchmark
+ROM_READERS = {}
+ROM_INSPECTORS = {}
+ROM_CHECKSUMS = {}
+ROM_CHECKSUM_BYTES = {}
+TILE_FORMATS = {}
+ROM_DISASSEMBLERS = {}
+BENCH_ROMS = []
+
+# Texts and hooks of the family script: argparse description and help texts, default tile format,
+# default tile range and synthetic ROM generator, and its module name for spawned workers
+FAMILY = {}
+
+# Hex dump layout: "0xAAAAAAAA: XX XX ... XX | ................\n" (16 bytes per line)
+HEX_LINE_BYTES = 16
+HEX_LINE_WIDTH = 79
+HEX_DUMP_CHUNK = 256 * 1024  # ROM bytes formatted per batch (about 1.2 MB of text)
+VIEW_PAGE_LINES = 32  # Lines per page in the ROM viewer
+VIEW_CACHE_PAGES = 64  # Rendered pages kept by the ROM viewer
+_HEX_LINE_TEMPLATE = b"0x00000000: " + b" ".join([b"00"] * HEX_LINE_BYTES) + b" | " + b"." * HEX_LINE_BYTES + b"\n"
+_ASCII_TABLE = bytes(byte if 32 <= byte <= 126 else 0x2E for byte in range(256))
+
+# ROM search: default patterns, scan window and number of bytes shown per match
+DEFAULT_PATTERNS = (b"SAVE", b"GAME")
+SCAN_WINDOW = 1024 * 1024
+SCAN_CONTEXT = 16
+
+# Checksums are summed over the memory map in chunks of this size
+CHECKSUM_CHUNK = 4 * 1024 * 1024
+
+# ROM diff: blocks compared at once, ranges listed by default, IPS/BPS format limits
+DIFF_BLOCK = 64 * 1024
+DIFF_SHOWN_RANGES = 50
+IPS_MAX_OFFSET = 0xFFFFFF
+IPS_EOF_OFFSET = 0x454F46
+BPS_SOURCE_READ = 0
+BPS_TARGET_READ = 1
+BPS_SOURCE_COPY = 2
+BPS_TARGET_COPY = 3
+
+# Region map: minimum block size, blocks per map row, rows at most, bytes counted at once
+REGION_BLOCK = 4096
+REGION_MAP_WIDTH = 64
+REGION_MAP_CELLS = REGION_MAP_WIDTH * 32
+REGION_CHUNK = 1024 * 1024
+# Region classes with map symbol and style
+REGION_CLASSES = {
+    "code": ("C", "bold green"),
+    "data": ("d", "cyan"),
+    "text": ("T", "bold yellow"),
+    "compressed": ("#", "bold red"),
+    "padding": (".", "dim"),
+}
+
+# Text extraction: minimum number of table entries per string, Bytes read per step
+TEXT_MIN_LENGTH = 4
+TEXT_CHUNK = 1024 * 1024
+
+# Tile decoder: tiles per sheet row and bytes decoded when no range is given
+TILE_SHEET_COLUMNS = 16
+TILE_DEFAULT_LENGTH = 256 * 1024
+
+# Disassembler: control flow of an instruction and lines shown by the listing and the address viewer
+FLOW_NEXT = 0  # continues with the next instruction
+FLOW_BRANCH = 1  # conditional jump or call: target and next instruction
+FLOW_JUMP = 2  # unconditional jump: target only
+FLOW_END = 3  # return, indirect jump or data
+DISASM_LISTING = 32
+DISASM_VIEW_LINES = 8
+
+# N-gram index: block size, Bytes a block's n-grams reach into the next block, target share of
+# false candidate blocks for a query of INDEX_TARGET_GRAMS n-grams (an 8-byte pattern), signature
+# columns written per batch while building and n-grams per query
+INDEX_BLOCK = 64 * 1024
+INDEX_OVERLAP = 64
+INDEX_FALSE_POSITIVES = 0.1
+INDEX_TARGET_GRAMS = 5
+INDEX_BATCH_COLUMNS = 64
+INDEX_QUERY_GRAMS = 16
+
+# Archives: separator between a zip file and the ROM inside it, Bytes decompressed per step
+ARCHIVE_SEPARATOR = "::"
+ARCHIVE_CHUNK = 1024 * 1024
+ARCHIVE_MEMORY_HELP = ("Compressed zip entries and .gz files are streamed, except by the viewer and tiles, which keep the ROM "
+                       "decompressed up to the last byte they show, and by the viewer search, disasm and BPS patches, which "
+                       "decompress the whole ROM into memory.")
+
+# Signature matching: candidates compared per NumPy batch
+SIGNATURE_BATCH = 64 * 1024
+
+# HTTP service: default port, ROMs kept open, seconds until an unused ROM is closed, largest range and request head
+SERVE_PORT = 8765
+SERVE_OPEN_ROMS = 16
+SERVE_IDLE_SECONDS = 300
+SERVE_MAX_RANGE = 16 * 1024 * 1024
+SERVE_MAX_REQUEST = 64 * 1024
+
+# Profiling: callables that receive a record after every profiled stage (see profile_stage)
+PROFILE_HOOKS = []
+
+# Result cache: reports of unchanged ROMs are reused instead of parsing and scanning again
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+def add_profile_hook(hook):
+    """Registers `hook(record)`; it is called with a record dict after every profiled stage."""
+    PROFILE_HOOKS.append(hook)
+    return hook
+
+def remove_profile_hook(hook):
+    PROFILE_HOOKS.remove(hook)
+
+@contextlib.contextmanager
+def profile_stage(stage, data_bytes=0):
+    """Measures the enclosed stage and passes the record to the profile hooks.
+
+    The record holds the wall time, the bytes processed, MB/s and the peak traced memory
+    (only while tracemalloc is running). Without registered hooks nothing is measured.
+    """
+    if not PROFILE_HOOKS:
+        yield
+        return
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        record = {
+            "stage": stage,
+            "seconds": round(elapsed, 6),
+            "bytes": data_bytes,
+            "mb_per_s": round(data_bytes / (1024 * 1024) / elapsed, 1) if data_bytes and elapsed else None,
+            "peak_memory": tracemalloc.get_traced_memory()[1] if tracing else None,
+        }
+        for hook in list(PROFILE_HOOKS):
+            hook(record)
+
+class StageProfiler:
+    """Collects the stage records of one run (--profile), optionally under cProfile.
+
+    On exit the stages are printed and, if requested, written as JSON summary and
+    cProfile dump (readable with `python -m pstats`).
+    """
+
+    def __init__(self, summary_path=None, cprofile_path=None, target_console=None):
+        self.summary_path = summary_path
+        self.cprofile_path = cprofile_path
+        self.console = target_console or console
+        self.records = []
+        self._profile = None
+
+    def __enter__(self):
+        tracemalloc.start()
+        add_profile_hook(self.records.append)
+        if self.cprofile_path:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._started = time.perf_counter()
+        # NumPy is imported as a stage of its own; otherwise the first stage that sums bytes pays for it
+        if isinstance(np, LazyModule):
+            with profile_stage("import numpy"):
+                np._import()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self._started
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.cprofile_path)
+        remove_profile_hook(self.records.append)
+        tracemalloc.stop()
+        self.print_summary(elapsed)
+        if self.summary_path:
+            with open(self.summary_path, "w", encoding="utf-8") as summary_file:
+                json.dump({"total_seconds": round(elapsed, 6), "stages": self.records}, summary_file, indent=2)
+
+    def print_summary(self, elapsed):
+        self.console.print("\n[bold cyan]=== Profile ===[/bold cyan]")
+        for record in self.records:
+            rate = f", {record['mb_per_s']} MB/s" if record["mb_per_s"] else ""
+            self.console.print(f"[bold yellow]{record['stage']}:[/bold yellow] {record['seconds'] * 1000:.3f} ms, "
+                               f"{record['bytes']} Bytes{rate}, peak {record['peak_memory'] // 1024} KB")
+        self.console.print(f"[bold green]Total:[/bold green] {elapsed * 1000:.3f} ms")
+        if self.cprofile_path:
+            self.console.print(f"[bold green]cProfile dump:[/bold green] {self.cprofile_path}")
+
+def format_hex_line(block, address):
+    """Formats up to 16 bytes as a single hex dump line (without newline)."""
+    block = bytes(block)
+    hex_data = block.hex(" ").upper()
+    ascii_data = block.translate(_ASCII_TABLE).decode("ascii")
+    return f"0x{address:08X}: {hex_data:<47} | {ascii_data}"
+
+def format_hex_dump(data, address=0):
+    """Formats a whole block of ROM data as hex dump text in one go.
+
+    Full lines are built column by column with strided slice assignments on a
+    pre-filled template, so the cost does not depend on Python-level work per line.
+    """
+    data = bytes(data)
+    line_count = len(data) // HEX_LINE_BYTES
+    body_size = line_count * HEX_LINE_BYTES
+    dump = bytearray(_HEX_LINE_TEMPLATE * line_count)
+    if line_count:
+        body = data[:body_size]
+        digits = body.hex().upper().encode("ascii")
+        ascii_data = body.translate(_ASCII_TABLE)
+
+        addresses = array("I", range(address, address + body_size, HEX_LINE_BYTES))
+        if sys.byteorder == "little":
+            addresses.byteswap()
+        address_digits = addresses.tobytes().hex().upper().encode("ascii")
+        for column in range(8):
+            dump[2 + column::HEX_LINE_WIDTH] = address_digits[column::8]
+
+        for column in range(HEX_LINE_BYTES):
+            dump[12 + 3 * column::HEX_LINE_WIDTH] = digits[2 * column::2 * HEX_LINE_BYTES]
+            dump[13 + 3 * column::HEX_LINE_WIDTH] = digits[2 * column + 1::2 * HEX_LINE_BYTES]
+            dump[62 + column::HEX_LINE_WIDTH] = ascii_data[column::HEX_LINE_BYTES]
+
+    if body_size < len(data):
+        dump += format_hex_line(data[body_size:], address + body_size).encode("ascii") + b"\n"
+    return dump.decode("ascii")
+
+def split_archive_path(file_path):
+    """Splits "library.zip::dir/game.gb" into ("library.zip", "dir/game.gb"); plain paths give (path, None)."""
+    container, separator, entry = file_path.partition(ARCHIVE_SEPARATOR)
+    return (container, entry) if separator else (file_path, None)
+
+def rom_extension(file_path):
+    """Lower-case ROM extension of a file, zip entry or gzip file ("game.gb.gz" -> ".gb")."""
+    if file_path in SNIFFED_EXTENSIONS:
+        return SNIFFED_EXTENSIONS[file_path]
+    container, entry = split_archive_path(file_path)
+    root, extension = os.path.splitext(entry if entry is not None else container)
+    if entry is None and extension.lower() == ".gz":
+        extension = os.path.splitext(root)[1]
+    return extension.lower()
+
+def plain_rom_path(file_path):
+    """Path of a plain file next to the archive, as base name for files derived from a ROM."""
+    container, entry = split_archive_path(file_path)
+    if entry is not None:
+        return os.path.join(os.path.dirname(container), os.path.basename(entry))
+    return container[:-3] if container.lower().endswith(".gz") else container
+
+def rom_stat(file_path):
+    """os.stat() of the ROM file, or of the archive that contains it."""
+    return os.stat(split_archive_path(file_path)[0])
+
+@lru_cache(maxsize=16)
+def _zip_entry_identities(archive_path, mtime_ns):
+    """{entry name: (size, CRC-32)} of a zip archive; cached per archive version."""
+    with zipfile.ZipFile(archive_path) as archive:
+        return {info.filename: (info.file_size, info.CRC) for info in archive.infolist()}
+
+def rom_identity(file_path):
+    """(size, mtime_ns, inode) that tells whether a ROM has changed or was moved.
+
+    Zip entries share the stat of their archive, so for them the size and CRC-32 of
+    the entry take the place of the file size and inode; renaming the archive keeps them.
+    """
+    stat = rom_stat(file_path)
+    container, entry = split_archive_path(file_path)
+    if entry is None:
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino
+    size, crc = _zip_entry_identities(container, stat.st_mtime_ns)[entry]
+    return size, stat.st_mtime_ns, crc
+
+def rom_size(file_path):
+    """Size of the (uncompressed) ROM without opening it."""
+    container, entry = split_archive_path(file_path)
+    if entry is not None:
+        with zipfile.ZipFile(container) as archive:
+            return archive.getinfo(entry).file_size
+    if container.lower().endswith(".gz"):
+        with open(container, "rb") as gzip_file:
+            gzip_file.seek(-4, os.SEEK_END)
+            return struct.unpack("<I", gzip_file.read(4))[0]  # ISIZE: uncompressed size (mod 2^32)
+    return os.path.getsize(container)
+
+def archive_rom_entries(archive_path):
+    """"archive.zip::entry" paths of all ROMs in a zip archive."""
+    with zipfile.ZipFile(archive_path) as archive:
+        return [f"{archive_path}{ARCHIVE_SEPARATOR}{info.filename}" for info in archive.infolist()
+                if not info.is_dir() and rom_extension(info.filename) in ROM_READERS]
+
+def is_compressed_rom(file_path):
+    """True for gzip files and compressed (or encrypted or empty) zip entries, which cannot be mapped."""
+    container, entry = split_archive_path(file_path)
+    if entry is None:
+        return container.lower().endswith(".gz")
+    with zipfile.ZipFile(container) as archive:
+        info = archive.getinfo(entry)
+    return info.compress_type != zipfile.ZIP_STORED or bool(info.flag_bits & 0x01) or not info.file_size
+
+class RomImage:
+    """Read-only, memory-mapped ROM file shared by the readers and the menu actions.
+
+    Slices are zero-copy memoryviews into the mapping, header fields are read with
+    typed accessors, and random lookups go through a small LRU cache of pages.
+
+    ROMs in zip archives ("library.zip::game.gb") and gzip files ("game.gb.gz") are
+    read without extracting them: stored zip entries are mapped in place inside the
+    archive, compressed ones are opened as CompressedRomImage.
+    """
+
+    def __new__(cls, file_path, *args, **kwargs):
+        if cls is RomImage and is_compressed_rom(file_path):
+            cls = CompressedRomImage
+        return super().__new__(cls)
+
+    def __init__(self, file_path, page_size=4096, cache_pages=64):
+        self.path = file_path
+        self.page_size = page_size
+        self.cache_pages = cache_pages
+        self._pages = OrderedDict()
+        self._base = 0  # Offset of the ROM inside the mapping (stored zip entries)
+        container, entry = split_archive_path(file_path)
+        self._file = open(container, "rb")
+        if entry is not None:
+            self._open_zip_entry(entry)
+        else:
+            self.size = os.fstat(self._file.fileno()).st_size
+            # Empty files cannot be mapped; they simply behave like an empty ROM
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.view = memoryview(self._map)[self._base:self._base + self.size]
+
+    def _open_zip_entry(self, entry):
+        with zipfile.ZipFile(self._file) as archive:
+            info = archive.getinfo(entry)
+            self.size = info.file_size
+        # Stored entry: map the archive and start the view at the entry's data
+        self._file.seek(info.header_offset)
+        local_header = self._file.read(30)
+        if local_header[:4] != b"PK\x03\x04":
+            raise zipfile.BadZipFile(f"Bad local header for {entry}")
+        name_length, extra_length = struct.unpack("<HH", local_header[26:30])
+        self._base = info.header_offset + 30 + name_length + extra_length
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.size
+
+    def close(self):
+        self._pages.clear()
+        self.view.release()
+        if isinstance(self._map, mmap.mmap):
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # A caller still holds a slice; the mapping is released together with it
+        self._file.close()
+
+    def slice(self, offset, length):
+        """Returns a zero-copy view of up to `length` bytes starting at `offset`."""
+        return self.view[offset:offset + length]
+
+    def iter_chunks(self, chunk_size, start=0, end=None):
+        """Yields (offset, view) pairs covering the ROM from `start` to `end` in `chunk_size` steps."""
+        end = self.size if end is None else min(end, self.size)
+        for offset in range(start, end, chunk_size):
+            yield offset, self.view[offset:min(offset + chunk_size, end)]
+
+    def iter_windows(self, window_size, overlap):
+        """Yields (offset, view) pairs in `window_size` steps; each view reaches `overlap` bytes into the next window."""
+        for offset in range(0, self.size, window_size):
+            yield offset, self.view[offset:offset + window_size + overlap]
+
+    def find(self, pattern, start=0, end=None):
+        """Returns the lowest offset of `pattern` in the ROM (or -1), without copying data."""
+        if not self.size:
+            return -1
+        offset = self._map.find(pattern, self._base + start, self._base + (self.size if end is None else min(end, self.size)))
+        return offset - self._base if offset >= 0 else -1
+
+    def page(self, index):
+        """Returns page `index` as bytes, keeping recently used pages in the LRU cache."""
+        page = self._pages.get(index)
+        if page is None:
+            start = index * self.page_size
+            page = bytes(self.view[start:start + self.page_size])
+            self._pages[index] = page
+            if len(self._pages) > self.cache_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(index)
+        return page
+
+    def read(self, offset, length):
+        """Returns up to `length` bytes at `offset` from the page cache (random lookups)."""
+        end = min(offset + length, self.size)
+        if offset >= end:
+            return b""
+        first_page, last_page = offset // self.page_size, (end - 1) // self.page_size
+        start = offset - first_page * self.page_size
+        if first_page == last_page:
+            return self.page(first_page)[start:start + end - offset]
+        data = b"".join(self.page(index) for index in range(first_page, last_page + 1))
+        return data[start:start + end - offset]
+
+    def u8(self, offset):
+        return self.view[offset]
+
+    def u16le(self, offset):
+        return struct.unpack_from("<H", self.view, offset)[0]
+
+    def u16be(self, offset):
+        return struct.unpack_from(">H", self.view, offset)[0]
+
+    def u32le(self, offset):
+        return struct.unpack_from("<I", self.view, offset)[0]
+
+    def ascii(self, offset, length):
+        """Decodes a text field of the header (not stripped)."""
+        return bytes(self.view[offset:offset + length]).decode('ascii', errors='replace')
+
+class CompressedRomImage(RomImage):
+    """RomImage of a gzip file or a compressed zip entry.
+
+    Whole-ROM passes (hashes, checksums, the pattern scan, exports, region map, text,
+    fingerprints, the n-gram index) decompress the ROM again as a stream in chunks, so
+    they do not hold it in memory. Header fields and other random reads (viewer, tiles)
+    keep the ROM decompressed up to the last byte they need; `find` (viewer search) and
+    `view` (disassembler, BPS source) decompress it completely.
+    """
+
+    def __init__(self, file_path, page_size=4096, cache_pages=64):
+        self.path = file_path
+        self.page_size = page_size
+        self.cache_pages = cache_pages
+        self._pages = OrderedDict()
+        self._base = 0
+        self.size = rom_size(file_path)
+        self._head = bytearray()  # Decompressed start of the ROM, grown by _prefix()
+        self._view = None
+        self._stream = self._open_stream()
+
+    def _open_stream(self):
+        container, entry = split_archive_path(self.path)
+        if entry is None:
+            return gzip.open(container, "rb")
+        with zipfile.ZipFile(container) as archive:
+            return archive.open(entry)  # Keeps the archive file open until the stream is closed
+
+    def _prefix(self, end):
+        """The decompressed ROM up to at least `end` (or up to its end)."""
+        end = min(end, self.size)
+        while self._view is None and len(self._head) < end:
+            chunk = self._stream.read(max(ARCHIVE_CHUNK, end - len(self._head)))
+            if not chunk:
+                break
+            self._head += chunk
+        return self._head
+
+    @property
+    def view(self):
+        if self._view is None:
+            self._view = memoryview(self._prefix(self.size))
+            self._stream.close()
+        return self._view
+
+    def close(self):
+        self._pages.clear()
+        if self._view is not None:
+            self._view.release()
+        self._stream.close()
+
+    def slice(self, offset, length):
+        """Returns a copy of up to `length` bytes at `offset` (the prefix buffer keeps growing)."""
+        if self._view is not None:
+            return self._view[offset:offset + length]
+        return bytes(self._prefix(offset + length)[offset:offset + length])
+
+    def iter_chunks(self, chunk_size, start=0, end=None):
+        end = self.size if end is None else min(end, self.size)
+        if self._view is not None:
+            yield from super().iter_chunks(chunk_size, start, end)
+        elif end <= len(self._head):
+            for offset in range(start, end, chunk_size):
+                yield offset, bytes(self._head[offset:min(offset + chunk_size, end)])
+        else:
+            with self._open_stream() as stream:
+                position = 0
+                while position < start:
+                    skipped = len(stream.read(min(ARCHIVE_CHUNK, start - position)))
+                    if not skipped:
+                        return
+                    position += skipped
+                for offset in range(start, end, chunk_size):
+                    chunk = stream.read(min(chunk_size, end - offset))
+                    if not chunk:
+                        return
+                    yield offset, chunk
+
+    def iter_windows(self, window_size, overlap):
+        if self._view is not None:
+            yield from super().iter_windows(window_size, overlap)
+            return
+        with self._open_stream() as stream:
+            data = stream.read(window_size + overlap)
+            for offset in range(0, self.size, window_size):
+                if not data:
+                    return
+                yield offset, data
+                data = data[window_size:] + stream.read(window_size)
+
+    def find(self, pattern, start=0, end=None):
+        end = self.size if end is None else min(end, self.size)
+        return self._prefix(end).find(pattern, start, end)
+
+    def read(self, offset, length):
+        return bytes(self._prefix(offset + length)[offset:offset + length])
+
+    def u8(self, offset):
+        return self._prefix(offset + 1)[offset]
+
+    def u16le(self, offset):
+        return struct.unpack_from("<H", self._prefix(offset + 2), offset)[0]
+
+    def u16be(self, offset):
+        return struct.unpack_from(">H", self._prefix(offset + 2), offset)[0]
+
+    def u32le(self, offset):
+        return struct.unpack_from("<I", self._prefix(offset + 4), offset)[0]
+
+    def ascii(self, offset, length):
+        return bytes(self._prefix(offset + length)[offset:offset + length]).decode('ascii', errors='replace')
+
+def iter_hex_dump(rom, chunk_size=HEX_DUMP_CHUNK):
+    """Yields (address, text) pairs of formatted hex dump text for the whole ROM."""
+    for address, block in rom.iter_chunks(chunk_size):
+        yield address, format_hex_dump(block, address)
+
+def _record_checksums(body, line_bytes, address, address_size, count, ones_complement=False):
+    """Checksum byte of every full record line (Intel HEX: two's complement, S-record: ones' complement)."""
+    line_count = len(body) // line_bytes
+    if np is not None:
+        totals = np.frombuffer(body, dtype=np.uint8).reshape(line_count, line_bytes).sum(axis=1, dtype=np.int64)
+        addresses = np.arange(address, address + line_count * line_bytes, line_bytes, dtype=np.int64)
+        for shift in range(0, 8 * address_size, 8):
+            totals += addresses >> shift & 0xFF
+        return ((-(totals + count) - ones_complement) & 0xFF).astype(np.uint8).tobytes()
+    return bytes((-(sum(body[offset:offset + line_bytes]) + count
+                    + sum((address + offset) >> shift & 0xFF for shift in range(0, 8 * address_size, 8)))
+                  - ones_complement) & 0xFF
+                 for offset in range(0, line_count * line_bytes, line_bytes))
+
+def _address_digits(start, end, step, typecode, upper=True):
+    """Big-endian hex digits of all line addresses from `start` to `end`."""
+    addresses = array(typecode, range(start, end, step))
+    if sys.byteorder == "little":
+        addresses.byteswap()
+    digits = addresses.tobytes().hex()
+    return (digits.upper() if upper else digits).encode("ascii")
+
+def _fill_records(template, line_count, width, columns):
+    """Builds `line_count` copies of `template` and writes each (column, digits, digits per line) field into them."""
+    dump = bytearray(template * line_count)
+    for column, digits, digits_per_line in columns:
+        for position in range(digits_per_line):
+            dump[column + position::width] = digits[position::digits_per_line]
+    return dump
+
+def _ihex_record(record_type, address, payload):
+    record = bytes((len(payload), address >> 8 & 0xFF, address & 0xFF, record_type)) + bytes(payload)
+    return f":{record.hex().upper()}{-sum(record) & 0xFF:02X}\n"
+
+def format_ihex(data, address=0):
+    """Formats a block of ROM data as Intel HEX data records (16 bytes each).
+
+    An extended linear address record is written at the start of every 64 KB
+    segment above 0xFFFF. The end-of-file record is written by export_rom.
+    """
+    data = bytes(data)
+    parts = []
+    offset = 0
+    while offset < len(data):
+        base = address + offset
+        segment = data[offset:offset + 0x10000 - (base & 0xFFFF)]
+        if base >> 16:
+            parts.append(_ihex_record(4, 0, (base >> 16).to_bytes(2, "big")).encode("ascii"))
+        line_count = len(segment) // 16
+        body_size = line_count * 16
+        if line_count:
+            body = segment[:body_size]
+            parts.append(_fill_records(b":10000000" + b"00" * 16 + b"00\n", line_count, 44, (
+                (3, _address_digits(base & 0xFFFF, (base & 0xFFFF) + body_size, 16, "H"), 4),
+                (9, body.hex().upper().encode("ascii"), 32),
+                (41, _record_checksums(body, 16, base & 0xFFFF, 2, 0x10).hex().upper().encode("ascii"), 2),
+            )))
+        if body_size < len(segment):
+            parts.append(_ihex_record(0, (base + body_size) & 0xFFFF, segment[body_size:]).encode("ascii"))
+        offset += len(segment)
+    return b"".join(parts).decode("ascii")
+
+def _srec_record(address, payload):
+    record = bytes((len(payload) + 5,)) + address.to_bytes(4, "big") + bytes(payload)
+    return f"S3{record.hex().upper()}{~sum(record) & 0xFF:02X}\n"
+
+def format_srec(data, address=0):
+    """Formats a block of ROM data as Motorola S3 records (32-bit addresses, 16 bytes each)."""
+    data = bytes(data)
+    line_count = len(data) // 16
+    body_size = line_count * 16
+    dump = bytearray()
+    if line_count:
+        body = data[:body_size]
+        dump = _fill_records(b"S31500000000" + b"00" * 16 + b"00\n", line_count, 47, (
+            (4, _address_digits(address, address + body_size, 16, "I"), 8),
+            (12, body.hex().upper().encode("ascii"), 32),
+            (44, _record_checksums(body, 16, address, 4, 0x15, ones_complement=True).hex().upper().encode("ascii"), 2),
+        ))
+    if body_size < len(data):
+        dump += _srec_record(address + body_size, data[body_size:]).encode("ascii")
+    return dump.decode("ascii")
+
+def format_xxd(data, address=0):
+    """Formats a block of ROM data exactly like `xxd` (two-byte groups, lower-case hex)."""
+    data = bytes(data)
+    line_count = len(data) // 16
+    body_size = line_count * 16
+    dump = bytearray()
+    if line_count:
+        body = data[:body_size]
+        digits = body.hex().encode("ascii")
+        columns = [(0, _address_digits(address, address + body_size, 16, "I", upper=False), 8),
+                   (51, body.translate(_ASCII_TABLE), 16)]
+        for column in range(16):
+            position = 10 + 5 * (column // 2) + 2 * (column % 2)
+            columns.append((position, digits[2 * column::32], 1))
+            columns.append((position + 1, digits[2 * column + 1::32], 1))
+        dump = _fill_records(b"00000000: " + b"0000 " * 8 + b" " + b"." * 16 + b"\n", line_count, 68, columns)
+    if body_size < len(data):
+        rest = data[body_size:]
+        rest_digits = rest.hex()
+        groups = " ".join(rest_digits[i:i + 4] for i in range(0, len(rest_digits), 4))
+        dump += f"{address + body_size:08x}: {groups:<40} {rest.translate(_ASCII_TABLE).decode('ascii')}\n".encode("ascii")
+    return dump.decode("ascii")
+
+# Export formats: name -> (formatter, default file suffix, text before and after the records)
+EXPORT_FORMATS = {
+    "dump": (format_hex_dump, "_dump.hex", "", ""),
+    "ihex": (format_ihex, ".hex", "", ":00000001FF\n"),
+    "srec": (format_srec, ".srec", "S0030000FC\n", "S70500000000FA\n"),
+    "xxd": (format_xxd, ".xxd", "", ""),
+}
+
+def export_rom(rom, export_format="dump", output_path=None):
+    """Streams the ROM in `export_format` to `output_path` ('-' for stdout) in large formatted batches.
+
+    Returns (output path, text bytes written, elapsed seconds).
+    """
+    formatter, suffix, header, footer = EXPORT_FORMATS[export_format]
+    output_path = output_path or plain_rom_path(rom.path) + suffix
+    to_stdout = output_path == "-"
+    output = sys.stdout.buffer if to_stdout else open(output_path, "wb")
+    written = 0
+    started = time.perf_counter()
+    try:
+        output.write(header.encode("ascii"))
+        written += len(header)
+        with profile_stage("export", rom.size):
+            for address, block in rom.iter_chunks(HEX_DUMP_CHUNK):
+                text = formatter(block, address).encode("ascii")
+                output.write(text)
+                written += len(text)
+        output.write(footer.encode("ascii"))
+        written += len(footer)
+        output.flush()
+    except BrokenPipeError:
+        # The reading end (e.g. "| head") closed early; stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        if not to_stdout:
+            output.close()
+    return output_path, written, time.perf_counter() - started
+
+def launch_mgba(file_path):
+    """Startet das Spiel in mGBA."""
+    try:
+        
+        # Path to mGBA executable file
+        mgba_path = 'c:\\Program Files\\mGBA\\mGBA.exe'  # Default name if mGBA is in PATH. Adjust if necessary.
+        
+        file_path = split_archive_path(file_path)[0]  # mGBA opens zip archives itself
+        if not os.path.isfile(file_path):
+            console.print("[bold red]ROM file not found![/bold red]")
+            return
+        
+        # Check if mGBA is installed (accessible)
+        result = subprocess.run([mgba_path, "--version"], capture_output=True, text=True)
+        if result.returncode != 0:
+            console.print("[bold red]mGBA could not be found. Make sure it is installed and in the PATH.[/bold red]")
+            return
+        
+        # Start game with mGBA
+        subprocess.Popen([mgba_path, file_path])
+        console.print(f"[bold green]Game is started in mGBA: {file_path}[/bold green]")
+    except FileNotFoundError:
+        console.print("[bold red]The mGBA executable was not found. Check the path to the mGBA installation.[/bold red]")
+    except Exception as e:
+        console.print(f"[bold red]An error has occurred: [/bold red] {e}")
+
+class HexPager:
+    """Renders the ROM one screen page at a time for the interactive viewer.
+
+    Pages are read lazily from the memory map when they are shown, and the rendered
+    Text of recently shown pages is kept in a small LRU cache.
+    """
+
+    def __init__(self, rom, page_lines=VIEW_PAGE_LINES, cache_pages=VIEW_CACHE_PAGES):
+        self.rom = rom
+        self.page_bytes = page_lines * HEX_LINE_BYTES
+        self.page_count = max(1, -(-rom.size // self.page_bytes))
+        self.cache_pages = cache_pages
+        self._rendered = OrderedDict()
+
+    def page_of(self, address):
+        return min(address // self.page_bytes, self.page_count - 1)
+
+    def render(self, index):
+        """Returns page `index` as styled hex dump text."""
+        from rich.text import Text
+        text = self._rendered.get(index)
+        if text is None:
+            start = index * self.page_bytes
+            dump = format_hex_dump(self.rom.slice(start, self.page_bytes), start)
+            text = Text(dump, end="")
+            for line_start in range(0, len(dump), HEX_LINE_WIDTH):
+                text.stylize("bold yellow", line_start, line_start + 10)
+            self._rendered[index] = text
+            if len(self._rendered) > self.cache_pages:
+                self._rendered.popitem(last=False)
+        else:
+            self._rendered.move_to_end(index)
+        return text
+
+    def highlight(self, index, address, length):
+        """Returns page `index` with the bytes `address` .. `address + length` highlighted."""
+        text = self.render(index).copy()
+        start = index * self.page_bytes
+        for position in range(max(address, start), min(address + length, start + self.page_bytes, self.rom.size)):
+            line, column = divmod(position - start, HEX_LINE_BYTES)
+            line_start = line * HEX_LINE_WIDTH
+            text.stylize("reverse", line_start + 12 + 3 * column, line_start + 14 + 3 * column)
+            text.stylize("reverse", line_start + 62 + column, line_start + 63 + column)
+        return text
+
+def display_rom_content(rom):
+    """Shows the ROM contents page by page (n/p, g <address>, / <text>, q)."""
+    try:
+        pager = HexPager(rom)
+        index = 0
+        search = None
+        match = None
+        shown = None
+        while True:
+            start = index * pager.page_bytes
+            end = min(start + pager.page_bytes, rom.size)
+            # The page is only printed again when the position or the highlighted match changed
+            if (index, match) != shown:
+                shown = (index, match)
+                console.print(f"\n[bold cyan]=== ROM content: page {index + 1}/{pager.page_count} (0x{start:08X} - 0x{max(end - 1, start):08X}) ===[/bold cyan]")
+                if match is not None and pager.page_of(match) == index:
+                    console.print(pager.highlight(index, match, len(search)), end="")
+                else:
+                    console.print(pager.render(index), end="")
+
+            command = console.input("[bold yellow]n = next, p = previous, g <address> = jump, / <text> = search, q = quit: [/bold yellow]").strip()
+            if command in ("", "n"):
+                index = min(index + 1, pager.page_count - 1)
+            elif command == "p":
+                index = max(index - 1, 0)
+            elif command.startswith("g"):
+                try:
+                    address = int(command[1:].strip(), 16)
+                except ValueError:
+                    console.print("[bold red]Invalid address. Please enter a valid hex address.[/bold red]")
+                    continue
+                if 0 <= address < rom.size:
+                    index = pager.page_of(address)
+                else:
+                    console.print("[bold red]The entered address is outside the ROM size.[/bold red]")
+            elif command.startswith("/"):
+                # "/ text" starts a new search, "/" alone continues after the last match
+                if command[1:].strip():
+                    search = command[1:].strip().encode("ascii", errors="replace")
+                    match = None
+                if not search:
+                    console.print("[bold red]No search text entered.[/bold red]")
+                    continue
+                found = rom.find(search, start if match is None else match + 1)
+                if found == -1 and (match is not None or start):
+                    found = rom.find(search)  # wrap around to the start of the ROM
+                if found == -1:
+                    console.print(f"[bold red]{search.decode('ascii')!r} was not found.[/bold red]")
+                    match = None
+                else:
+                    match = found
+                    index = pager.page_of(found)
+                    console.print(f"[bold green]Found at 0x{found:08X}[/bold green]")
+            elif command == "q":
+                break
+            else:
+                console.print("[bold red]Invalid command. Please try again.[/bold red]")
+    except Exception as e:
+        console.print(f"[bold red]Error displaying ROM contents: [/bold red] {e}")
+
+def print_export(target_console, rom_size, output_path, written, elapsed):
+    rate = rom_size / (1024 * 1024) / elapsed if elapsed else 0.0
+    target_console.print(f"[bold green]HEX dump created successfully: {'stdout' if output_path == '-' else output_path}[/bold green]")
+    target_console.print(f"[bold green]Throughput:[/bold green] {rom_size} Bytes in {elapsed:.2f} s ({rate:.0f} MB/s, {written} Bytes written)")
+
+def export_to_hex_file(rom):
+    """Exports the entire ROM contents as a HEX file (dump, Intel HEX, S-record or xxd format)."""
+    try:
+        export_format = console.input(f"[bold yellow]Export format ({', '.join(EXPORT_FORMATS)}; Enter = dump): [/bold yellow]").strip().lower() or "dump"
+        if export_format not in EXPORT_FORMATS:
+            console.print("[bold red]Unknown export format.[/bold red]")
+            return
+        output_path, written, elapsed = export_rom(rom, export_format)
+        print_export(console, rom.size, output_path, written, elapsed)
+    except Exception as e:
+        console.print(f"[bold red]Error exporting HEX file:[/bold red] {e}")
+
+def view_specific_address(rom, disassembler=None):
+    """Displays the contents of a specific address (and the code there, if a disassembler is given)."""
+    from rich.text import Text
+    try:
+        while True:
+            user_input = console.input("[bold yellow]Enter an address (hex, e.g. 0x00001000) or 'exit' to cancel: [/bold yellow]")
+            if user_input.lower() == "exit":
+                break
+            try:
+                address = int(user_input, 16)
+                if 0 <= address < rom.size:
+                    block = rom.read(address, 16)
+                    line = Text(format_hex_line(block, address))
+                    line.stylize("bold yellow", 0, 10)
+                    console.print(line)
+                    if disassembler is not None:
+                        print_disassembly(disassembler, disassembler.listing(address, DISASM_VIEW_LINES))
+                else:
+                    console.print("[bold red]The entered address is outside the ROM size.[/bold red]")
+            except ValueError:
+                console.print("[bold red]Invalid address. Please enter a valid hex address.[/bold red]")
+    except Exception as e:
+        console.print(f"[bold red]Error displaying address:[/bold red] {e}")
+
+class PatternScanner:
+    """Finds every occurrence of a set of byte patterns in a single pass over the ROM.
+
+    All patterns are compiled into one `re` alternation (longest first), so the cost of
+    a scan does not grow with the number of patterns. Windows overlap by the length of
+    the longest pattern minus one, so matches across window borders are not lost.
+    """
+
+    def __init__(self, patterns=DEFAULT_PATTERNS):
+        self.patterns = sorted({bytes(pattern) for pattern in patterns if pattern}, key=len, reverse=True)
+        if not self.patterns:
+            raise ValueError("At least one non-empty search pattern is required.")
+        self.longest = len(self.patterns[0])
+        self._regex = re.compile(b"|".join(re.escape(pattern) for pattern in self.patterns))
+        # The alternation only reports the longest pattern at an offset; shorter patterns
+        # that are a prefix of it match at the same offset as well.
+        self._prefixes = {
+            pattern: [other for other in self.patterns if other != pattern and pattern.startswith(other)]
+            for pattern in self.patterns
+        }
+
+    def _search(self, rom, window_size, overlap):
+        """Yields (window start, window data, start in the window, pattern) for every match."""
+        for window_start, data in rom.iter_windows(window_size, overlap):
+            limit = min(window_size, len(data))  # Matches starting in the overlap belong to the next window
+            position = 0
+            while True:
+                match = self._regex.search(data, position)
+                if match is None or match.start() >= limit:
+                    break
+                pattern = match.group()
+                yield window_start, data, match.start(), pattern
+                for prefix in self._prefixes[pattern]:
+                    yield window_start, data, match.start(), prefix
+                position = match.start() + 1
+
+    def scan(self, rom, window_size=SCAN_WINDOW):
+        """Yields (offset, pattern) for every match in the ROM, in ascending offset order."""
+        for window_start, data, start, pattern in self._search(rom, window_size, self.longest - 1):
+            yield window_start + start, pattern
+
+    def matches(self, rom, context=SCAN_CONTEXT, window_size=SCAN_WINDOW):
+        """Like scan(), but yields (offset, pattern, bytes) with up to `context` bytes from the match on.
+
+        The windows overlap far enough to hold them, so a compressed ROM is not read again for them.
+        """
+        for window_start, data, start, pattern in self._search(rom, window_size, max(self.longest, context) - 1):
+            yield window_start + start, pattern, bytes(data[start:start + context])
+
+def parse_patterns(text_patterns=None, hex_patterns=None):
+    """Builds the byte pattern list from --pattern (text) and --hex-pattern (hex bytes) arguments."""
+    patterns = [pattern.encode("latin-1") for pattern in text_patterns or []]
+    patterns += [bytes.fromhex(pattern) for pattern in hex_patterns or []]
+    return tuple(patterns) or DEFAULT_PATTERNS
+
+def search_rom(rom, patterns=DEFAULT_PATTERNS, cached_matches=None):
+    """Scans the ROM for the given patterns and prints every match with its exact offset and the bytes there.
+
+    With `cached_matches` (records from the result cache) the scan is skipped.
+    """
+    console.print("\n[bold cyan]=== ROM search ===[/bold cyan]")
+
+    if cached_matches is not None:
+        important_info = [(match["offset"], bytes.fromhex(match["pattern"]), bytes.fromhex(match["data"]))
+                          for match in cached_matches]
+        console.print(f"\n[bold green]Search completed (cached):[/bold green] {len(important_info)} matches for {len(set(patterns))} patterns in {rom.size} Bytes.")
+    else:
+        scanner = PatternScanner(patterns)
+        with profile_stage("scan", rom.size), console.status("[bold cyan]Search ROM...", spinner="dots"):
+            important_info = list(scanner.matches(rom))
+
+        console.print(f"\n[bold green]Search completed:[/bold green] {len(important_info)} matches for {len(scanner.patterns)} patterns in {rom.size} Bytes.")
+
+    if console.quiet:
+        return important_info  # Rich renders the table even when quiet; the benchmark only times the scan
+
+    with profile_stage("render"):
+        console.print("\n[bold cyan]=== Important information found ===[/bold cyan]")
+        if important_info:
+            for address, pattern, data in important_info:
+                console.print(f"[bold yellow]Address:[/bold yellow] 0x{address:08X} [bold yellow]Data (Hex):[/bold yellow] {data.hex().upper()}...")
+        else:
+            console.print("[bold red]No specific patterns found.[/bold red]")
+    return important_info
+
+@dataclass(slots=True)
+class MaskedSignature:
+    name: str
+    pattern: bytes  # 0x00 at wildcard positions
+    mask: bytes  # 0xFF for literal bytes, 0x00 for wildcards
+    anchor_offset: int  # Start and length of the longest literal run
+    anchor_length: int
+
+    @property
+    def anchor(self):
+        return self.pattern[self.anchor_offset:self.anchor_offset + self.anchor_length]
+
+def parse_signature(name, text):
+    """Parses hex bytes with ?? wildcards ("A9 ?? 8D 00 20") into a MaskedSignature."""
+    pattern, mask = bytearray(), bytearray()
+    for token in text.split():
+        if token in ("?", "??"):
+            pattern.append(0)
+            mask.append(0)
+        elif len(token) == 2 and all(char in string.hexdigits for char in token):
+            pattern.append(int(token, 16))
+            mask.append(0xFF)
+        else:
+            raise ValueError(f"Invalid byte {token!r} in signature {name!r}.")
+    # Longest run of literal bytes
+    anchor_offset = anchor_length = run = 0
+    for index, byte in enumerate(mask):
+        run = run + 1 if byte else 0
+        if run > anchor_length:
+            anchor_offset, anchor_length = index - run + 1, run
+    if not anchor_length:
+        raise ValueError(f"Signature {name!r} has no literal bytes.")
+    return MaskedSignature(name, bytes(pattern), bytes(mask), anchor_offset, anchor_length)
+
+def load_signatures(db_path):
+    """Reads a signature database: one "name: A9 ?? 8D 00 20" per line, '#' starts a comment."""
+    signatures = []
+    with open(db_path, "r", encoding="utf-8") as db_file:
+        for line_number, line in enumerate(db_file, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            name, separator, text = line.partition(":")
+            try:
+                if not separator or not name.strip():
+                    raise ValueError("expected 'name: hex bytes'")
+                signatures.append(parse_signature(name.strip(), text))
+            except ValueError as e:
+                raise ValueError(f"{db_path}:{line_number}: {e}") from None
+    return signatures
+
+class SignatureMatcher:
+    """Matches many masked signatures against a ROM in one pass.
+
+    Every signature is anchored on its longest literal run. All anchors are searched
+    together with one PatternScanner, then the candidates of each signature are compared
+    with the full signature under its mask (vectorized with NumPy if available).
+    """
+
+    def __init__(self, signatures):
+        self.signatures = list(signatures)
+        if not self.signatures:
+            raise ValueError("At least one signature is required.")
+        self._by_anchor = {}
+        for index, signature in enumerate(self.signatures):
+            self._by_anchor.setdefault(signature.anchor, []).append(index)
+        self._scanner = PatternScanner(self._by_anchor)
+
+    def match(self, rom):
+        """Returns (offset, name) of every signature hit, in ascending offset order."""
+        candidates = {}
+        for offset, anchor in self._scanner.scan(rom):
+            for index in self._by_anchor[anchor]:
+                start = offset - self.signatures[index].anchor_offset
+                if start >= 0 and start + len(self.signatures[index].pattern) <= rom.size:
+                    candidates.setdefault(index, []).append(start)
+        hits = []
+        wildcards = {}
+        for index, starts in candidates.items():
+            if self.signatures[index].anchor_length == len(self.signatures[index].pattern):
+                hits.extend((start, self.signatures[index].name) for start in starts)  # The anchor is the whole signature
+            else:
+                wildcards[index] = starts
+        if wildcards:
+            hits.extend(self._confirm(rom, wildcards))
+        return sorted(hits)
+
+    def _confirm(self, rom, candidates):
+        """(start, name) of the candidates that match their whole signature, checked in one pass over the ROM.
+
+        The windows of SCAN_WINDOW Bytes reach the length of the longest signature into the next one,
+        so a compressed ROM is streamed once instead of being decompressed into memory.
+        """
+        overlap = max(len(self.signatures[index].pattern) for index in candidates) - 1
+        confirmed = []
+        for window_start, data in rom.iter_windows(SCAN_WINDOW, overlap):
+            window_end = window_start + SCAN_WINDOW
+            for index, starts in candidates.items():  # Ascending, as the scanner yields them
+                low = bisect.bisect_left(starts, window_start)
+                high = bisect.bisect_left(starts, window_end, low)
+                if low < high:
+                    signature = self.signatures[index]
+                    confirmed.extend((window_start + start, signature.name) for start in
+                                     self._confirm_window(data, signature, [start - window_start for start in starts[low:high]]))
+        return confirmed
+
+    @staticmethod
+    def _confirm_window(data, signature, starts):
+        """The `starts` (relative to `data`) at which `data` matches the signature under its mask."""
+        if np is None:
+            return [start for start in starts
+                    if all((byte ^ expected) & mask == 0 for byte, expected, mask
+                           in zip(data[start:start + len(signature.pattern)], signature.pattern, signature.mask))]
+        data = np.frombuffer(data, dtype=np.uint8)
+        pattern = np.frombuffer(signature.pattern, dtype=np.uint8)
+        mask = np.frombuffer(signature.mask, dtype=np.uint8)
+        columns = np.arange(len(pattern))
+        confirmed = []
+        for batch_start in range(0, len(starts), SIGNATURE_BATCH):
+            batch = np.array(starts[batch_start:batch_start + SIGNATURE_BATCH], dtype=np.int64)
+            windows = data[batch[:, None] + columns]
+            confirmed.extend(batch[(((windows ^ pattern) & mask) == 0).all(axis=1)].tolist())
+        return confirmed
+
+def fingerprint_roms(paths, signatures, json_output=False):
+    """Matches the signatures against all ROMs under `paths` and prints the named hits (or JSON Lines)."""
+    matcher = SignatureMatcher(signatures)
+    rom_files = find_rom_files(paths)
+    total_hits = 0
+    started = time.perf_counter()
+    for file_path in rom_files:
+        try:
+            with RomImage(file_path) as rom, profile_stage("fingerprint", rom.size):
+                hits = matcher.match(rom)
+        except Exception as e:
+            console.print(f"[bold red]ERROR[/bold red] {file_path}: {e}")
+            continue
+        total_hits += len(hits)
+        if json_output:
+            print(json.dumps({"path": file_path, "hits": [{"offset": offset, "name": name} for offset, name in hits]}))
+            continue
+        console.print(f"\n[bold cyan]{file_path}[/bold cyan]: {len(hits)} hits")
+        for offset, name in hits:
+            console.print(f"[bold yellow]Address:[/bold yellow] 0x{offset:08X} {name}")
+    elapsed = time.perf_counter() - started
+    stderr_console().print(f"[bold green]Fingerprint completed:[/bold green] {total_hits} hits for {len(matcher.signatures)} signatures in {len(rom_files)} ROMs ({elapsed:.2f} s)")
+
+def match_records(important_info):
+    """Converts search results into JSON-friendly records."""
+    return [{"offset": offset, "pattern": pattern.hex().upper(), "data": data.hex().upper()}
+            for offset, pattern, data in important_info]
+
+def byte_sum(rom, start=0, end=None):
+    """Sum of all bytes from `start` to `end` in one streaming pass (vectorised with NumPy if available)."""
+    total = 0
+    for offset, chunk in rom.iter_chunks(CHECKSUM_CHUNK, start, end):
+        if np is not None:
+            total += int(np.frombuffer(chunk, dtype=np.uint8).sum(dtype=np.uint64))
+        else:
+            total += sum(chunk)
+    return total
+
+def print_checksums(checksums):
+    """Prints the stored and computed value of every checksum."""
+    console.print("\n[bold cyan]=== Checksum verification ===[/bold cyan]")
+    if not checksums:
+        console.print("[bold yellow]This format has no checksum.[/bold yellow]")
+    for name, stored, computed, digits in checksums:
+        status = "[bold green]OK[/bold green]" if stored == computed else "[bold red]MISMATCH[/bold red]"
+        console.print(f"[bold yellow]{name}:[/bold yellow] 0x{stored:0{digits}X} (computed 0x{computed:0{digits}X}) {status}")
+
+def checksum_bytes(rom, extension):
+    """Bytes the checksum verification of `extension` reads (the GBA complement check only reads 29)."""
+    count = ROM_CHECKSUM_BYTES.get(extension)
+    return rom.size if count is None else count(rom)
+
+def checksum_records(checksums):
+    """Converts checksum results into JSON-friendly records."""
+    return [{"name": name, "stored": stored, "computed": computed, "valid": stored == computed, "digits": digits}
+            for name, stored, computed, digits in checksums]
+
+def checksums_from_records(records):
+    """Inverse of checksum_records, for reports from the cache (older entries have no "digits")."""
+    return [(record["name"], record["stored"], record["computed"],
+             record.get("digits") or max(2, (len(f"{max(record['stored'], record['computed']):X}") + 1) // 2 * 2))
+            for record in records]
+
+def user_cache_dir():
+    """Directory for the cache files of this tool in the user's cache directory."""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "rom_parser")
+
+def compute_hashes(rom, header_size=0):
+    """CRC32, MD5 and SHA-1 of the ROM in one read pass.
+
+    With `header_size` (iNES or copier header) the digests of the ROM without that
+    header are computed in the same pass and returned under "headerless".
+    """
+    digests = [0, hashlib.md5(), hashlib.sha1()]
+    headerless = [0, hashlib.md5(), hashlib.sha1()] if 0 < header_size < rom.size else None
+    for offset, chunk in rom.iter_chunks(CHECKSUM_CHUNK):
+        digests[0] = zlib.crc32(chunk, digests[0])
+        digests[1].update(chunk)
+        digests[2].update(chunk)
+        if headerless is not None and offset + len(chunk) > header_size:
+            part = chunk[max(0, header_size - offset):]
+            headerless[0] = zlib.crc32(part, headerless[0])
+            headerless[1].update(part)
+            headerless[2].update(part)
+
+    def as_record(crc32, md5, sha1):
+        return {"crc32": f"{crc32:08x}", "md5": md5.hexdigest(), "sha1": sha1.hexdigest()}
+
+    hashes = as_record(*digests)
+    hashes["size"] = rom.size
+    if headerless is not None:
+        hashes["headerless"] = dict(as_record(*headerless), size=rom.size - header_size)
+    return hashes
+
+def default_dat_index_path():
+    """Location of the DAT index (can be overridden with ROM_PARSER_DAT_INDEX)."""
+    return os.environ.get("ROM_PARSER_DAT_INDEX") or os.path.join(user_cache_dir(), "dat_index.sqlite3")
+
+class DatIndex:
+    """On-disk SQLite index of No-Intro style (Logiqx XML) DAT entries, looked up by hash."""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_dat_index_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._db = sqlite3.connect(self.db_path)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS dat_roms (
+            dat TEXT, game TEXT, name TEXT, size INTEGER, crc32 TEXT, md5 TEXT, sha1 TEXT)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS dat_roms_sha1 ON dat_roms (sha1)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS dat_roms_md5 ON dat_roms (md5)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS dat_roms_crc32 ON dat_roms (crc32, size)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+    def add_dat(self, dat_path):
+        """Imports (or re-imports) one DAT file with a streaming XML parse; returns (DAT name, number of ROM entries)."""
+        dat_name = os.path.basename(dat_path)
+        rows = []
+        game = None
+        for event, element in ElementTree.iterparse(dat_path, events=("start", "end")):
+            if event == "start":
+                if element.tag in ("game", "machine"):
+                    game = element.get("name")
+                continue
+            if element.tag == "name" and game is None and element.text:
+                dat_name = element.text.strip()  # <header><name> of the DAT
+            elif element.tag == "rom":
+                rows.append((dat_name, game, element.get("name"), int(element.get("size") or 0),
+                             (element.get("crc") or "").lower() or None,
+                             (element.get("md5") or "").lower() or None,
+                             (element.get("sha1") or "").lower() or None))
+            elif element.tag in ("game", "machine"):
+                game = None
+                element.clear()
+        self._db.execute("DELETE FROM dat_roms WHERE dat = ?", (dat_name,))
+        self._db.executemany("INSERT INTO dat_roms VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        self._db.commit()
+        return dat_name, len(rows)
+
+    def lookup(self, hashes):
+        """Returns DAT matches for the hashes of `compute_hashes` (SHA-1, then MD5, then CRC32 + size)."""
+        candidates = [hashes] + ([hashes["headerless"]] if "headerless" in hashes else [])
+        for digests in candidates:
+            for query, values in (("sha1 = ?", (digests["sha1"],)),
+                                  ("md5 = ?", (digests["md5"],)),
+                                  ("crc32 = ? AND size = ?", (digests["crc32"], digests["size"]))):
+                rows = self._db.execute(f"SELECT dat, game, name FROM dat_roms WHERE {query}", values).fetchall()
+                if rows:
+                    return [{"dat": dat, "game": game, "name": name} for dat, game, name in rows]
+        return []
+
+    def stats(self):
+        return self._db.execute("SELECT dat, COUNT(*) FROM dat_roms GROUP BY dat ORDER BY dat").fetchall()
+
+def lookup_dat(hashes):
+    """Looks the hashes up in the default DAT index; None if no index has been built."""
+    if not os.path.exists(default_dat_index_path()):
+        return None
+    with DatIndex() as index:
+        return index.lookup(hashes)
+
+def refresh_dat(report):
+    """Looks the DAT matches of a stored report up again.
+
+    They depend on the DAT index, which the cache and journal keys do not cover; only the hashes are reused.
+    """
+    if report is not None and "hashes" in report:
+        report["dat"] = lookup_dat(report["hashes"])
+    return report
+
+def print_hashes(hashes, dat_matches):
+    """Prints the digests of the ROM (and of the ROM without header) and the DAT match."""
+    console.print("\n[bold cyan]=== Hashes ===[/bold cyan]")
+    variants = [("", hashes)] + ([(" (headerless)", hashes["headerless"])] if "headerless" in hashes else [])
+    for label, digests in variants:
+        console.print(f"[bold yellow]CRC32{label}:[/bold yellow] {digests['crc32'].upper()}")
+        console.print(f"[bold yellow]MD5{label}:[/bold yellow] {digests['md5'].upper()}")
+        console.print(f"[bold yellow]SHA-1{label}:[/bold yellow] {digests['sha1'].upper()}")
+    if dat_matches:
+        for match in dat_matches:
+            console.print(f"[bold green]DAT match:[/bold green] {match['game']} ({match['dat']})")
+    elif dat_matches is not None:
+        console.print("[bold red]No DAT match.[/bold red]")
+
+def default_cache_path():
+    """Location of the result cache in the user's cache directory."""
+    return os.path.join(user_cache_dir(), "results.sqlite3")
+
+def file_sha1(file_path):
+    """SHA-1 of the file contents, read through the memory map."""
+    digest = hashlib.sha1()
+    with RomImage(file_path) as rom:
+        for offset, chunk in rom.iter_chunks(HEX_DUMP_CHUNK * 4):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ResultCache:
+    """On-disk SQLite cache of reader reports, keyed by path, size, mtime and inode.
+
+    A report is only valid for the pattern list it was scanned with. With `use_hash`
+    the SHA-1 of the contents is stored too, so copied, moved or touched ROMs are
+    recognised by their contents. The least recently used entries are evicted once
+    the stored reports exceed `max_bytes`.
+    """
+
+    def __init__(self, db_path=None, max_bytes=CACHE_MAX_BYTES, use_hash=False):
+        self.db_path = db_path or default_cache_path()
+        self.max_bytes = max_bytes
+        self.use_hash = use_hash
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._db = sqlite3.connect(self.db_path)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS reports (
+            path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER,
+            content_hash TEXT, patterns TEXT, report TEXT, accessed REAL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS reports_hash ON reports (content_hash, size)")
+        self._stored_bytes = self._db.execute("SELECT COALESCE(SUM(LENGTH(report)), 0) FROM reports").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+    @staticmethod
+    def _pattern_key(patterns):
+        return ",".join(sorted({bytes(pattern).hex() for pattern in patterns}))
+
+    @staticmethod
+    def _identity(file_path):
+        return (os.path.abspath(file_path), *rom_identity(file_path))
+
+    def get(self, file_path, patterns=DEFAULT_PATTERNS):
+        """Returns the cached report for an unchanged ROM, or None."""
+        try:
+            path, size, mtime_ns, inode = self._identity(file_path)
+        except (OSError, KeyError, zipfile.BadZipFile):
+            return None
+        pattern_key = self._pattern_key(patterns)
+        row = self._db.execute("SELECT size, mtime_ns, inode, patterns, report FROM reports WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[:4] == (size, mtime_ns, inode, pattern_key):
+            self._db.execute("UPDATE reports SET accessed = ? WHERE path = ?", (time.time(), path))
+            report = json.loads(row[4])
+        elif self.use_hash:
+            content_hash = file_sha1(file_path)
+            row = self._db.execute("SELECT report FROM reports WHERE content_hash = ? AND size = ? AND patterns = ?",
+                                   (content_hash, size, pattern_key)).fetchone()
+            if row is None:
+                return None
+            report = json.loads(row[0])
+            self.put(file_path, patterns, report, content_hash)
+        else:
+            return None
+        report["path"] = file_path
+        return report
+
+    def put(self, file_path, patterns, report, content_hash=None):
+        """Stores the report of a ROM under its current identity."""
+        path, size, mtime_ns, inode = self._identity(file_path)
+        if content_hash is None and self.use_hash:
+            content_hash = file_sha1(file_path)
+        data = json.dumps(report, ensure_ascii=False)
+        self._discard(path)
+        self._db.execute("INSERT INTO reports VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (path, size, mtime_ns, inode, content_hash, self._pattern_key(patterns), data, time.time()))
+        self._stored_bytes += len(data)
+        if self._stored_bytes > self.max_bytes:
+            self.evict()
+
+    def _discard(self, path):
+        row = self._db.execute("SELECT LENGTH(report) FROM reports WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM reports WHERE path = ?", (path,))
+            self._stored_bytes -= row[0]
+
+    def evict(self):
+        """Drops the least recently used reports until the cache is below 90 % of its size limit."""
+        target = self.max_bytes * 0.9
+        rows = self._db.execute("SELECT path, LENGTH(report) FROM reports ORDER BY accessed").fetchall()
+        for path, length in rows:
+            if self._stored_bytes <= target:
+                break
+            self._db.execute("DELETE FROM reports WHERE path = ?", (path,))
+            self._stored_bytes -= length
+        self._db.commit()
+
+    def invalidate(self, paths=None):
+        """Removes the reports of the given ROM files (or of everything under given directories); all without paths."""
+        if not paths:
+            removed = self._db.execute("DELETE FROM reports").rowcount
+        else:
+            removed = 0
+            for path in paths:
+                path = os.path.abspath(path)
+                removed += self._db.execute("DELETE FROM reports WHERE path = ? OR path LIKE ?",
+                                            (path, os.path.join(path, "%"))).rowcount
+        self._stored_bytes = self._db.execute("SELECT COALESCE(SUM(LENGTH(report)), 0) FROM reports").fetchone()[0]
+        self._db.commit()
+        return removed
+
+    def stats(self):
+        count = self._db.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+        return count, self._stored_bytes
+
+def default_journal_path():
+    """Location of the library journal (can be overridden with ROM_PARSER_JOURNAL)."""
+    return os.environ.get("ROM_PARSER_JOURNAL") or os.path.join(user_cache_dir(), "journal.sqlite3")
+
+class LibraryJournal:
+    """On-disk SQLite journal of a ROM library: path, size, mtime, inode, content hash and report of every ROM.
+
+    `plan()` only stats the files and compares them with the journal. Unchanged ROMs keep their
+    report, touched ROMs (same contents, new mtime) and moved or renamed ROMs (found by inode or
+    SHA-1) too; only new and changed ROMs have to be parsed again, deleted ones are dropped.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_journal_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._db = sqlite3.connect(self.db_path)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER,
+            content_hash TEXT, patterns TEXT, report TEXT)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS files_hash ON files (content_hash, size)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+    @staticmethod
+    def _in_scope(path, paths):
+        """True if a journal entry belongs to the given files, directories or glob patterns."""
+        for scope in paths:
+            scope_path = os.path.abspath(scope)
+            if glob.has_magic(scope):
+                if fnmatch.fnmatch(path, scope_path):
+                    return True
+            elif path == scope_path or path.startswith(os.path.join(scope_path, "")):
+                return True
+        return False
+
+    def plan(self, paths, patterns=DEFAULT_PATTERNS):
+        """Compares the ROMs under `paths` with the journal.
+
+        Returns a dict with the lists "unchanged", "touched" (paths), "renamed" ((old path, new path)),
+        "parse" (new or changed paths) and "deleted" (paths).
+        """
+        pattern_key = ResultCache._pattern_key(patterns)
+        current = {}
+        for file_path in find_rom_files(paths):
+            try:
+                current[os.path.abspath(file_path)] = rom_identity(file_path)
+            except (OSError, KeyError, zipfile.BadZipFile):
+                continue
+        rows = {row[0]: row[1:] for row in self._db.execute("SELECT path, size, mtime_ns, inode, content_hash, patterns FROM files")
+                if row[0] in current or self._in_scope(row[0], paths)}
+
+        plan = {"unchanged": [], "touched": [], "renamed": [], "parse": [], "deleted": []}
+        vanished = {path: row for path, row in rows.items() if path not in current and row[4] == pattern_key}
+        by_inode = {(row[0], row[1], row[2]): path for path, row in vanished.items()}
+        by_hash = {(row[3], row[0]): path for path, row in vanished.items()}
+        vanished_sizes = {row[0] for row in vanished.values()}
+        for path, identity in current.items():
+            size, mtime_ns, inode = identity
+            row = rows.get(path)
+            if row is not None and row[4] == pattern_key:
+                if row[:3] == identity:
+                    plan["unchanged"].append(path)
+                    continue
+                if row[0] == size and file_sha1(path) == row[3]:
+                    plan["touched"].append(path)
+                    continue
+            elif row is None:
+                # Moved or renamed: same inode and mtime, or else the same contents
+                old_path = by_inode.get(identity)
+                if old_path is None and size in vanished_sizes:
+                    old_path = by_hash.get((file_sha1(path), size))
+                if old_path is not None and old_path in vanished:
+                    del vanished[old_path]
+                    plan["renamed"].append((old_path, path))
+                    continue
+            plan["parse"].append(path)
+        plan["deleted"] = sorted(path for path in rows if path not in current and path not in {old for old, new in plan["renamed"]})
+        return plan
+
+    def apply(self, plan):
+        """Updates the identities of touched and renamed ROMs and drops deleted ones."""
+        for path in plan["touched"]:
+            self._db.execute("UPDATE files SET size = ?, mtime_ns = ?, inode = ? WHERE path = ?", (*rom_identity(path), path))
+        for old_path, new_path in plan["renamed"]:
+            report = self.report(old_path)
+            report["path"] = new_path
+            self._db.execute("DELETE FROM files WHERE path = ?", (new_path,))
+            self._db.execute("UPDATE files SET path = ?, size = ?, mtime_ns = ?, inode = ?, report = ? WHERE path = ?",
+                             (new_path, *rom_identity(new_path), json.dumps(report, ensure_ascii=False), old_path))
+        self._db.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in plan["deleted"]])
+        self._db.commit()
+
+    def put(self, file_path, patterns, report):
+        """Stores the report of a freshly parsed ROM; the SHA-1 from the report is its content hash."""
+        self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (os.path.abspath(file_path), *rom_identity(file_path), report["hashes"]["sha1"],
+                          ResultCache._pattern_key(patterns), json.dumps(report, ensure_ascii=False)))
+
+    def report(self, path):
+        row = self._db.execute("SELECT report FROM files WHERE path = ?", (path,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def stats(self):
+        return self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files").fetchone()
+
+def show_menu(rom, disassembler=None):
+    """Interactive menu for further options."""
+    while True:
+        console.print("\n[bold cyan]What would you like to do?[/bold cyan]")
+        console.print("[1] Browse ROM contents")
+        console.print("[2] Create HEX file")
+        console.print("[3] Show specific address")
+        console.print("[4] Start game in mGBA")
+        console.print("[5] Exit")
+
+        choice = console.input("[bold yellow]Please enter selection (1/2/3/4/5): [/bold yellow]")
+
+        if choice == "1":
+            display_rom_content(rom)
+        elif choice == "2":
+            export_to_hex_file(rom)
+        elif choice == "3":
+            view_specific_address(rom, disassembler)
+        elif choice == "4":
+            launch_mgba(rom.path)
+        elif choice == "5":
+            console.print("[bold green]Program ended.[/bold green]")
+            break
+        else:
+            console.print("[bold red]Invalid selection. Please try again.[/bold red]")
+
+def header_record(header):
+    """Converts a header object into a JSON-friendly dict (bytes as upper-case hex)."""
+    record = {}
+    for field in fields(header):
+        value = getattr(header, field.name)
+        record[field.name] = value.hex().upper() if isinstance(value, bytes) else value
+    return record
+
+def header_from_record(header_class, record):
+    """Inverse of header_record: rebuilds the header object of a cached report.
+
+    Fields that reports of older versions lack keep their defaults.
+    """
+    return header_class(**{field.name: bytes.fromhex(record[field.name]) if field.type in (bytes, "bytes") else record[field.name]
+                           for field in fields(header_class) if field.name in record})
+
+# Keys a cached report needs to replace all passes of a reader (entries of older versions lack some)
+REPORT_KEYS = {"header", "checksums", "hashes", "dat", "matches"}
+
+def cached_report(cache, file_path, patterns):
+    """The cached report of an unchanged ROM, or None."""
+    if cache is None:
+        return None
+    with profile_stage("cache"):
+        cached = cache.get(file_path, patterns)
+        if cached is None or not REPORT_KEYS <= cached.keys():
+            return None
+    with profile_stage("dat"):
+        return refresh_dat(cached)
+
+def make_report(file_path, rom_format, rom, header, checksums, hashes, dat_matches, important_info):
+    """Builds the report that the readers return, the batch mode writes and the cache stores."""
+    return {
+        "path": file_path,
+        "format": rom_format,
+        "size": rom.size,
+        "header": header_record(header),
+        "checksums": checksum_records(checksums),
+        "hashes": hashes,
+        "dat": dat_matches,
+        "matches": match_records(important_info),
+    }
+
+@dataclass(slots=True)
+class RomFormat:
+    """A ROM format of a family script, as read_rom_file needs it."""
+    name: str  # Format name in the report
+    title: str  # Heading of the header section
+    header_class: type  # Rebuilds the header of a cached report
+    inspect: object  # rom -> header object
+    render: object  # (rom, header) -> prints the header fields
+    checksums: object  # rom -> [(name, stored, computed, digits)]
+
+def read_rom_file(file_path, rom_format, patterns=DEFAULT_PATTERNS, interactive=True, cache=None):
+    """Prints the header, checksums, hashes and pattern matches of a ROM and returns its report.
+
+    The read_*_rom functions of the family scripts only choose the RomFormat. Without
+    interactive, errors are raised instead of printed and the menu is not shown.
+    """
+    try:
+        with profile_stage("open"):
+            rom = RomImage(file_path)
+        with rom:
+            cached = cached_report(cache, file_path, patterns)
+            console.print(f"[bold green]ROM size:[/bold green] {rom.size} Bytes")
+
+            console.print(f"\n[bold cyan]=== {rom_format.title} ROM Header Information ===[/bold cyan] \n")
+            with profile_stage("header"):
+                header = rom_format.inspect(rom) if cached is None else header_from_record(rom_format.header_class, cached["header"])
+                rom_format.render(rom, header)
+
+            # A cached report replaces the passes over the whole ROM
+            if cached is None:
+                with profile_stage("checksums", checksum_bytes(rom, rom_extension(file_path))):
+                    checksums = rom_format.checksums(rom)
+                with profile_stage("hashes", rom.size):
+                    hashes = compute_hashes(rom, getattr(header, "header_size", 0))
+                with profile_stage("dat"):
+                    dat_matches = lookup_dat(hashes)
+            else:
+                checksums = checksums_from_records(cached["checksums"])
+                hashes, dat_matches = cached["hashes"], cached["dat"]
+            print_checksums(checksums)
+            print_hashes(hashes, dat_matches)
+
+            # === ROM search ===
+            important_info = search_rom(rom, patterns, cached["matches"] if cached else None)
+
+            report = make_report(file_path, rom_format.name, rom, header, checksums, hashes, dat_matches, important_info)
+            if cache is not None and cached is None:
+                cache.put(file_path, patterns, report)
+            if interactive:
+                cpu = ROM_DISASSEMBLERS.get(rom_extension(file_path))
+                show_menu(rom, Disassembler(rom, cpu) if cpu is not None else None)
+            return report
+
+    except FileNotFoundError:
+        if not interactive:
+            raise
+        console.print("[bold red]The specified file was not found.[/bold red]")
+    except Exception as e:
+        if not interactive:
+            raise
+        console.print(f"[bold red]An error has occurred:[/bold red] {e}")
+
+def build_report(file_path, patterns=DEFAULT_PATTERNS):
+    """Headless counterpart of the read_*_rom functions: the same report without any Rich output."""
+    extension = rom_extension(file_path)
+    if extension not in ROM_INSPECTORS:
+        raise ValueError(f"{file_path} has an unknown extension.")
+    rom_format, inspector = ROM_INSPECTORS[extension]
+    with profile_stage("open"):
+        rom = RomImage(file_path)
+    with rom:
+        with profile_stage("header"):
+            header = inspector(rom)
+        with profile_stage("checksums", checksum_bytes(rom, extension)):
+            checksums = ROM_CHECKSUMS[extension](rom)
+        with profile_stage("hashes", rom.size):
+            hashes = compute_hashes(rom, getattr(header, "header_size", 0))
+        with profile_stage("dat"):
+            dat_matches = lookup_dat(hashes)
+        with profile_stage("scan", rom.size):
+            important_info = list(PatternScanner(patterns).matches(rom))
+        return make_report(file_path, rom_format, rom, header, checksums, hashes, dat_matches, important_info)
+
+def check_file_extension(file_path_extension, patterns=DEFAULT_PATTERNS, interactive=True, cache=None):
+    # A zip archive with exactly one ROM can be given directly
+    if os.path.splitext(file_path_extension)[1].lower() == ".zip" and os.path.isfile(file_path_extension):
+        entries = archive_rom_entries(file_path_extension)
+        if len(entries) != 1:
+            message = f"{file_path_extension} contains {len(entries)} ROMs; choose one with {file_path_extension}{ARCHIVE_SEPARATOR}<entry>."
+            if not interactive:
+                raise ValueError(message)
+            print(message)
+            for entry in entries:
+                print(f"  {entry}")
+            return None
+        file_path_extension = entries[0]
+
+    # Extract the extension (also inside zip and gzip archives)
+    file_extension = rom_extension(file_path_extension)
+
+    # Check if the file has one of the file extensions
+    reader = ROM_READERS.get(file_extension)
+    if reader is None:
+        if not interactive:
+            raise ValueError(f"{file_path_extension} has an unknown extension.")
+        print(f"{file_path_extension} has an unknown extension.")
+        return None
+    return reader(file_path_extension, patterns, interactive, cache)
+
+def _diff_spans(data_a, data_b, offset):
+    """Yields the (start, end) ranges of differing bytes of two equally long blocks.
+
+    Blocks are halved until they are small, so equal parts are skipped with one compare.
+    """
+    if data_a == data_b:
+        return
+    if len(data_a) > 64:
+        half = len(data_a) // 2
+        yield from _diff_spans(data_a[:half], data_b[:half], offset)
+        yield from _diff_spans(data_a[half:], data_b[half:], offset + half)
+        return
+    start = None
+    for index, (byte_a, byte_b) in enumerate(zip(data_a, data_b)):
+        if byte_a != byte_b:
+            if start is None:
+                start = index
+        elif start is not None:
+            yield offset + start, offset + index
+            start = None
+    if start is not None:
+        yield offset + start, offset + len(data_a)
+
+def _changed_spans(data_a, data_b, offset):
+    """Byte-exact (start, end) ranges of a changed block (vectorized with NumPy when available)."""
+    if np is None:
+        return _diff_spans(data_a, data_b, offset)
+    changed = np.flatnonzero(np.frombuffer(data_a, dtype=np.uint8) != np.frombuffer(data_b, dtype=np.uint8))
+    breaks = np.flatnonzero(np.diff(changed) > 1)
+    starts = changed[np.concatenate(([0], breaks + 1))] + offset
+    ends = changed[np.concatenate((breaks, [len(changed) - 1]))] + offset + 1
+    return zip(starts.tolist(), ends.tolist())
+
+def _add_range(ranges, start, end):
+    if ranges and ranges[-1][1] == start:
+        ranges[-1] = (ranges[-1][0], end)
+    else:
+        ranges.append((start, end))
+
+def diff_roms(rom_a, rom_b, block_size=DIFF_BLOCK):
+    """Returns the (start, end) ranges in which `rom_b` differs from `rom_a`.
+
+    Both images are compared block by block straight from the memory maps; only
+    blocks that differ are refined byte by byte. Bytes beyond the end of `rom_a`
+    form one more changed range.
+    """
+    ranges = []
+    common = min(rom_a.size, rom_b.size)
+    with profile_stage("diff", common):
+        for offset in range(0, common, block_size):
+            length = min(block_size, common - offset)
+            data_a = bytes(rom_a.slice(offset, length))
+            data_b = bytes(rom_b.slice(offset, length))
+            if data_a != data_b:
+                for start, end in _changed_spans(data_a, data_b, offset):
+                    _add_range(ranges, start, end)
+        if rom_b.size > rom_a.size:
+            _add_range(ranges, rom_a.size, rom_b.size)
+    return ranges
+
+def rom_crc32(rom):
+    crc = 0
+    for offset, chunk in rom.iter_chunks(CHECKSUM_CHUNK):
+        crc = zlib.crc32(chunk, crc)
+    return crc
+
+def make_ips(rom_a, rom_b, ranges):
+    """Builds an IPS patch that turns `rom_a` into `rom_b`.
+
+    Ranges closer than one record header (5 bytes) are merged and long ranges are
+    split into 64 KB records. A shorter `rom_b` is written as truncation size after
+    the EOF marker. Raises ValueError for changes beyond the 16 MB that IPS can address.
+    """
+    patch = bytearray(b"PATCH")
+    merged = []
+    for start, end in ranges:
+        if merged and start - merged[-1][1] <= 5:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    for start, end in merged:
+        while start < end:
+            if start == IPS_EOF_OFFSET:
+                start -= 1  # A record at 0x454F46 would read as the "EOF" marker
+            if start > IPS_MAX_OFFSET:
+                raise ValueError(f"IPS cannot address 0x{start:08X} (16 MB limit); use BPS instead.")
+            length = min(end - start, 0xFFFF)
+            patch += start.to_bytes(3, "big") + length.to_bytes(2, "big") + bytes(rom_b.slice(start, length))
+            start += length
+    patch += b"EOF"
+    if rom_b.size < rom_a.size:
+        patch += rom_b.size.to_bytes(3, "big")
+    return bytes(patch)
+
+def _bps_number(value):
+    """BPS variable-length number (7 bits per byte, high bit marks the last byte)."""
+    encoded = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if not value:
+            encoded.append(0x80 | bits)
+            return encoded
+        encoded.append(bits)
+        value -= 1
+
+def make_bps(rom_a, rom_b, ranges):
+    """Builds a BPS patch: unchanged spans are read from the source, changed spans are stored."""
+    patch = bytearray(b"BPS1") + _bps_number(rom_a.size) + _bps_number(rom_b.size) + _bps_number(0)
+    position = 0
+    for start, end in ranges:
+        if start > position:
+            patch += _bps_number((start - position - 1) << 2 | BPS_SOURCE_READ)
+        patch += _bps_number((end - start - 1) << 2 | BPS_TARGET_READ)
+        patch += rom_b.slice(start, end - start)
+        position = end
+    if position < rom_b.size:
+        patch += _bps_number((rom_b.size - position - 1) << 2 | BPS_SOURCE_READ)
+    patch += struct.pack("<II", rom_crc32(rom_a), rom_crc32(rom_b))
+    patch += struct.pack("<I", zlib.crc32(patch))
+    return bytes(patch)
+
+def print_diff(rom_a, rom_b, ranges, elapsed, show_all=False):
+    """Prints the changed ranges with the first bytes before and after the change."""
+    console.print("\n[bold cyan]=== ROM diff ===[/bold cyan]")
+    console.print(f"[bold yellow]A:[/bold yellow] {rom_a.path} ({rom_a.size} Bytes)")
+    console.print(f"[bold yellow]B:[/bold yellow] {rom_b.path} ({rom_b.size} Bytes)")
+    if not ranges and rom_a.size == rom_b.size:
+        console.print(f"\n[bold green]The ROMs are identical[/bold green] (compared in {elapsed:.3f} s).")
+        return
+    shown = ranges if show_all else ranges[:DIFF_SHOWN_RANGES]
+    for start, end in shown:
+        before = rom_a.read(start, min(end - start, 8)).hex().upper() or "-"
+        after = rom_b.read(start, min(end - start, 8)).hex().upper()
+        console.print(f"[bold yellow]0x{start:08X} - 0x{end - 1:08X}:[/bold yellow] {end - start} Bytes {before} -> {after}")
+    if len(shown) < len(ranges):
+        console.print(f"... {len(ranges) - len(shown)} more ranges (--all shows every range)")
+    if rom_b.size < rom_a.size:
+        console.print(f"[bold yellow]B is truncated:[/bold yellow] {rom_a.size - rom_b.size} Bytes removed at 0x{rom_b.size:08X}")
+    changed = sum(end - start for start, end in ranges)
+    console.print(f"\n[bold green]Diff completed:[/bold green] {len(ranges)} ranges, {changed} Bytes changed, compared in {elapsed:.3f} s.")
+
+def _patch_number(view, position):
+    """Reads a BPS/UPS variable-length number; returns (value, next position)."""
+    value = 0
+    shift = 1
+    while True:
+        byte = view[position]
+        position += 1
+        value += (byte & 0x7F) * shift
+        if byte & 0x80:
+            return value, position
+        shift <<= 7
+        value += shift
+
+def _ips_records(patch, source_size):
+    """Reads the record headers of an IPS patch.
+
+    Returns (records, mapped size, final size); a record is (offset, data position,
+    length, RLE byte or None). The final size differs when the patch truncates the ROM.
+    """
+    records = []
+    position = 5
+    mapped_size = source_size
+    while True:
+        header = patch.read(position, 3)
+        if header == b"EOF":
+            truncate = patch.read(position + 3, 3)
+            return records, mapped_size, int.from_bytes(truncate, "big") if len(truncate) == 3 else mapped_size
+        if len(header) < 3 or position + 5 > patch.size:
+            raise ValueError("The IPS patch ends without EOF marker.")
+        offset = int.from_bytes(header, "big")
+        length = patch.u16be(position + 3)
+        position += 5
+        if length:
+            records.append((offset, position, length, None))
+            position += length
+        else:
+            length = patch.u16be(position)
+            records.append((offset, None, length, patch.u8(position + 2)))
+            position += 3
+        mapped_size = max(mapped_size, offset + length)
+
+def _apply_ips(patch, records, target):
+    for offset, position, length, rle_byte in records:
+        if rle_byte is None:
+            target[offset:offset + length] = patch.view[position:position + length]
+        else:
+            target[offset:offset + length] = bytes((rle_byte,)) * length
+
+def _apply_bps(source, patch, target, position):
+    """Runs the BPS actions on `target` (a copy of the source); returns the target CRC32 computed on the way."""
+    end = patch.size - 12
+    output_offset = source_relative = target_relative = 0
+    crc = 0
+    while position < end:
+        data, position = _patch_number(patch.view, position)
+        action, length = data & 3, (data >> 2) + 1
+        if output_offset + length > len(target):
+            raise ValueError("The BPS patch writes beyond the target size.")
+        if action == BPS_TARGET_READ:
+            target[output_offset:output_offset + length] = patch.view[position:position + length]
+            position += length
+        elif action == BPS_SOURCE_COPY:
+            delta, position = _patch_number(patch.view, position)
+            source_relative += -(delta >> 1) if delta & 1 else delta >> 1
+            target[output_offset:output_offset + length] = source.view[source_relative:source_relative + length]
+            source_relative += length
+        elif action == BPS_TARGET_COPY:
+            delta, position = _patch_number(patch.view, position)
+            target_relative += -(delta >> 1) if delta & 1 else delta >> 1
+            # An overlapping copy repeats bytes it has just written, so copy at most the distance at a time
+            distance = output_offset - target_relative
+            if distance <= 0:
+                raise ValueError("Invalid TargetCopy in the BPS patch.")
+            copied = 0
+            while copied < length:
+                step = min(length - copied, distance)
+                target[output_offset + copied:output_offset + copied + step] = target[target_relative + copied:target_relative + copied + step]
+                copied += step
+            target_relative += length
+        # SourceRead needs no work: the target starts as a copy of the source
+        crc = zlib.crc32(target[output_offset:output_offset + length], crc)
+        output_offset += length
+    return zlib.crc32(target[output_offset:], crc) if output_offset < len(target) else crc
+
+def _apply_ups(patch, target, position):
+    """XORs the UPS hunks into `target` (a copy of the source); returns the target CRC32 computed on the way.
+
+    The hunks cover max(source size, target size) bytes; what lies past the end of a
+    smaller target is dropped, as flips and beat do.
+    """
+    end = patch.size - 12
+    output_offset = crc_offset = 0
+    crc = 0
+    while position < end:
+        skip, position = _patch_number(patch.view, position)
+        output_offset += skip
+        stop = patch.find(b"\x00", position, end)
+        if stop == -1:
+            raise ValueError("The UPS patch has an unterminated hunk.")
+        length = max(0, min(stop - position, len(target) - output_offset))
+        hunk = int.from_bytes(target[output_offset:output_offset + length], "little")
+        hunk ^= int.from_bytes(patch.view[position:position + length], "little")
+        target[output_offset:output_offset + length] = hunk.to_bytes(length, "little")
+        output_offset += stop - position + 1
+        position = stop + 1
+        crc = zlib.crc32(target[crc_offset:output_offset], crc)
+        crc_offset = output_offset
+    return zlib.crc32(target[crc_offset:], crc)
+
+def apply_patch(source_path, patch_path, output_path):
+    """Applies an IPS, BPS or UPS patch to `source_path` and writes the patched ROM to `output_path`.
+
+    Source and patch stay memory-mapped; the output file starts as a copy of the
+    source (its CRC32 is computed while copying) and is patched in place through a
+    writable memory map. BPS/UPS CRCs are checked; on any error the output is removed.
+    Returns (patch format, output size).
+    """
+    with RomImage(source_path) as source, RomImage(patch_path) as patch:
+        magic = patch.read(0, 5)
+        if magic == b"PATCH":
+            patch_format = "IPS"
+            records, mapped_size, final_size = _ips_records(patch, source.size)
+        elif magic[:4] in (b"BPS1", b"UPS1"):
+            patch_format = magic[:3].decode("ascii")
+            source_size, position = _patch_number(patch.view, 4)
+            mapped_size, position = _patch_number(patch.view, position)
+            if patch_format == "BPS":
+                metadata_size, position = _patch_number(patch.view, position)
+                position += metadata_size
+            final_size = mapped_size
+            expected_source, expected_target, expected_patch = struct.unpack("<III", patch.read(patch.size - 12, 12))
+            if zlib.crc32(patch.view[:patch.size - 4]) != expected_patch:
+                raise ValueError("The patch file is damaged (patch CRC32 mismatch).")
+        else:
+            raise ValueError("Unknown patch format (expected IPS, BPS or UPS).")
+
+        try:
+            with open(output_path, "w+b") as output_file:
+                with profile_stage("copy", source.size):
+                    source_crc = 0
+                    for offset, chunk in source.iter_chunks(CHECKSUM_CHUNK):
+                        source_crc = zlib.crc32(chunk, source_crc)
+                        if offset < mapped_size:
+                            output_file.write(chunk[:mapped_size - offset])
+                    output_file.truncate(mapped_size)
+                if patch_format != "IPS" and (source.size, source_crc) != (source_size, expected_source):
+                    raise ValueError(f"The patch is not made for this ROM (source CRC32 {source_crc:08X}, expected {expected_source:08X}).")
+                if mapped_size:
+                    with profile_stage("apply", mapped_size), \
+                         mmap.mmap(output_file.fileno(), mapped_size) as output, memoryview(output) as target:
+                        if patch_format == "IPS":
+                            _apply_ips(patch, records, target)
+                        else:
+                            if patch_format == "BPS":
+                                target_crc = _apply_bps(source, patch, target, position)
+                            else:
+                                target_crc = _apply_ups(patch, target, position)
+                            if target_crc != expected_target:
+                                raise ValueError(f"The patched ROM is not correct (target CRC32 {target_crc:08X}, expected {expected_target:08X}).")
+                output_file.truncate(final_size)
+        except BaseException:
+            os.remove(output_path)
+            raise
+    return patch_format, final_size
+
+def _histograms(chunk, block_size, block_index):
+    """Byte histograms (blocks x 256) of all blocks in `chunk`; the last block may be shorter.
+
+    `block_index` holds 256 * (block number) for every byte position of a full chunk.
+    """
+    data = np.frombuffer(chunk, dtype=np.uint8)
+    block_count = -(-len(data) // block_size)
+    return np.bincount(block_index[:len(data)] + data, minlength=block_count * 256).reshape(block_count, 256)
+
+def block_statistics(rom, block_size=REGION_BLOCK):
+    """Returns (entropy, zero ratio, 0xFF ratio, text ratio) of every `block_size` block of the ROM.
+
+    With NumPy the byte histograms of whole chunks are counted at once with bincount;
+    without it every block is counted with collections.Counter.
+    """
+    statistics = []
+    chunk_size = max(block_size, REGION_CHUNK // block_size * block_size)
+    text_bytes = list(range(0x20, 0x7F)) + [0x0A, 0x0D]
+    if np is not None:
+        block_index = np.repeat(np.arange(chunk_size // block_size, dtype=np.int32) * 256, block_size)
+    for offset, chunk in rom.iter_chunks(chunk_size):
+        if np is not None:
+            counts = _histograms(chunk, block_size, block_index)
+            lengths = np.full(len(counts), block_size)
+            lengths[-1] = len(chunk) - (len(counts) - 1) * block_size
+            probabilities = counts / lengths[:, None]
+            logs = np.log2(probabilities, out=np.zeros_like(probabilities), where=counts > 0)
+            entropy = -(probabilities * logs).sum(axis=1)
+            statistics.extend(zip(entropy.tolist(), probabilities[:, 0x00].tolist(), probabilities[:, 0xFF].tolist(),
+                                  probabilities[:, text_bytes].sum(axis=1).tolist()))
+            continue
+        for start in range(0, len(chunk), block_size):
+            block = bytes(chunk[start:start + block_size])
+            counts = Counter(block)
+            entropy = -sum(count / len(block) * math.log2(count / len(block)) for count in counts.values())
+            statistics.append((entropy, counts[0x00] / len(block), counts[0xFF] / len(block),
+                               sum(counts[byte] for byte in text_bytes) / len(block)))
+    return statistics
+
+def classify_block(entropy, zero_ratio, ff_ratio, text_ratio):
+    """Rough content class of a block from its entropy and fill ratios."""
+    if max(zero_ratio, ff_ratio) >= 0.9:
+        return "padding"
+    if text_ratio >= 0.9:
+        return "text"
+    if entropy >= 7.2:
+        return "compressed"
+    if entropy >= 5.0:
+        return "code"
+    return "data"
+
+def region_ranges(classes, block_size, size):
+    """Merges runs of equally classified blocks into (start, end, class) ranges."""
+    ranges = []
+    for index, region_class in enumerate(classes):
+        start = index * block_size
+        if ranges and ranges[-1][2] == region_class:
+            ranges[-1] = (ranges[-1][0], min(start + block_size, size), region_class)
+        else:
+            ranges.append((start, min(start + block_size, size), region_class))
+    return ranges
+
+def region_map(rom, block_size=None):
+    """Analyses the whole ROM; returns (block size, per-block statistics, per-block classes).
+
+    Without `block_size` the blocks grow with the ROM so the map stays compact.
+    """
+    if block_size is None:
+        block_size = REGION_BLOCK
+        while rom.size > block_size * REGION_MAP_CELLS:
+            block_size *= 2
+    with profile_stage("regions", rom.size):
+        statistics = block_statistics(rom, block_size)
+        classes = [classify_block(*block) for block in statistics]
+    return block_size, statistics, classes
+
+def print_region_map(rom, block_size=None):
+    """Prints the region map (one character per block), a legend and the share of every class."""
+    from rich.text import Text
+    block_size, statistics, classes = region_map(rom, block_size)
+    console.print(f"\n[bold cyan]=== Region map ({block_size} Bytes per block) ===[/bold cyan]")
+    for row in range(0, len(classes), REGION_MAP_WIDTH):
+        line = Text(f"0x{row * block_size:08X}: ", style="bold yellow")
+        for region_class in classes[row:row + REGION_MAP_WIDTH]:
+            symbol, style = REGION_CLASSES[region_class]
+            line.append(symbol, style=style)
+        console.print(line)
+
+    console.print("")
+    for region_class, (symbol, style) in REGION_CLASSES.items():
+        count = classes.count(region_class)
+        if count:
+            entropy = sum(block[0] for block, block_class in zip(statistics, classes) if block_class == region_class) / count
+            legend = Text(f"{symbol} ", style=style)
+            legend.append(f"{region_class}: {count} blocks ({count * 100 / len(classes):.1f} %), average entropy {entropy:.2f} bits/Byte")
+            console.print(legend)
+    return region_ranges(classes, block_size, rom.size)
+
+def find_rom_files(paths):
+    """Expands files, directories (recursively), glob patterns and zip archives into a sorted list of ROM files."""
+    found = set()
+
+    def add(file_path):
+        if os.path.splitext(file_path)[1].lower() == ".zip":
+            try:
+                found.update(archive_rom_entries(file_path))
+            except zipfile.BadZipFile:
+                found.add(file_path)  # Reported as error by the caller
+        elif rom_extension(file_path) in ROM_READERS:
+            found.add(file_path)
+
+    for path in paths:
+        if ARCHIVE_SEPARATOR in path:
+            found.add(path)
+            continue
+        if os.path.isfile(path):
+            if os.path.splitext(path)[1].lower() == ".zip":
+                add(path)
+            else:
+                found.add(path)
+            continue
+        candidates = [path] if os.path.isdir(path) else glob.glob(path, recursive=True)
+        for candidate in candidates:
+            if os.path.isdir(candidate):
+                for directory, subdirectories, file_names in os.walk(candidate):
+                    for name in file_names:
+                        add(os.path.join(directory, name))
+            else:
+                add(candidate)
+    return sorted(found)
+
+def verify_roms(paths):
+    """Verifies the checksums of all ROMs under `paths` and prints one line per ROM."""
+    rom_files = find_rom_files(paths)
+    checked = failed = total_bytes = 0
+    started = time.perf_counter()
+    for file_path in rom_files:
+        verifier = ROM_CHECKSUMS.get(rom_extension(file_path))
+        try:
+            if verifier is None:
+                raise ValueError("unknown extension")
+            with RomImage(file_path) as rom:
+                checksums = verifier(rom)
+                total_bytes += checksum_bytes(rom, rom_extension(file_path))
+        except Exception as e:
+            console.print(f"[bold red]ERROR[/bold red]    {file_path}: {e}")
+            failed += 1
+            continue
+        checked += 1
+        mismatches = [name for name, stored, computed, digits in checksums if stored != computed]
+        if not checksums:
+            console.print(f"[bold yellow]N/A[/bold yellow]      {file_path} (no checksum in this format)")
+        elif mismatches:
+            failed += 1
+            console.print(f"[bold red]MISMATCH[/bold red] {file_path} ({', '.join(mismatches)})")
+        else:
+            console.print(f"[bold green]OK[/bold green]       {file_path}")
+    elapsed = time.perf_counter() - started
+    rate = total_bytes / (1024 * 1024) / elapsed if elapsed else 0.0
+    console.print(f"\n[bold green]Verification completed:[/bold green] {checked} ROMs checked, {failed} failed, "
+                  f"{total_bytes} Bytes in {elapsed:.2f} s ({rate:.0f} MB/s)")
+    return failed == 0
+
+def _init_worker(family_module, sniffed_extensions):
+    """Sets up worker processes that do not inherit the parent ("spawn" on Windows/macOS).
+
+    Importing the family script fills the format tables; the sniffed extensions are handed over.
+    """
+    importlib.import_module(family_module)
+    SNIFFED_EXTENSIONS.update(sniffed_extensions)
+
+def _batch_worker(file_path, patterns):
+    """Reads one ROM non-interactively and returns its record (or the error)."""
+    started = time.perf_counter()
+    try:
+        report = build_report(file_path, patterns)
+    except Exception as e:
+        report = {"path": file_path, "error": f"{type(e).__name__}: {e}"}
+    report["elapsed"] = round(time.perf_counter() - started, 6)
+    return report
+
+def run_batch(paths, patterns=DEFAULT_PATTERNS, workers=None, output_path=None, cache=None):
+    """Catalogues many ROMs in parallel and streams one JSON Lines record per ROM as results complete.
+
+    ROMs with a valid entry in `cache` are answered from it; only the others go to the workers.
+    """
+    status_console = stderr_console()
+    workers = workers or os.cpu_count() or 1
+    rom_files = find_rom_files(paths)
+    status_console.print(f"[bold cyan]Batch:[/bold cyan] {len(rom_files)} ROMs, {workers} workers")
+
+    output = open(output_path, "w", encoding="utf-8") if output_path else sys.stdout
+    processed = errors = cache_hits = 0
+    started = time.perf_counter()
+
+    def write_record(report):
+        nonlocal processed, errors
+        output.write(json.dumps(report, ensure_ascii=False) + "\n")
+        output.flush()
+        processed += 1
+        errors += "error" in report
+
+    def finish(future):
+        report = future.result()
+        if cache is not None and "error" not in report:
+            cache.put(report["path"], patterns, {key: value for key, value in report.items() if key != "elapsed"})
+        write_record(report)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(FAMILY["module"], SNIFFED_EXTENSIONS)) as executor:
+            pending = set()
+            for file_path in rom_files:
+                cached = cache.get(file_path, patterns) if cache is not None else None
+                if cached is not None:
+                    cache_hits += 1
+                    write_record(dict(refresh_dat(cached), cached=True))
+                    continue
+                pending.add(executor.submit(_batch_worker, file_path, patterns))
+                # Keep the queue short so results stream out while files are still being submitted
+                if len(pending) >= workers * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(future)
+            for future in as_completed(pending):
+                finish(future)
+    finally:
+        if output_path:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    status_console.print(f"[bold green]Batch completed:[/bold green] {processed} ROMs ({cache_hits} from cache, {errors} errors) in {elapsed:.2f} s")
+
+def run_incremental(paths, patterns=DEFAULT_PATTERNS, workers=None, output_path=None, journal=None):
+    """Catalogues a ROM library incrementally: only new and changed ROMs are parsed, all others come from the journal.
+
+    Like run_batch, one JSON Lines record per ROM is written; records from the journal carry
+    "journal": "unchanged", "touched" or "renamed".
+    """
+    status_console = stderr_console()
+    workers = workers or os.cpu_count() or 1
+    journal = journal or LibraryJournal()
+    started = time.perf_counter()
+    plan = journal.plan(paths, patterns)
+    journal.apply(plan)
+    status_console.print(f"[bold cyan]Journal:[/bold cyan] {len(plan['unchanged'])} unchanged, {len(plan['touched'])} touched, "
+                         f"{len(plan['renamed'])} renamed, {len(plan['deleted'])} deleted, {len(plan['parse'])} to parse "
+                         f"({time.perf_counter() - started:.2f} s)")
+
+    output = open(output_path, "w", encoding="utf-8") if output_path else sys.stdout
+    processed = errors = 0
+
+    def write_record(report):
+        nonlocal processed, errors
+        output.write(json.dumps(report, ensure_ascii=False) + "\n")
+        processed += 1
+        errors += "error" in report
+
+    try:
+        for state in ("unchanged", "touched", "renamed"):
+            for path in plan[state]:
+                write_record(dict(refresh_dat(journal.report(path[1] if state == "renamed" else path)), journal=state))
+        output.flush()
+        if plan["parse"]:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(FAMILY["module"], SNIFFED_EXTENSIONS)) as executor:
+                futures = [executor.submit(_batch_worker, file_path, patterns) for file_path in plan["parse"]]
+                for future in as_completed(futures):
+                    report = future.result()
+                    if "error" not in report:
+                        journal.put(report["path"], patterns, {key: value for key, value in report.items() if key != "elapsed"})
+                    write_record(report)
+                    output.flush()
+    finally:
+        if output_path:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    status_console.print(f"[bold green]Batch completed:[/bold green] {processed} ROMs ({len(plan['parse'])} parsed, {errors} errors) in {elapsed:.2f} s")
+    return plan
+BENCH_LOOKUPS = 10000
+BENCH_PAGES = 256
+
+class TextTable:
+    """Character table (.tbl) that maps byte sequences to text.
+
+    All entries are compiled into one regex that matches runs of at least `min_length`
+    table entries (multi-byte entries first, single bytes as one character class), so
+    the strings of a whole ROM are found in a single pass over the memory map.
+    """
+
+    def __init__(self, entries, end_codes=None, min_length=TEXT_MIN_LENGTH):
+        self.entries = dict(entries)
+        self.end_codes = dict(end_codes or {})
+        if not self.entries:
+            raise ValueError("The character table has no entries.")
+        multi_byte = sorted((code for code in self.entries if len(code) > 1), key=len, reverse=True)
+        single_bytes = sorted(code for code in self.entries if len(code) == 1)
+        parts = [re.escape(code) for code in multi_byte]
+        if single_bytes:
+            parts.append(b"[" + b"".join(re.escape(code) for code in single_bytes) + b"]")
+        end_parts = [re.escape(code) for code in sorted(self.end_codes, key=len, reverse=True)]
+        run = b"(?:" + b"|".join(parts) + b"){%d,}" % min_length
+        if end_parts:
+            run += b"(?:" + b"|".join(end_parts) + b")?"
+        self._run = re.compile(run)
+        self._token = re.compile(b"|".join(end_parts + parts))
+        self._longest = max(map(len, chain(self.entries, self.end_codes)))
+        # A run shorter than min_length at the end of a chunk is not matched yet, but may go on in the next one
+        self._tail = min_length * self._longest
+        # Tables with only single-byte codes are decoded with str.translate instead of tokenizing
+        self._translation = None
+        if not multi_byte and all(len(code) == 1 for code in self.end_codes):
+            self._translation = {code[0]: text for code, text in {**self.entries, **self.end_codes}.items()}
+
+    @classmethod
+    def load(cls, table_path, min_length=TEXT_MIN_LENGTH):
+        """Reads a Thingy-style table: `XX=text` or `XXYY=text` per line, `/XX=text` for end codes, `*XX` for line breaks."""
+        entries = {}
+        end_codes = {}
+        with open(table_path, encoding="utf-8-sig", errors="replace") as table_file:
+            for line in table_file:
+                line = line.rstrip("\r\n")
+                marker = line[:1]
+                code, separator, text = line.lstrip("/*").partition("=")
+                try:
+                    key = bytes.fromhex(code.strip())
+                except ValueError:
+                    continue  # Comments, blank lines and other table extensions
+                if not key or (marker not in "/*" and not separator):
+                    continue
+                if marker == "/":
+                    end_codes[key] = text
+                elif marker == "*":
+                    entries[key] = text or "\n"
+                else:
+                    entries[key] = text
+        return cls(entries, end_codes, min_length)
+
+    @classmethod
+    def ascii(cls, min_length=TEXT_MIN_LENGTH):
+        """Plain printable ASCII (like `strings`), used when no table is given."""
+        return cls({bytes((byte,)): chr(byte) for byte in range(0x20, 0x7F)}, min_length=min_length)
+
+    def decode(self, data):
+        if self._translation is not None:
+            return data.decode("latin-1").translate(self._translation)
+        return "".join(self.entries.get(token, self.end_codes.get(token, "")) for token in self._token.findall(data))
+
+    def extract(self, rom):
+        """Yields (offset, raw bytes, text) for every string in the ROM.
+
+        A memory-mapped ROM is matched in place. A compressed one is streamed in chunks of TEXT_CHUNK
+        Bytes; a string that may go on in the next chunk, and the last bytes that may still start
+        one, are carried over.
+        """
+        if not isinstance(rom, CompressedRomImage):
+            for match in self._run.finditer(rom.view):
+                text = match.group()
+                yield match.start(), text, self.decode(text)
+            return
+        carry, carry_offset = b"", 0
+        for offset, chunk in rom.iter_chunks(TEXT_CHUNK):
+            data = carry + bytes(chunk)
+            cut = max(0, len(data) - self._tail)
+            last_end = len(data) - self._longest  # Strings ending after it may go on
+            for match in self._run.finditer(data):
+                start, end = match.span()
+                if start >= cut or end > last_end:
+                    cut = min(cut, start)
+                    break
+                text = match.group()
+                yield carry_offset + start, text, self.decode(text)
+                if end > cut:
+                    cut = end
+            carry, carry_offset = data[cut:], carry_offset + cut
+        for match in self._run.finditer(carry):
+            yield carry_offset + match.start(), match.group(), self.decode(match.group())
+
+def extract_text(paths, table, output_path=None, output_format="csv"):
+    """Extracts the strings of all ROMs under `paths` and writes them as CSV or JSON (to stdout without `output_path`)."""
+    status_console = stderr_console()
+    output = open(output_path, "w", encoding="utf-8", newline="") if output_path else sys.stdout
+    rom_files = find_rom_files(paths)
+    count = total_bytes = 0
+    started = time.perf_counter()
+    try:
+        if output_format == "csv":
+            writer = csv.writer(output)
+            writer.writerow(["path", "offset", "length", "hex", "text"])
+        else:
+            output.write("[")
+        for file_path in rom_files:
+            with RomImage(file_path) as rom, profile_stage("text", rom.size):
+                total_bytes += rom.size
+                for offset, data, text in table.extract(rom):
+                    if output_format == "csv":
+                        writer.writerow([file_path, f"0x{offset:08X}", len(data), data.hex().upper(), text])
+                    else:
+                        record = {"path": file_path, "offset": offset, "length": len(data), "hex": data.hex().upper(), "text": text}
+                        output.write(("," if count else "") + "\n" + json.dumps(record, ensure_ascii=False))
+                    count += 1
+        if output_format == "json":
+            output.write("\n]\n")
+    finally:
+        if output_path:
+            output.close()
+    elapsed = time.perf_counter() - started
+    rate = total_bytes / (1024 * 1024) / elapsed if elapsed else 0.0
+    status_console.print(f"[bold green]Text extraction completed:[/bold green] {count} strings in {len(rom_files)} ROMs, "
+                         f"{total_bytes} Bytes in {elapsed:.2f} s ({rate:.0f} MB/s)")
+    return count
+
+def tile_sheet(tiles, columns=TILE_SHEET_COLUMNS):
+    """Arranges (tiles, 8, 8) colour indices into one 2D sheet, `columns` tiles per row."""
+    rows = max(1, -(-len(tiles) // columns))
+    padded = np.zeros((rows * columns, 8, 8), dtype=np.uint8)
+    padded[:len(tiles)] = tiles
+    return padded.reshape(rows, columns, 8, 8).transpose(0, 2, 1, 3).reshape(rows * 8, columns * 8)
+
+def grayscale_palette(bits_per_pixel):
+    """Shades from white (colour 0) to black, as on the Game Boy."""
+    levels = 1 << bits_per_pixel
+    return [(255 - index * 255 // (levels - 1),) * 3 for index in range(levels)]
+
+def write_png(output_path, pixels, palette):
+    """Writes an 8-bit palette PNG with a minimal encoder (IHDR, PLTE, one IDAT, IEND)."""
+    height, width = pixels.shape
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    # Every scanline starts with filter type 0 (none)
+    scanlines = np.hstack((np.zeros((height, 1), dtype=np.uint8), pixels.astype(np.uint8))).tobytes()
+    with open(output_path, "wb") as png_file:
+        png_file.write(b"\x89PNG\r\n\x1a\n")
+        png_file.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)))
+        png_file.write(chunk(b"PLTE", bytes(value for color in palette for value in color)))
+        png_file.write(chunk(b"IDAT", zlib.compress(scanlines, 6)))
+        png_file.write(chunk(b"IEND", b""))
+
+def export_tiles(rom, tile_format, offset, length, output_path, columns=TILE_SHEET_COLUMNS, raw_path=None):
+    """Decodes `length` bytes at `offset` as tiles and writes a PNG tile sheet (and optionally the raw .npy array).
+
+    Returns the number of decoded tiles.
+    """
+    bytes_per_tile, bits_per_pixel, decoder = TILE_FORMATS[tile_format]
+    with profile_stage("tiles", length):
+        tiles = decoder(rom.slice(offset, length))
+        write_png(output_path, tile_sheet(tiles, columns), grayscale_palette(bits_per_pixel))
+        if raw_path:
+            np.save(raw_path, tiles)
+    return len(tiles)
+
+class InstructionIndex:
+    """Decoded instructions as sorted parallel arrays (ROM offset, length, traced flag), queried with bisect."""
+
+    def __init__(self):
+        self.offsets = array("I")
+        self.lengths = array("B")
+        self.traced = array("B")
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def find(self, offset):
+        """Position of the instruction that covers `offset`, or None."""
+        position = bisect.bisect_right(self.offsets, offset) - 1
+        if position >= 0 and offset < self.offsets[position] + self.lengths[position]:
+            return position
+        return None
+
+    def merge(self, decoded, traced):
+        """Adds {offset: length} entries; offsets that are already indexed are kept as they are."""
+        new_offsets = [offset for offset in sorted(decoded) if self.find(offset) is None or self.offsets[self.find(offset)] != offset]
+        if not new_offsets:
+            return
+        flag = 1 if traced else 0
+        first = bisect.bisect_left(self.offsets, new_offsets[0])
+        if first == bisect.bisect_left(self.offsets, new_offsets[-1]):
+            # All new instructions fall into one gap: splice them in
+            self.offsets[first:first] = array("I", new_offsets)
+            self.lengths[first:first] = array("B", [decoded[offset] for offset in new_offsets])
+            self.traced[first:first] = array("B", [flag]) * len(new_offsets)
+            return
+        entries = sorted(chain(zip(self.offsets, self.lengths, self.traced), ((offset, decoded[offset], flag) for offset in new_offsets)))
+        self.offsets = array("I", [entry[0] for entry in entries])
+        self.lengths = array("B", [entry[1] for entry in entries])
+        self.traced = array("B", [entry[2] for entry in entries])
+
+    def between(self, start, end):
+        """(offset, length, traced) of all indexed instructions starting in [start, end)."""
+        first = bisect.bisect_left(self.offsets, start)
+        last = bisect.bisect_left(self.offsets, end)
+        return list(zip(self.offsets[first:last], self.lengths[first:last], self.traced[first:last]))
+
+class Disassembler:
+    """Lazy disassembler on top of an opcode-table CPU.
+
+    The first query traces the code from the entry vectors (recursive descent: jumps, branches and
+    calls are followed). Every decoded instruction is kept in an InstructionIndex; ranges that were
+    not reached are decoded by linear sweep when they are queried and cached as well. With
+    `recursive=False` only the linear sweep is used.
+    """
+
+    def __init__(self, rom, cpu_class, recursive=True):
+        self.rom = rom
+        self.cpu = cpu_class(rom)
+        self.index = InstructionIndex()
+        self.recursive = recursive
+        self.traced_count = None
+
+    def trace(self, entry_points=None):
+        """Follows the code from the entry points and returns the number of newly decoded instructions."""
+        pending = list(self.cpu.entry_points() if entry_points is None else entry_points)
+        decoded = {}
+        with profile_stage("disasm"):
+            while pending:
+                offset = pending.pop()
+                while 0 <= offset < self.rom.size and offset not in decoded and self.index.find(offset) is None:
+                    length, flow, target = self.cpu.decode(offset)
+                    decoded[offset] = length
+                    if target is not None:
+                        pending.append(target)
+                    if flow == FLOW_JUMP or flow == FLOW_END:
+                        break
+                    offset += length
+            self.index.merge(decoded, traced=True)
+        self.traced_count = (self.traced_count or 0) + len(decoded)
+        return len(decoded)
+
+    def instructions(self, start, end):
+        """(offset, length, traced) of the instructions in [start, end); gaps are swept and cached."""
+        if self.recursive and self.traced_count is None:
+            self.trace()
+        start = max(0, start)
+        end = min(end, self.rom.size)
+        position = self.index.find(start)
+        if position is not None:
+            start = self.index.offsets[position]
+        offset = start
+        decoded = {}
+        while offset < end:
+            position = self.index.find(offset)
+            if position is not None and self.index.offsets[position] == offset:
+                offset += self.index.lengths[position]
+                continue
+            length = self.cpu.decode(offset)[0]
+            decoded[offset] = length
+            offset += length
+        self.index.merge(decoded, traced=False)
+        return self.index.between(start, end)
+
+    def listing(self, start, count=DISASM_LISTING):
+        """The first `count` instructions from `start`."""
+        return self.instructions(start, start + count * self.cpu.max_length)[:count]
+
+    def describe(self, start, end):
+        """Instructions in [start, end) as one line, e.g. "NOP; JP $0150"."""
+        return "; ".join(self.cpu.format(offset) for offset, length, traced in self.instructions(start, end))
+
+    def format_line(self, offset, length):
+        operand_bytes = bytes(self.rom.view[offset:offset + length]).hex(" ").upper()
+        return f"0x{offset:08X}  {self.cpu.address(offset)}  {operand_bytes:<8}  {self.cpu.format(offset)}"
+
+def print_disassembly(disassembler, entries, target_console=None):
+    """Prints a listing; instructions that were only reached by linear sweep (possibly data) are dimmed."""
+    from rich.text import Text
+    target_console = target_console or console
+    for offset, length, traced in entries:
+        line = Text(disassembler.format_line(offset, length))
+        line.stylize("bold yellow", 0, 10)
+        if not traced:
+            line.stylize("dim", 10)
+        target_console.print(line)
+
+def signed_byte(value):
+    return value - 256 if value & 0x80 else value
+
+def default_ngram_index_dir():
+    """Location of the n-gram index (can be overridden with ROM_PARSER_NGRAM_INDEX)."""
+    return os.environ.get("ROM_PARSER_NGRAM_INDEX") or os.path.join(user_cache_dir(), "ngram_index")
+
+def _ngram_hashes(data, signature_bits):
+    """Hashes of all 4-byte n-grams of `data` to bit positions below `signature_bits` (Fibonacci hashing)."""
+    values = np.frombuffer(data, dtype=np.uint8).astype(np.uint32)
+    if len(values) < 4:
+        return np.empty(0, dtype=np.uint32)
+    grams = values[:-3] | values[1:-2] << 8 | values[2:-1] << 16 | values[3:] << 24
+    hash_bits = signature_bits.bit_length() - 1
+    return (grams * np.uint32(0x9E3779B1)) >> np.uint32(32 - hash_bits)
+
+def index_signature_bits(block_size, false_positives=INDEX_FALSE_POSITIVES):
+    """Signature bits per block for blocks of `block_size` Bytes: the power of two nearest to the size
+    at which a query of INDEX_TARGET_GRAMS n-grams hits `false_positives` of the blocks without a match.
+
+    The n-grams of a block of random data set a share 1 - exp(-n-grams / bits) of its signature bits;
+    ROMs repeat many n-grams (padding, tables), fill fewer bits and give fewer false candidates. The
+    index takes bits / 8 Bytes per block, bits / (8 * block_size) of the library size: with the
+    defaults 2^16 bits per 64 KB block, an eighth.
+    """
+    if not 0 < false_positives < 1:
+        raise ValueError("The false-positive rate must be between 0 and 1.")
+    bit_share = false_positives ** (1 / INDEX_TARGET_GRAMS)
+    bits = -(block_size + INDEX_OVERLAP) / math.log1p(-bit_share)
+    return min(1 << 30, max(256, 1 << round(math.log2(bits))))
+
+class NgramIndex:
+    """On-disk n-gram index over a ROM library for fast byte-pattern search.
+
+    Every file is split into blocks of `block_size` Bytes. The 4-byte n-grams starting in a block (and
+    in the first INDEX_OVERLAP Bytes of the next one) are hashed into a signature of `signature_bits` bits
+    (index_signature_bits of the block size unless given). The signatures are stored bit-sliced
+    (signatures.npy, one row per bit position with one bit per block), so a query only reads the rows
+    of its own n-grams. Blocks whose signature contains all of them are candidates, and only those
+    are verified with mmap. files.json lists the indexed files with their block ranges.
+    """
+
+    def __init__(self, index_dir=None):
+        if np is None:
+            raise RuntimeError("The n-gram index needs NumPy (pip install numpy).")
+        self.index_dir = index_dir or default_ngram_index_dir()
+        self.files_path = os.path.join(self.index_dir, "files.json")
+        self.signatures_path = os.path.join(self.index_dir, "signatures.npy")
+        self.meta = None
+        self.signatures = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.signatures = None
+
+    def load(self):
+        if self.meta is None:
+            if not os.path.exists(self.files_path):
+                raise FileNotFoundError(f"No n-gram index in {self.index_dir} (run 'index build' first).")
+            with open(self.files_path, "r", encoding="utf-8") as files_file:
+                self.meta = json.load(files_file)
+            self.signatures = np.load(self.signatures_path, mmap_mode="r")
+        return self.meta
+
+    def build(self, paths, block_size=INDEX_BLOCK, signature_bits=None):
+        """Indexes all ROM files found in `paths`, replacing the previous index. Returns the file list."""
+        if signature_bits is None:
+            signature_bits = index_signature_bits(block_size)
+        if signature_bits & (signature_bits - 1) or not 256 <= signature_bits <= 1 << 30:
+            raise ValueError("The signature size must be a power of two between 256 and 2^30 bits.")
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.close()
+        files = []
+        block_count = 0
+        for file_path in find_rom_files(paths):
+            size = rom_size(file_path)
+            blocks = -(-size // block_size)
+            files.append({"path": os.path.abspath(file_path), "size": size, "mtime": rom_stat(file_path).st_mtime,
+                          "first_block": block_count, "blocks": blocks})
+            block_count += blocks
+
+        temporary_path = self.signatures_path + ".tmp"
+        signatures = np.lib.format.open_memmap(temporary_path, mode="w+", dtype=np.uint8,
+                                               shape=(signature_bits, max(1, -(-block_count // 8))))
+        batch = np.zeros((signature_bits, INDEX_BATCH_COLUMNS), dtype=np.uint8)
+        batch_start = 0  # first signature column held by `batch`
+        total_bytes = sum(record["size"] for record in files)
+        with profile_stage("index", total_bytes):
+            for record in files:
+                with RomImage(record["path"]) as rom:
+                    block = record["first_block"]
+                    # Overlapping blocks: a match starting in this block is found by its first n-grams
+                    for start, window in rom.iter_windows(block_size, INDEX_OVERLAP + 3):
+                        column = block // 8 - batch_start
+                        if column >= INDEX_BATCH_COLUMNS:
+                            signatures[:, batch_start:batch_start + INDEX_BATCH_COLUMNS] = batch
+                            batch[:] = 0
+                            batch_start += INDEX_BATCH_COLUMNS
+                            column -= INDEX_BATCH_COLUMNS
+                        hashes = _ngram_hashes(window, signature_bits)
+                        batch[hashes, column] |= np.uint8(1 << (block % 8))
+                        block += 1
+            end = min(batch_start + INDEX_BATCH_COLUMNS, signatures.shape[1])
+            signatures[:, batch_start:end] = batch[:, :end - batch_start]
+            signatures.flush()
+        del signatures
+        os.replace(temporary_path, self.signatures_path)
+
+        self.meta = {"version": 1, "block_size": block_size, "overlap": INDEX_OVERLAP, "signature_bits": signature_bits,
+                     "blocks": block_count, "files": files}
+        with open(self.files_path, "w", encoding="utf-8") as files_file:
+            json.dump(self.meta, files_file)
+        self.signatures = np.load(self.signatures_path, mmap_mode="r")
+        return files
+
+    def candidates(self, pattern):
+        """Global block numbers in which `pattern` may start."""
+        meta = self.load()
+        block_count = meta["blocks"]
+        hashes = np.unique(_ngram_hashes(pattern[:INDEX_OVERLAP + 4], meta["signature_bits"]))
+        if not len(hashes) or not block_count:
+            return np.arange(block_count)  # Patterns shorter than 4 Bytes: every block
+        if len(hashes) > INDEX_QUERY_GRAMS:
+            hashes = hashes[np.linspace(0, len(hashes) - 1, INDEX_QUERY_GRAMS).astype(np.intp)]
+        rows = np.bitwise_and.reduce(self.signatures[hashes], axis=0)
+        return np.flatnonzero(np.unpackbits(rows, bitorder="little")[:block_count])
+
+    def search(self, pattern):
+        """Returns (matches, candidate blocks, changed files); matches are (path, offset, data) verified with mmap."""
+        meta = self.load()
+        block_size = meta["block_size"]
+        files = meta["files"]
+        first_blocks = np.array([record["first_block"] for record in files], dtype=np.int64)
+        with profile_stage("search"):
+            candidates = self.candidates(pattern)
+            matches = []
+            changed = []
+            owners = np.searchsorted(first_blocks, candidates, side="right") - 1
+            for file_number in np.unique(owners):
+                record = files[file_number]
+                try:
+                    unchanged = rom_stat(record["path"]).st_mtime == record["mtime"] and rom_size(record["path"]) == record["size"]
+                except (OSError, KeyError):
+                    unchanged = False
+                if not unchanged:
+                    changed.append(record["path"])
+                    continue
+                with RomImage(record["path"]) as rom:
+                    for block in candidates[owners == file_number]:
+                        start = (int(block) - record["first_block"]) * block_size
+                        end = min(start + block_size, rom.size)
+                        offset = rom.find(pattern, start, min(rom.size, end + len(pattern) - 1))
+                        while 0 <= offset < end:
+                            matches.append((record["path"], offset, rom.read(offset, SCAN_CONTEXT)))
+                            offset = rom.find(pattern, offset + 1, min(rom.size, end + len(pattern) - 1))
+        return matches, len(candidates), changed
+
+def print_index_search(index, patterns):
+    """Searches the library index for every pattern and prints the verified matches."""
+    meta = index.load()
+    for pattern in patterns:
+        started = time.perf_counter()
+        matches, candidate_count, changed = index.search(pattern)
+        elapsed = time.perf_counter() - started
+        console.print(f"\n[bold cyan]=== {pattern.hex(' ').upper()} ({pattern.decode('latin-1')!r}) ===[/bold cyan]")
+        for path, offset, data in matches:
+            console.print(f"[bold yellow]{path}[/bold yellow] 0x{offset:08X} [bold yellow]Data (Hex):[/bold yellow] {data.hex().upper()}...")
+        console.print(f"[bold green]Search completed:[/bold green] {len(matches)} matches, {candidate_count} of {meta['blocks']} blocks verified in {elapsed * 1000:.1f} ms.")
+        for path in changed:
+            console.print(f"[bold red]Changed since indexing (skipped):[/bold red] {path}")
+
+@dataclass(slots=True)
+class PoolEntry:
+    """An open ROM of the RomPool with the results computed for it so far."""
+    rom: RomImage
+    key: tuple
+    last_used: float
+    users: int = 0
+    retired: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    results: dict = field(default_factory=dict)
+
+class RomPool:
+    """Bounded LRU of open RomImages for the HTTP service.
+
+    ROMs stay mapped between requests, together with their header and hashes, so
+    repeated requests neither reopen the file nor parse it again. An entry is reopened
+    when the file changes on disk, the least recently used one is closed when the pool
+    is full and `evict_idle` closes ROMs that were not used for `idle_seconds`. A ROM
+    that a request is still using is only closed when that request is done.
+    """
+
+    def __init__(self, max_roms=SERVE_OPEN_ROMS, idle_seconds=SERVE_IDLE_SECONDS):
+        self.max_roms = max_roms
+        self.idle_seconds = idle_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()  # Requests are served by several threads
+
+    @contextlib.contextmanager
+    def open(self, file_path):
+        """Yields the pool entry of `file_path`, opening or reopening the ROM as needed."""
+        entry = self._acquire(file_path)
+        try:
+            yield entry
+        finally:
+            with self._lock:
+                entry.users -= 1
+                entry.last_used = time.monotonic()
+                if entry.retired and not entry.users:
+                    entry.rom.close()
+
+    def _acquire(self, file_path):
+        key = rom_identity(file_path)
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is not None and entry.key == key:
+                self._entries.move_to_end(file_path)
+                entry.users += 1
+                self.hits += 1
+                return entry
+        rom = RomImage(file_path)  # Outside the lock: decompressing an archive takes a while
+        with self._lock:
+            old_entry = self._entries.pop(file_path, None)
+            if old_entry is not None:
+                self._retire(old_entry)
+            entry = PoolEntry(rom, key, time.monotonic(), users=1)
+            self._entries[file_path] = entry
+            self.misses += 1
+            while len(self._entries) > self.max_roms:
+                self._retire(self._entries.popitem(last=False)[1])
+        return entry
+
+    def _retire(self, entry):
+        entry.retired = True
+        if not entry.users:
+            entry.rom.close()
+
+    def evict_idle(self):
+        """Closes the ROMs that were not used for `idle_seconds`; returns how many."""
+        deadline = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [path for path, entry in self._entries.items() if not entry.users and entry.last_used < deadline]
+            for path in idle:
+                self._retire(self._entries.pop(path))
+        return len(idle)
+
+    def stats(self):
+        with self._lock:
+            return {"open": list(self._entries), "max_roms": self.max_roms, "idle_seconds": self.idle_seconds,
+                    "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            while self._entries:
+                self._retire(self._entries.popitem()[1])
+
+def resolve_served_path(root, path):
+    """Maps the `path` parameter to a ROM file (or zip entry) below the served directory."""
+    container, entry = split_archive_path(path)
+    full_path = os.path.realpath(os.path.join(root, container))
+    if os.path.commonpath([root, full_path]) != root:
+        raise PermissionError(f"{path} is outside the served directory.")
+    if not os.path.isfile(full_path):
+        raise FileNotFoundError(f"{path} not found.")
+    return full_path if entry is None else f"{full_path}{ARCHIVE_SEPARATOR}{entry}"
+
+def _query_value(query, name, default=None):
+    values = query.get(name)
+    if not values:
+        if default is None:
+            raise ValueError(f"Missing parameter: {name}")
+        return default
+    return values[-1]
+
+def _pool_header(entry):
+    """(format, header object) of a pooled ROM, parsed once per entry (call with entry.lock held)."""
+    if "header" not in entry.results:
+        extension = rom_extension(entry.rom.path)
+        if extension not in ROM_INSPECTORS:
+            raise ValueError(f"{entry.rom.path} has an unknown extension.")
+        rom_format, inspector = ROM_INSPECTORS[extension]
+        header = inspector(entry.rom)
+        checksums = checksum_records(ROM_CHECKSUMS[extension](entry.rom))
+        entry.results["header"] = (rom_format, header, checksums)
+    return entry.results["header"]
+
+def serve_header(entry, query):
+    with entry.lock:
+        rom_format, header, checksums = _pool_header(entry)
+    return {"path": query["path"][-1], "format": rom_format, "size": entry.rom.size,
+            "header": header_record(header), "checksums": checksums}
+
+def serve_hash(entry, query):
+    with entry.lock:
+        if "hashes" not in entry.results:
+            header = _pool_header(entry)[1]
+            entry.results["hashes"] = compute_hashes(entry.rom, getattr(header, "header_size", 0))
+        return {"path": query["path"][-1], "hashes": entry.results["hashes"]}
+
+def serve_scan(entry, query):
+    patterns = parse_patterns(query.get("pattern"), query.get("hex"))
+    scanner = PatternScanner(patterns)
+    matches = list(scanner.matches(entry.rom))
+    return {"path": query["path"][-1], "patterns": [pattern.hex().upper() for pattern in scanner.patterns],
+            "matches": match_records(matches)}
+
+def serve_range(entry, query):
+    """Bytes of the ROM as raw data (default) or as the hex dump lines of the viewer (format=hex)."""
+    offset = int(_query_value(query, "offset", "0"), 0)
+    length = int(_query_value(query, "length", str(HEX_LINE_BYTES * VIEW_PAGE_LINES)), 0)
+    if not 0 <= offset < entry.rom.size:
+        raise ValueError(f"Offset 0x{offset:X} is outside the ROM (0x{entry.rom.size:X} Bytes).")
+    if not 0 < length <= SERVE_MAX_RANGE:
+        raise ValueError(f"Length must be between 1 and {SERVE_MAX_RANGE}.")
+    if isinstance(entry.rom, CompressedRomImage):
+        with entry.lock:  # Reads of a compressed ROM grow its decompressed prefix
+            data = bytes(entry.rom.slice(offset, length))
+    else:
+        data = bytes(entry.rom.slice(offset, length))
+    output_format = _query_value(query, "format", "raw")
+    if output_format == "hex":
+        return "text/plain; charset=ascii", format_hex_dump(data, offset).encode("ascii")
+    if output_format != "raw":
+        raise ValueError(f"Unknown range format {output_format!r} (raw or hex).")
+    return "application/octet-stream", data
+
+# Endpoints of the HTTP service; each gets the pool entry of the ROM named by "path"
+SERVE_ENDPOINTS = {
+    "/header": serve_header,
+    "/hash": serve_hash,
+    "/scan": serve_scan,
+    "/range": serve_range,
+}
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 500: "Internal Server Error"}
+
+def handle_request(pool, root, target):
+    """Answers one GET request; returns (status, content type, body). Runs in a worker thread."""
+    url = urllib.parse.urlsplit(target)
+    query = urllib.parse.parse_qs(url.query)
+    try:
+        if url.path == "/stats":
+            result = pool.stats()
+        elif url.path in SERVE_ENDPOINTS:
+            file_path = resolve_served_path(root, _query_value(query, "path"))
+            with pool.open(file_path) as entry:
+                result = SERVE_ENDPOINTS[url.path](entry, query)
+        else:
+            return 404, "application/json", json.dumps({"error": f"Unknown endpoint {url.path}"}).encode()
+    except PermissionError as e:
+        return 403, "application/json", json.dumps({"error": str(e)}).encode()
+    except FileNotFoundError as e:
+        return 404, "application/json", json.dumps({"error": str(e)}).encode()
+    except (ValueError, KeyError, zipfile.BadZipFile, struct.error) as e:
+        return 400, "application/json", json.dumps({"error": str(e)}).encode()
+    except Exception as e:
+        return 500, "application/json", json.dumps({"error": f"{type(e).__name__}: {e}"}).encode()
+    if isinstance(result, tuple):
+        return (200, *result)
+    return 200, "application/json", json.dumps(result).encode()
+
+async def _serve_connection(pool, root, executor, reader, writer):
+    """HTTP/1.1 with keep-alive: requests of one connection are answered in order."""
+    import asyncio  # Only the server needs it; it takes a good part of the start-up time
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError:
+                break  # Client closed the connection
+            except asyncio.LimitOverrunError:
+                status, content_type, body, keep_alive = 413, "application/json", b'{"error": "Request too large"}', False
+            else:
+                lines = head.decode("latin-1").split("\r\n")
+                request = lines[0].split(" ")
+                headers = dict((name.strip().lower(), value.strip()) for name, _, value in
+                               (line.partition(":") for line in lines[1:] if line))
+                keep_alive = len(request) == 3 and request[2] == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                if len(request) != 3:
+                    status, content_type, body, keep_alive = 400, "application/json", b'{"error": "Malformed request"}', False
+                elif request[0] != "GET":
+                    status, content_type, body = 405, "application/json", b'{"error": "Only GET is supported"}'
+                else:
+                    status, content_type, body = await loop.run_in_executor(executor, handle_request, pool, root, request[1])
+                if int(headers.get("content-length", 0) or 0):
+                    keep_alive = False  # GET bodies are not read; the connection cannot be reused
+            writer.write(f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1"))
+            writer.write(body)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def _evict_idle_roms(pool):
+    import asyncio
+    while True:
+        await asyncio.sleep(max(1, min(pool.idle_seconds / 2, 30)))
+        pool.evict_idle()
+
+async def serve_roms(root, host="127.0.0.1", port=SERVE_PORT, max_roms=SERVE_OPEN_ROMS, idle_seconds=SERVE_IDLE_SECONDS, workers=None):
+    """Serves the ROMs below `root` over HTTP until cancelled.
+
+    Endpoints (all GET, "path" relative to `root`, zip entries as "library.zip::game.gb"):
+    /header?path=  /hash?path=  /scan?path=&pattern=SAVE&hex=C35001  /range?path=&offset=0x100&length=256[&format=hex]  /stats
+    """
+    import asyncio
+    root = os.path.realpath(root)
+    pool = RomPool(max_roms, idle_seconds)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        server = await asyncio.start_server(lambda reader, writer: _serve_connection(pool, root, executor, reader, writer),
+                                            host, port, limit=SERVE_MAX_REQUEST)
+        evictor = asyncio.create_task(_evict_idle_roms(pool))
+        try:
+            async with server:
+                console.print(f"[bold green]Serving ROMs from {root} on http://{host}:{port}[/bold green] "
+                              f"({max_roms} open ROMs, closed after {idle_seconds} s idle)")
+                await server.serve_forever()
+        finally:
+            evictor.cancel()
+            pool.close()
+
+def _time_stage(function, repeat):
+    """Runs `function` `repeat` times; returns (best, mean) wall time in seconds."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return min(times), sum(times) / len(times)
+
+def benchmark_rom(file_path, repeat=3):
+    """Times every stage of reading, browsing and exporting one ROM; returns {stage: timings}."""
+    extension = rom_extension(file_path)
+    rom_format, inspector = ROM_INSPECTORS[extension]
+    stages = {}
+
+    def record(stage, function, data_bytes=0, calls=1):
+        best, mean = _time_stage(function, repeat)
+        stages[stage] = {"best": round(best, 6), "mean": round(mean, 6)}
+        if calls > 1:
+            stages[stage]["per_call_us"] = round(best / calls * 1e6, 3)
+        if data_bytes and best:
+            stages[stage]["mb_per_s"] = round(data_bytes / (1024 * 1024) / best, 1)
+
+    if isinstance(np, LazyModule):
+        np._import()  # Not part of the first timed run of a stage
+    quiet = console.quiet
+    console.quiet = True
+    try:
+        with RomImage(file_path) as rom:
+            header = inspector(rom)
+            rng = random.Random(0)
+            addresses = [rng.randrange(rom.size) for _ in range(BENCH_LOOKUPS)]
+            page_count = HexPager(rom).page_count
+            pages = [rng.randrange(page_count) for _ in range(BENCH_PAGES)]
+
+            def browse():
+                pager = HexPager(rom)
+                for index in pages:
+                    pager.render(index)
+
+            record("inspect", lambda: [inspector(rom) for _ in range(1000)], calls=1000)
+            record("checksums", lambda: ROM_CHECKSUMS[extension](rom), checksum_bytes(rom, extension))
+            record("hashes", lambda: compute_hashes(rom, getattr(header, "header_size", 0)), rom.size)
+            record("scan", lambda: list(PatternScanner(DEFAULT_PATTERNS).scan(rom)), rom.size)
+            record("display_first_page", lambda: HexPager(rom).render(0))
+            record("display_pages", browse, calls=BENCH_PAGES)
+            record("address_lookup", lambda: [format_hex_line(rom.read(address, 16), address) for address in addresses],
+                   calls=BENCH_LOOKUPS)
+            for export_format in EXPORT_FORMATS:
+                record(f"export_{export_format}", lambda: export_rom(rom, export_format, os.devnull), rom.size)
+            size = rom.size
+        record("read", lambda: ROM_READERS[extension](file_path, DEFAULT_PATTERNS, interactive=False), size)
+    finally:
+        console.quiet = quiet
+    return stages
+
+def run_benchmarks(output_path="bench.json", repeat=3, max_size=None, compare_path=None):
+    """Benchmarks all BENCH_ROMS (synthetic images in a temporary directory) and saves the timings as JSON."""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="rom_bench_") as directory:
+        for rom_format, extension, size in BENCH_ROMS:
+            if max_size and size > max_size:
+                continue
+            file_path = os.path.join(directory, f"{rom_format}_{size // 1024}k{extension}")
+            FAMILY["make_synthetic_rom"](file_path, rom_format, size)
+            console.print(f"\n[bold cyan]=== Benchmark: {os.path.basename(file_path)} ({size} Bytes) ===[/bold cyan]")
+            stages = benchmark_rom(file_path, repeat)
+            for stage, timing in stages.items():
+                rate = f" ({timing['mb_per_s']} MB/s)" if "mb_per_s" in timing else ""
+                console.print(f"[bold yellow]{stage}:[/bold yellow] {timing['best'] * 1000:.3f} ms{rate}")
+            results.append({"rom": os.path.basename(file_path), "format": rom_format, "size": size, "stages": stages})
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np is not None,
+        "repeat": repeat,
+        "results": results,
+    }
+    with open(output_path, "w", encoding="utf-8") as output:
+        json.dump(report, output, indent=2)
+    console.print(f"\n[bold green]Benchmark results saved: {output_path}[/bold green]")
+    if compare_path:
+        compare_benchmarks(compare_path, report)
+    return report
+
+def compare_benchmarks(baseline_path, report):
+    """Prints the change of every stage against an earlier benchmark JSON file (slower than 10 % in red)."""
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = {(entry["rom"], stage): timing["best"]
+                    for entry in json.load(baseline_file)["results"] for stage, timing in entry["stages"].items()}
+    console.print(f"\n[bold cyan]=== Compared with {baseline_path} ===[/bold cyan]")
+    for entry in report["results"]:
+        for stage, timing in entry["stages"].items():
+            before = baseline.get((entry["rom"], stage))
+            if not before:
+                continue
+            ratio = timing["best"] / before
+            style = "bold red" if ratio > 1.1 else "bold green"
+            console.print(f"{entry['rom']} {stage}: [{style}]{ratio:.2f}x[/{style}] ({before * 1000:.3f} ms -> {timing['best'] * 1000:.3f} ms)")
+
+def add_cache_arguments(parser):
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the result cache")
+    parser.add_argument("--cache-file", help=f"Result cache database (default: {default_cache_path()})")
+    parser.add_argument("--cache-size", type=int, default=CACHE_MAX_BYTES // (1024 * 1024), metavar="MB", help="Size limit of the result cache")
+    parser.add_argument("--hash-fallback", action="store_true", help="Recognise moved or touched ROMs by their SHA-1")
+
+def open_cache(args):
+    if getattr(args, "no_cache", False):
+        return None
+    return ResultCache(args.cache_file, getattr(args, "cache_size", CACHE_MAX_BYTES // (1024 * 1024)) * 1024 * 1024,
+                       getattr(args, "hash_fallback", False))
+
+def add_pattern_arguments(parser):
+    parser.add_argument("--pattern", action="append", metavar="TEXT", help="Search pattern as text (repeatable, default: SAVE and GAME)")
+    parser.add_argument("--hex-pattern", action="append", metavar="HEX", help="Search pattern as hex bytes, e.g. 'A9 00 8D' (repeatable)")
+
+def add_profile_arguments(parser):
+    parser.add_argument("--profile", action="store_true", help="Print time, Bytes, MB/s and peak memory of every stage")
+    parser.add_argument("--profile-output", metavar="JSON", help="Also write the stage profile as JSON (implies --profile)")
+    parser.add_argument("--cprofile", metavar="FILE", help="Also write a cProfile dump (implies --profile)")
+
+def open_profiler(args, target_console=None):
+    if not (args.profile or args.profile_output or args.cprofile):
+        return contextlib.nullcontext()
+    return StageProfiler(args.profile_output, args.cprofile, target_console)
+
+def open_rom_or_exit(file_path, status_console=None):
+    """RomImage for the commands on single ROMs; a missing or unreadable file ends the command with one line."""
+    status_console = status_console or console
+    try:
+        return RomImage(file_path)
+    except FileNotFoundError:
+        status_console.print(f"[bold red]The specified file was not found:[/bold red] {file_path}")
+    except (OSError, KeyError, zipfile.BadZipFile) as e:
+        status_console.print(f"[bold red]Error opening {file_path}:[/bold red] {e}")
+    sys.exit(1)
+
+def build_parser():
+    """Command line of the family scripts; returns the parser and its subcommands.
+
+    The top-level read_rom.py builds it before a family script is loaded (to skip option
+    values when sniffing), so the family texts are optional here.
+    """
+    parser = argparse.ArgumentParser(description=FAMILY.get("description"), epilog=ARCHIVE_MEMORY_HELP)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    read_parser = subparsers.add_parser("read", help="Inspect a single ROM interactively (default command)", epilog=ARCHIVE_MEMORY_HELP)
+    read_parser.add_argument("rom_path", type=str, help=FAMILY.get("rom_help"))
+    add_pattern_arguments(read_parser)
+    add_cache_arguments(read_parser)
+    add_profile_arguments(read_parser)
+
+    batch_parser = subparsers.add_parser("batch", help="Catalogue many ROMs non-interactively as JSON Lines")
+    batch_parser.add_argument("paths", nargs="+", help="ROM files, directories or glob patterns")
+    batch_parser.add_argument("-j", "--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    batch_parser.add_argument("-o", "--output", help="Write the JSON Lines to this file instead of stdout")
+    add_pattern_arguments(batch_parser)
+    add_cache_arguments(batch_parser)
+    batch_parser.add_argument("--incremental", action="store_true", help="Only parse new and changed ROMs, keep a journal of the library")
+    batch_parser.add_argument("--journal", help=f"Library journal database for --incremental (default: {default_journal_path()})")
+
+    export_parser = subparsers.add_parser("export", help="Export a ROM as hex dump, Intel HEX, S-record or xxd text")
+    export_parser.add_argument("rom_path", type=str, help="Path to the ROM file")
+    export_parser.add_argument("-f", "--format", choices=list(EXPORT_FORMATS), default="dump", help="Output format (default: dump)")
+    export_parser.add_argument("-o", "--output", help="Output file, '-' for stdout (default: next to the ROM)")
+    add_profile_arguments(export_parser)
+
+    bench_parser = subparsers.add_parser("bench", help="Benchmark all stages on synthetic ROMs and save the timings as JSON")
+    bench_parser.add_argument("-o", "--output", default="bench.json", help="JSON result file (default: bench.json)")
+    bench_parser.add_argument("-n", "--repeat", type=int, default=3, help="Runs per stage; the best one is reported (default: 3)")
+    bench_parser.add_argument("--max-size", type=int, metavar="MB", help="Skip synthetic ROMs larger than this")
+    bench_parser.add_argument("--compare", metavar="JSON", help="Compare with an earlier result file")
+
+    diff_parser = subparsers.add_parser("diff", help="Compare two ROMs and optionally create an IPS or BPS patch")
+    diff_parser.add_argument("rom_a", help="Original ROM")
+    diff_parser.add_argument("rom_b", help="Modified ROM")
+    diff_parser.add_argument("--ips", metavar="FILE", help="Write an IPS patch from A to B")
+    diff_parser.add_argument("--bps", metavar="FILE", help="Write a BPS patch from A to B")
+    diff_parser.add_argument("--all", action="store_true", help=f"List every changed range (default: first {DIFF_SHOWN_RANGES})")
+
+    patch_parser = subparsers.add_parser("patch", help="Apply an IPS, BPS or UPS patch to a ROM", epilog=ARCHIVE_MEMORY_HELP)
+    patch_parser.add_argument("rom_path", type=str, help="Path to the unpatched ROM")
+    patch_parser.add_argument("patch_path", type=str, help="IPS, BPS or UPS patch file")
+    patch_parser.add_argument("-o", "--output", help="Patched ROM (default: <rom>_patched<ext>)")
+    patch_parser.add_argument("--inspect", action="store_true", help="Read the patched ROM afterwards like the read command")
+    add_pattern_arguments(patch_parser)
+    add_cache_arguments(patch_parser)
+    add_profile_arguments(patch_parser)
+
+    regions_parser = subparsers.add_parser("regions", help="Show an entropy-based map of code, data, text, compressed data and padding")
+    regions_parser.add_argument("rom_path", type=str, help="Path to the ROM file")
+    regions_parser.add_argument("--block-size", type=int, help="Bytes per block (default: 4096, more for large ROMs)")
+    regions_parser.add_argument("--json", action="store_true", help="Print the classified ranges as JSON instead of the map")
+    add_profile_arguments(regions_parser)
+
+    text_parser = subparsers.add_parser("text", help="Extract strings with a character table (.tbl) as CSV or JSON")
+    text_parser.add_argument("paths", nargs="+", help="ROM files, directories or glob patterns")
+    text_parser.add_argument("-t", "--table", help="Character table (.tbl); default: printable ASCII")
+    text_parser.add_argument("--min-length", type=int, default=TEXT_MIN_LENGTH, help=f"Minimum characters per string (default: {TEXT_MIN_LENGTH})")
+    text_parser.add_argument("-f", "--format", choices=["csv", "json"], default="csv", help="Output format (default: csv)")
+    text_parser.add_argument("-o", "--output", help="Write to this file instead of stdout")
+    add_profile_arguments(text_parser)
+
+    tiles_parser = subparsers.add_parser("tiles", help="Decode tile graphics into a PNG tile sheet", epilog=ARCHIVE_MEMORY_HELP)
+    tiles_parser.add_argument("rom_path", type=str, help="Path to the ROM file")
+    tiles_parser.add_argument("-f", "--format", choices=list(TILE_FORMATS), default=FAMILY.get("default_tile_format"), help=f"Tile format (default: {FAMILY.get('default_tile_format')})")
+    tiles_parser.add_argument("--offset", type=lambda value: int(value, 0), help="Start of the tile data, e.g. 0x8000")
+    tiles_parser.add_argument("--length", type=lambda value: int(value, 0), help="Bytes to decode")
+    tiles_parser.add_argument("--columns", type=int, default=TILE_SHEET_COLUMNS, help=f"Tiles per row (default: {TILE_SHEET_COLUMNS})")
+    tiles_parser.add_argument("-o", "--output", help="PNG file (default: <rom>_tiles.png)")
+    tiles_parser.add_argument("--raw", metavar="NPY", help="Also save the decoded tiles as NumPy array (tiles x 8 x 8)")
+    add_profile_arguments(tiles_parser)
+
+    disasm_parser = subparsers.add_parser("disasm", help=FAMILY.get("disasm_help"), epilog=ARCHIVE_MEMORY_HELP)
+    disasm_parser.add_argument("rom_path", type=str, help="Path to the ROM file")
+    disasm_parser.add_argument("--start", type=lambda value: int(value, 0), help="ROM offset to start at (default: entry point)")
+    disasm_parser.add_argument("-n", "--count", type=int, default=DISASM_LISTING, help=f"Instructions to list (default: {DISASM_LISTING})")
+    disasm_parser.add_argument("--linear", action="store_true", help="Linear sweep only, do not trace the code from the entry vectors")
+    add_profile_arguments(disasm_parser)
+
+    index_parser = subparsers.add_parser("index", help="Build or search an n-gram index over a ROM library")
+    index_parser.add_argument("action", choices=["build", "search", "info"])
+    index_parser.add_argument("paths", nargs="*", help="ROM files, directories or glob patterns to index")
+    add_pattern_arguments(index_parser)
+    index_parser.add_argument("--index-dir", help=f"Index directory (default: {default_ngram_index_dir()})")
+    index_parser.add_argument("--block-size", type=int, default=INDEX_BLOCK, help=f"Bytes per indexed block (default: {INDEX_BLOCK})")
+    index_parser.add_argument("--signature-bits", type=int, help="Signature bits per block, a power of two; the index takes bits / 8 Bytes per block "
+                              f"(default: sized from --block-size and --false-positives, {index_signature_bits(INDEX_BLOCK)} for {INDEX_BLOCK} Byte blocks, an eighth of the library)")
+    index_parser.add_argument("--false-positives", type=float, default=INDEX_FALSE_POSITIVES, metavar="RATE",
+                              help=f"Share of blocks an 8-byte pattern may falsely name as candidates when sizing the signatures (default: {INDEX_FALSE_POSITIVES})")
+    add_profile_arguments(index_parser)
+
+    fingerprint_parser = subparsers.add_parser("fingerprint", help="Find known code by byte signatures with wildcards, e.g. 'A9 ?? 8D 00 20'")
+    fingerprint_parser.add_argument("paths", nargs="+", help="ROM files, directories or glob patterns")
+    fingerprint_parser.add_argument("-d", "--database", action="append", metavar="FILE", help="Signature database, one 'name: A9 ?? 8D 00 20' per line (repeatable)")
+    fingerprint_parser.add_argument("-s", "--signature", action="append", metavar="'NAME: HEX'", help="Single signature (repeatable)")
+    fingerprint_parser.add_argument("--json", action="store_true", help="Print one JSON record per ROM")
+    add_profile_arguments(fingerprint_parser)
+
+    serve_parser = subparsers.add_parser("serve", help="Serve headers, hashes, searches and byte ranges of ROMs over local HTTP")
+    serve_parser.add_argument("--root", default=".", help="Directory whose ROMs are served (default: current directory)")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=SERVE_PORT, help=f"Port to listen on (default: {SERVE_PORT})")
+    serve_parser.add_argument("--max-roms", type=int, default=SERVE_OPEN_ROMS, help=f"ROMs kept open at most (default: {SERVE_OPEN_ROMS})")
+    serve_parser.add_argument("--idle", type=float, default=SERVE_IDLE_SECONDS, help=f"Seconds after which an unused ROM is closed (default: {SERVE_IDLE_SECONDS})")
+    serve_parser.add_argument("-j", "--workers", type=int, default=None, help="Threads that answer requests (default: chosen by Python)")
+
+    verify_parser = subparsers.add_parser("verify", help="Verify the checksums of ROM files")
+    verify_parser.add_argument("paths", nargs="+", help="ROM files, directories or glob patterns")
+
+    dat_parser = subparsers.add_parser("dat", help="Build or show the DAT index used to identify ROMs")
+    dat_parser.add_argument("action", choices=["build", "info"])
+    dat_parser.add_argument("dat_files", nargs="*", help="No-Intro style XML DAT files to import")
+
+    cache_parser = subparsers.add_parser("cache", help="Show or clear the result cache")
+    cache_parser.add_argument("action", choices=["info", "clear"])
+    cache_parser.add_argument("paths", nargs="*", help="Only clear these ROM files or directories")
+    cache_parser.add_argument("--cache-file", help=f"Result cache database (default: {default_cache_path()})")
+    return parser, subparsers
+
+def value_options():
+    """Option strings of all subcommands that take a value, e.g. -o, --table and --pattern."""
+    _, subparsers = build_parser()
+    return {option for subparser in subparsers.choices.values() for action in subparser._actions
+            if action.nargs != 0 for option in action.option_strings}
+
+def main(argv=None):
+    parser, subparsers = build_parser()
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # "read_rom.py <rom>" keeps working without naming the command
+    if argv and argv[0] not in subparsers.choices and not argv[0].startswith("-"):
+        argv.insert(0, "read")
+    args = parser.parse_args(argv)
+
+    if args.command == "cache":
+        with open_cache(args) as cache:
+            if args.action == "clear":
+                removed = cache.invalidate(args.paths)
+                console.print(f"[bold green]Cache cleared:[/bold green] {removed} entries removed from {cache.db_path}")
+            else:
+                count, stored_bytes = cache.stats()
+                console.print(f"[bold yellow]Cache:[/bold yellow] {cache.db_path} ({count} entries, {stored_bytes} Bytes)")
+        return
+
+    if args.command == "dat":
+        with DatIndex() as index:
+            if args.action == "build":
+                for dat_file in args.dat_files:
+                    dat_name, count = index.add_dat(dat_file)
+                    console.print(f"[bold green]Imported:[/bold green] {dat_name} ({count} ROMs)")
+            for dat_name, count in index.stats():
+                console.print(f"[bold yellow]{dat_name}:[/bold yellow] {count} ROMs")
+            console.print(f"[bold cyan]DAT index:[/bold cyan] {index.db_path}")
+        return
+
+    if args.command == "export":
+        # With stdout as output the status lines go to stderr so they do not mix with the export
+        status_console = Console(stderr=True) if args.output == "-" else console
+        with open_profiler(args, status_console):
+            with profile_stage("open"):
+                rom = open_rom_or_exit(args.rom_path, status_console)
+            with rom:
+                output_path, written, elapsed = export_rom(rom, args.format, args.output)
+                print_export(status_console, rom.size, output_path, written, elapsed)
+        return
+
+    if args.command == "bench":
+        run_benchmarks(args.output, args.repeat, args.max_size and args.max_size * 1024 * 1024, args.compare)
+        return
+
+    if args.command == "diff":
+        with open_rom_or_exit(args.rom_a) as rom_a, open_rom_or_exit(args.rom_b) as rom_b:
+            started = time.perf_counter()
+            ranges = diff_roms(rom_a, rom_b)
+            print_diff(rom_a, rom_b, ranges, time.perf_counter() - started, args.all)
+            for patch_path, make_patch in ((args.ips, make_ips), (args.bps, make_bps)):
+                if not patch_path:
+                    continue
+                try:
+                    patch = make_patch(rom_a, rom_b, ranges)
+                except ValueError as e:
+                    console.print(f"[bold red]Error creating patch:[/bold red] {e}")
+                    continue
+                with open(patch_path, "wb") as patch_file:
+                    patch_file.write(patch)
+                console.print(f"[bold green]Patch created successfully: {patch_path}[/bold green] ({len(patch)} Bytes)")
+        return
+
+    if args.command == "regions":
+        if args.block_size is not None and args.block_size <= 0:
+            parser.error("--block-size must be positive")
+        with open_profiler(args), open_rom_or_exit(args.rom_path) as rom:
+            if args.json:
+                block_size, statistics, classes = region_map(rom, args.block_size)
+                ranges = region_ranges(classes, block_size, rom.size)
+                print(json.dumps([{"start": start, "end": end, "class": region_class} for start, end, region_class in ranges]))
+            else:
+                print_region_map(rom, args.block_size)
+        return
+
+    if args.command == "text":
+        if args.min_length < 1:
+            parser.error("--min-length must be positive")
+        table = TextTable.load(args.table, args.min_length) if args.table else TextTable.ascii(args.min_length)
+        with open_profiler(args, Console(stderr=True)):
+            extract_text(args.paths, table, args.output, args.format)
+        return
+
+    if args.command == "tiles":
+        if np is None:
+            console.print("[bold red]The tile decoder needs NumPy:[/bold red] pip install numpy")
+            sys.exit(1)
+        if args.columns < 1:
+            parser.error("--columns must be positive")
+        with open_profiler(args), open_rom_or_exit(args.rom_path) as rom:
+            offset, length = FAMILY["default_tile_range"](rom, args.format)
+            if args.offset is not None:
+                offset, length = args.offset, rom.size - args.offset
+            if args.length is not None:
+                length = args.length
+            length = max(0, min(length, rom.size - offset))
+            output_path = args.output or plain_rom_path(rom.path) + "_tiles.png"
+            count = export_tiles(rom, args.format, offset, length, output_path, args.columns, args.raw)
+            console.print(f"[bold green]Tile sheet created successfully: {output_path}[/bold green] ({count} tiles from 0x{offset:08X} - 0x{offset + length:08X})")
+        return
+
+    if args.command == "disasm":
+        cpu_class = ROM_DISASSEMBLERS.get(rom_extension(args.rom_path))
+        if cpu_class is None:
+            console.print(f"[bold red]No disassembler for {args.rom_path}[/bold red] (supported: {', '.join(ROM_DISASSEMBLERS)})")
+            sys.exit(1)
+        with open_profiler(args), open_rom_or_exit(args.rom_path) as rom:
+            disassembler = Disassembler(rom, cpu_class, recursive=not args.linear)
+            entry_points = disassembler.cpu.entry_points()
+            start = args.start if args.start is not None else (entry_points[0] if entry_points else 0)
+            entries = disassembler.listing(start, args.count)
+            if disassembler.recursive:
+                console.print(f"[bold cyan]=== {cpu_class.name}: {disassembler.traced_count} instructions traced from {len(entry_points)} entry points ===[/bold cyan]")
+            print_disassembly(disassembler, entries)
+        return
+
+    if args.command == "index":
+        if args.block_size <= 0:
+            parser.error("--block-size must be positive")
+        try:
+            with open_profiler(args), NgramIndex(args.index_dir) as index:
+                if args.action == "build":
+                    started = time.perf_counter()
+                    files = index.build(args.paths, args.block_size, args.signature_bits or index_signature_bits(args.block_size, args.false_positives))
+                    console.print(f"[bold green]Indexed:[/bold green] {len(files)} ROMs, {index.meta['blocks']} blocks in {time.perf_counter() - started:.2f} s")
+                elif args.action == "search":
+                    print_index_search(index, parse_patterns(args.pattern, args.hex_pattern))
+                meta = index.load()
+                index_size = os.path.getsize(index.signatures_path)
+                library_size = sum(record['size'] for record in meta['files'])
+                console.print(f"[bold cyan]N-gram index:[/bold cyan] {index.index_dir} ({len(meta['files'])} ROMs, {library_size} Bytes, "
+                              f"index {index_size} Bytes = {index_size / max(library_size, 1):.1%}, {meta['signature_bits']} signature bits per {meta['block_size']} Byte block)")
+        except (RuntimeError, ValueError, FileNotFoundError) as e:
+            console.print(f"[bold red]{e}[/bold red]")
+            sys.exit(1)
+        return
+
+    if args.command == "fingerprint":
+        try:
+            signatures = [signature for db_path in args.database or [] for signature in load_signatures(db_path)]
+            for text in args.signature or []:
+                name, separator, hex_text = text.partition(":")
+                signatures.append(parse_signature(name.strip(), hex_text) if separator else parse_signature(text.strip(), text))
+        except (OSError, ValueError) as e:
+            console.print(f"[bold red]Error loading signatures:[/bold red] {e}")
+            sys.exit(1)
+        if not signatures:
+            parser.error("no signatures given (use --database or --signature)")
+        with open_profiler(args, Console(stderr=True)):
+            fingerprint_roms(args.paths, signatures, args.json)
+        return
+
+    if args.command == "serve":
+        import asyncio
+        try:
+            asyncio.run(serve_roms(args.root, args.host, args.port, args.max_roms, args.idle, args.workers))
+        except KeyboardInterrupt:
+            console.print("[bold yellow]Server stopped.[/bold yellow]")
+        except OSError as e:
+            console.print(f"[bold red]Could not start the server:[/bold red] {e}")
+            sys.exit(1)
+        return
+
+    if args.command == "verify":
+        sys.exit(0 if verify_roms(args.paths) else 1)
+
+    patterns = parse_patterns(args.pattern, args.hex_pattern)
+    cache = open_cache(args)
+    try:
+        if args.command == "batch" and args.incremental:
+            with LibraryJournal(args.journal) as journal:
+                run_incremental(args.paths, patterns, args.workers, args.output, journal)
+        elif args.command == "batch":
+            run_batch(args.paths, patterns, args.workers, args.output, cache)
+        elif args.command == "patch":
+            root, extension = os.path.splitext(plain_rom_path(args.rom_path))
+            output_path = args.output or f"{root}_patched{extension}"
+            with open_profiler(args):
+                try:
+                    patch_format, size = apply_patch(args.rom_path, args.patch_path, output_path)
+                except (OSError, ValueError) as e:
+                    console.print(f"[bold red]Error applying patch:[/bold red] {e}")
+                    sys.exit(1)
+                console.print(f"[bold green]{patch_format} patch applied successfully: {output_path}[/bold green] ({size} Bytes)")
+                if args.inspect:
+                    check_file_extension(output_path, patterns, cache=cache)
+        else:
+            with open_profiler(args):
+                check_file_extension(args.rom_path, patterns, cache=cache)
+    finally:
+        if cache is not None:
+            cache.close()
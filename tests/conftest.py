@@ -0,0 +1,43 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+# rom_common.py lives in the top directory, next to the two family folders
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def load_family(folder, module_name):
+    """Imports the read_rom.py of a family folder under its own name, so both families fit in one test run."""
+    module = sys.modules.get(module_name)
+    if module is None:
+        directory = os.path.join(ROOT_DIR, folder)
+        if directory not in sys.path:
+            sys.path.append(directory)  # snes_header.py is imported from the NES/SNES folder
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(directory, "read_rom.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def gb_script():
+    return load_family("GB, GBC, GBA", "gb_read_rom")
+
+
+@pytest.fixture(scope="session")
+def nes_script():
+    return load_family("NES, SNES (beta)", "nes_read_rom")
+
+
+@pytest.fixture(autouse=True)
+def user_cache(tmp_path, monkeypatch):
+    """Result cache, DAT index and the other cache files go to a fresh directory for every test."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.delenv("LOCALAPPDATA", raising=False)
+    monkeypatch.delenv("ROM_PARSER_DAT_INDEX", raising=False)
+    return tmp_path / "cache"
@@ -0,0 +1,49 @@
+import zlib
+
+from rom_common import DatIndex, ResultCache, cached_report, DEFAULT_PATTERNS
+
+
+def write_dat(path, rom_data, name):
+    path.write_text(
+        '<?xml version="1.0"?>\n<datafile><header><name>Test</name></header>\n'
+        f'<game name="{name}"><rom name="{name}.gb" size="{len(rom_data)}" crc="{zlib.crc32(rom_data):08x}"/></game>\n'
+        "</datafile>\n",
+        encoding="utf-8",
+    )
+
+
+def test_cached_report_sees_a_dat_index_built_later(tmp_path, gb_script):
+    rom_path = tmp_path / "tetris.gb"
+    gb_script.make_synthetic_rom(str(rom_path), "gb", 32 * 1024)
+    cache = ResultCache(str(tmp_path / "results.sqlite3"))
+    try:
+        first = gb_script.read_gb_rom(str(rom_path), interactive=False, cache=cache)
+        assert first["dat"] is None
+
+        write_dat(tmp_path / "test.dat", rom_path.read_bytes(), "Tetris (World)")
+        with DatIndex() as index:
+            index.add_dat(str(tmp_path / "test.dat"))
+
+        assert cached_report(cache, str(rom_path), DEFAULT_PATTERNS) is not None
+        second = gb_script.read_gb_rom(str(rom_path), interactive=False, cache=cache)
+    finally:
+        cache.close()
+    assert second["hashes"] == first["hashes"]
+    assert second["dat"] == [{"dat": "Test", "game": "Tetris (World)", "name": "Tetris (World).gb"}]
+
+
+def test_cached_report_keeps_the_entry_disassembly(tmp_path, gb_script, monkeypatch):
+    rom_path = tmp_path / "game.gbc"
+    gb_script.make_synthetic_rom(str(rom_path), "gbc", 64 * 1024)
+    cache = ResultCache(str(tmp_path / "results.sqlite3"))
+    try:
+        first = gb_script.read_gbc_rom(str(rom_path), interactive=False, cache=cache)
+
+        def fail(*args):
+            raise AssertionError("a cached report must not disassemble the entry point again")
+        monkeypatch.setattr(gb_script.Disassembler, "describe", fail)
+        second = gb_script.read_gbc_rom(str(rom_path), interactive=False, cache=cache)
+    finally:
+        cache.close()
+    assert first["header"]["entry_code"]
+    assert second["header"] == first["header"]
@@ -0,0 +1,83 @@
+import os
+import random
+
+import pytest
+
+from conftest import ROOT_DIR
+from rom_common import RomImage
+
+GB_ROMS = [os.path.join(ROOT_DIR, "GB, GBC, GBA", "roms", name) for name in ("tetris.gb", "zelda.gbc")]
+SMC_ROM = os.path.join(ROOT_DIR, "NES, SNES (beta)", "roms", "supermario.smc")
+
+
+def mirrored(data, size):
+    """`data` expanded to `size` bytes: the part above the largest power of two is mirrored (recursively) up to that power of two, then everything is repeated."""
+    part = 1 << (len(data).bit_length() - 1)
+    expanded = data if part == len(data) else data[:part] + mirrored(data[part:], part)
+    return expanded * (size // len(expanded))
+
+def reference_snes_checksum(data):
+    return sum(mirrored(data, 1 << (len(data) - 1).bit_length())) & 0xFFFF
+
+def verified(checks):
+    return all(stored == computed for name, stored, computed, digits in checks)
+
+
+@pytest.mark.parametrize("rom_path", GB_ROMS)
+def test_gb_checksums_of_the_tracked_roms(gb_script, rom_path):
+    with open(rom_path, "rb") as rom_file:
+        data = rom_file.read()
+    with RomImage(rom_path) as rom:
+        assert gb_script.gb_header_checksum(rom) == (-sum(data[0x134:0x14D]) - 25) & 0xFF
+        assert gb_script.gb_global_checksum(rom) == (sum(data) - data[0x14E] - data[0x14F]) & 0xFFFF
+        assert verified(gb_script.verify_gb_checksums(rom))
+
+
+def test_gb_checksums_notice_a_changed_byte(tmp_path, gb_script):
+    with open(GB_ROMS[0], "rb") as rom_file:
+        data = bytearray(rom_file.read())
+    data[0x134] ^= 0x01
+    (tmp_path / "tetris.gb").write_bytes(data)
+    with RomImage(str(tmp_path / "tetris.gb")) as rom:
+        header, global_checksum = gb_script.verify_gb_checksums(rom)
+    assert header[1] != header[2] and global_checksum[1] != global_checksum[2]
+
+
+@pytest.mark.parametrize("rom_format", ["gb", "gbc"])
+def test_gb_checksums_of_synthetic_roms(tmp_path, gb_script, rom_format):
+    gb_script.make_synthetic_rom(str(tmp_path / "game.gb"), rom_format, 128 * 1024)
+    with RomImage(str(tmp_path / "game.gb")) as rom:
+        assert verified(gb_script.verify_gb_checksums(rom))
+
+
+def test_gba_complement_check(tmp_path, gb_script):
+    gb_script.make_synthetic_rom(str(tmp_path / "game.gba"), "gba", 256 * 1024)
+    with RomImage(str(tmp_path / "game.gba")) as rom:
+        assert verified(gb_script.verify_gba_checksums(rom))
+    data = bytearray((tmp_path / "game.gba").read_bytes())
+    assert (-sum(data[0xA0:0xBD]) - 0x19) & 0xFF == data[0xBD]
+    data[0xA0] ^= 0x01
+    (tmp_path / "game.gba").write_bytes(data)
+    with RomImage(str(tmp_path / "game.gba")) as rom:
+        assert not verified(gb_script.verify_gba_checksums(rom))
+
+
+@pytest.mark.parametrize("size", [0x8000, 0x100000, 0x180000, 0x140000, 0x1C0000, 0x300000, 0x280000 + 0x8000])
+@pytest.mark.parametrize("copier_size", [0, 512])
+def test_snes_checksum_mirrors_like_the_reference(tmp_path, nes_script, size, copier_size):
+    data = random.Random(size).randbytes(size)
+    (tmp_path / "game.smc").write_bytes(bytes(copier_size) + data)
+    with RomImage(str(tmp_path / "game.smc")) as rom:
+        assert nes_script.snes_checksum(rom) == reference_snes_checksum(data)
+
+
+def test_snes_checksums_of_the_tracked_rom(nes_script):
+    with RomImage(SMC_ROM) as rom:
+        assert verified(nes_script.verify_snes_checksums(rom))
+
+
+@pytest.mark.parametrize("layout, size", [("LoROM", 512 + 512 * 1024), ("HiROM", 0x180000), ("ExHiROM", 512 + 0x500000)])
+def test_snes_checksums_of_synthetic_roms(tmp_path, nes_script, layout, size):
+    nes_script.make_synthetic_rom(str(tmp_path / "game.smc"), layout, size)
+    with RomImage(str(tmp_path / "game.smc")) as rom:
+        assert verified(nes_script.verify_snes_checksums(rom))
@@ -0,0 +1,117 @@
+import random
+import shutil
+import subprocess
+
+import pytest
+
+import rom_common
+from rom_common import export_rom, format_hex_dump, RomImage
+
+
+def baseline_hex_dump(data, start=0):
+    """The hex dump as the first export_to_hex_file wrote it, 16 bytes per line."""
+    lines = []
+    for offset in range(0, len(data), 16):
+        block = data[offset:offset + 16]
+        address = start + offset
+        hex_data = " ".join(f"{byte:02X}" for byte in block)
+        ascii_data = "".join(chr(byte) if 32 <= byte <= 126 else '.' for byte in block)
+        lines.append(f"0x{address:08X}: {hex_data:<47} | {ascii_data}\n")
+    return "".join(lines)
+
+def write_rom(path, size, seed=0):
+    data = random.Random(seed).randbytes(size)
+    path.write_bytes(data)
+    return data
+
+def export(rom_path, export_format, output_path):
+    with RomImage(str(rom_path)) as rom:
+        export_rom(rom, export_format, str(output_path))
+    return output_path.read_text(encoding="ascii")
+
+def ihex_image(text):
+    """Memory image of Intel HEX text; checks every record checksum and the end-of-file record."""
+    image = {}
+    base = 0
+    for line in text.splitlines():
+        record = bytes.fromhex(line[1:])
+        assert line[0] == ":" and sum(record) & 0xFF == 0, line
+        length, address, record_type = record[0], int.from_bytes(record[1:3], "big"), record[3]
+        payload = record[4:4 + length]
+        if record_type == 0:
+            for position, byte in enumerate(payload):
+                image[base + address + position] = byte
+        elif record_type == 1:
+            return image
+        elif record_type == 2:
+            base = int.from_bytes(payload, "big") << 4
+        elif record_type == 4:
+            base = int.from_bytes(payload, "big") << 16
+    raise AssertionError("no end-of-file record")
+
+def srec_image(text):
+    """Memory image of S3 records; checks every record checksum."""
+    image = {}
+    for line in text.splitlines():
+        record = bytes.fromhex(line[2:])
+        assert sum(record) & 0xFF == 0xFF and record[0] == len(record) - 1, line
+        if line[:2] == "S3":
+            address = int.from_bytes(record[1:5], "big")
+            for position, byte in enumerate(record[5:-1]):
+                image[address + position] = byte
+    return image
+
+
+@pytest.mark.parametrize("size, address", [(0, 0), (15, 0), (16, 0x10), (1000, 0x7FF0), (4099, 0x123450)])
+def test_hex_dump_matches_the_baseline_lines(size, address):
+    data = random.Random(size).randbytes(size)
+    assert format_hex_dump(data, address) == baseline_hex_dump(data, address)
+
+
+def test_dump_export_matches_the_baseline(tmp_path, monkeypatch):
+    # Small batches so the dump is built from several chunks
+    monkeypatch.setattr(rom_common, "HEX_DUMP_CHUNK", 4096)
+    data = write_rom(tmp_path / "game.gb", 3 * 4096 + 77)
+    assert export(tmp_path / "game.gb", "dump", tmp_path / "game.hex") == baseline_hex_dump(data)
+
+
+@pytest.mark.parametrize("size", [15, 4096, 0x10000 + 33, 0x30000 + 7])
+def test_ihex_export_decodes_to_the_rom(tmp_path, size):
+    data = write_rom(tmp_path / "game.gb", size, seed=size)
+    text = export(tmp_path / "game.gb", "ihex", tmp_path / "game.hex")
+    assert text.endswith(":00000001FF\n")
+    assert ihex_image(text) == dict(enumerate(data))
+
+
+@pytest.mark.parametrize("size", [15, 4096, 0x10000 + 33])
+def test_srec_export_decodes_to_the_rom(tmp_path, size):
+    data = write_rom(tmp_path / "game.gb", size, seed=size)
+    text = export(tmp_path / "game.gb", "srec", tmp_path / "game.srec")
+    assert text.startswith("S0030000FC\n") and text.endswith("S70500000000FA\n")
+    assert srec_image(text) == dict(enumerate(data))
+
+
+@pytest.mark.skipif(shutil.which("objcopy") is None, reason="objcopy is not installed")
+def test_ihex_and_srec_match_objcopy(tmp_path):
+    write_rom(tmp_path / "game.bin", 0x20000 + 21)
+    subprocess.run(["objcopy", "-I", "binary", "-O", "ihex", "game.bin", "objcopy.hex"], cwd=tmp_path, check=True)
+    subprocess.run(["objcopy", "-I", "binary", "-O", "srec", "--srec-forceS3", "--srec-len=16", "game.bin", "objcopy.srec"],
+                   cwd=tmp_path, check=True)
+    ours = export(tmp_path / "game.bin", "ihex", tmp_path / "ours.hex")
+    theirs = (tmp_path / "objcopy.hex").read_text(encoding="ascii").replace("\r\n", "\n")
+    # objcopy uses segment records (type 02) above 64 KB where the export writes linear ones (type 04)
+    assert ours.splitlines()[:0x1000] == theirs.splitlines()[:0x1000]
+    assert ihex_image(ours) == ihex_image(theirs)
+
+    ours = export(tmp_path / "game.bin", "srec", tmp_path / "ours.srec")
+    theirs = (tmp_path / "objcopy.srec").read_text(encoding="ascii").replace("\r\n", "\n")
+    # Only the S0 header differs: objcopy puts the file name into it
+    assert ours.splitlines()[1:] == theirs.splitlines()[1:]
+
+
+@pytest.mark.skipif(shutil.which("xxd") is None, reason="xxd is not installed")
+@pytest.mark.parametrize("size", [0, 5, 16, 0x10000 + 9])
+def test_xxd_export_matches_xxd(tmp_path, size):
+    write_rom(tmp_path / "game.bin", size, seed=size)
+    expected = subprocess.run(["xxd", "game.bin"], cwd=tmp_path, check=True, capture_output=True, text=True).stdout
+    assert export(tmp_path / "game.bin", "xxd", tmp_path / "game.xxd") == expected
@@ -0,0 +1,123 @@
+import random
+import zlib
+
+import pytest
+
+from rom_common import apply_patch, diff_roms, make_bps, make_ips, RomImage
+
+
+def ups_number(value):
+    """BPS/UPS variable-length number (the inverse of rom_common._patch_number)."""
+    encoded = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value == 0:
+            encoded.append(0x80 | byte)
+            return bytes(encoded)
+        encoded.append(byte)
+        value -= 1
+
+def make_ups(source, target):
+    """UPS patch as flips writes it: XOR hunks over max(source size, target size) bytes."""
+    size = max(len(source), len(target))
+    source_bytes = source.ljust(size, b"\x00")
+    target_bytes = target.ljust(size, b"\x00")
+    patch = bytearray(b"UPS1" + ups_number(len(source)) + ups_number(len(target)))
+    offset = last = 0
+    while offset < size:
+        if source_bytes[offset] == target_bytes[offset]:
+            offset += 1
+            continue
+        start = offset
+        while offset < size and source_bytes[offset] != target_bytes[offset]:
+            offset += 1
+        patch += ups_number(start - last)
+        patch += bytes(a ^ b for a, b in zip(source_bytes[start:offset], target_bytes[start:offset])) + b"\x00"
+        offset += 1
+        last = offset
+    patch += zlib.crc32(source).to_bytes(4, "little") + zlib.crc32(target).to_bytes(4, "little")
+    patch += zlib.crc32(patch).to_bytes(4, "little")
+    return bytes(patch)
+
+
+@pytest.mark.parametrize("source_size, target_size", [(60000, 50000), (50000, 50000), (50000, 60000)])
+def test_ups_round_trip(tmp_path, source_size, target_size):
+    rng = random.Random(source_size * 7 + target_size)
+    source = rng.randbytes(source_size)
+    target = bytearray(source[:target_size].ljust(target_size, b"\x00"))
+    for offset in range(0, target_size, 997):
+        target[offset:offset + 5] = rng.randbytes(5)
+    target[source_size:] = rng.randbytes(max(0, target_size - source_size))
+    target = bytes(target)
+
+    (tmp_path / "source.gb").write_bytes(source)
+    (tmp_path / "patch.ups").write_bytes(make_ups(source, target))
+    output_path = tmp_path / "patched.gb"
+
+    assert apply_patch(str(tmp_path / "source.gb"), str(tmp_path / "patch.ups"), str(output_path)) == ("UPS", target_size)
+    assert output_path.read_bytes() == target
+
+
+def changed_runs(source, target):
+    """Runs of differing bytes over the common size, plus everything target adds at its end."""
+    runs = []
+    for offset in range(min(len(source), len(target))):
+        if source[offset] != target[offset]:
+            if runs and runs[-1][1] == offset:
+                runs[-1] = (runs[-1][0], offset + 1)
+            else:
+                runs.append((offset, offset + 1))
+    if len(target) > len(source):
+        if runs and runs[-1][1] == len(source):
+            runs[-1] = (runs[-1][0], len(target))
+        else:
+            runs.append((len(source), len(target)))
+    return runs
+
+def make_pair(source_size, target_size, seed):
+    rng = random.Random(seed)
+    source = rng.randbytes(source_size)
+    target = bytearray(source[:target_size])
+    for offset in range(3, min(source_size, target_size), 1499):
+        length = rng.randrange(1, 40)
+        target[offset:offset + length] = rng.randbytes(len(target[offset:offset + length]))
+    if len(target) > 0x454F49:
+        target[0x454F46:0x454F49] = b"\x01\x02\x03"  # A record here would read as the IPS "EOF" marker
+    target += rng.randbytes(max(0, target_size - source_size))
+    return source, bytes(target)
+
+
+@pytest.mark.parametrize("source_size, target_size", [(70000, 70000), (70000, 90000), (90000, 70000), (0x460000, 0x460000)])
+@pytest.mark.parametrize("block_size", [64, 4096])
+def test_diff_matches_the_changed_bytes(tmp_path, source_size, target_size, block_size):
+    source, target = make_pair(source_size, target_size, source_size + target_size)
+    (tmp_path / "a.gb").write_bytes(source)
+    (tmp_path / "b.gb").write_bytes(target)
+    with RomImage(str(tmp_path / "a.gb")) as rom_a, RomImage(str(tmp_path / "b.gb")) as rom_b:
+        assert diff_roms(rom_a, rom_b, block_size) == changed_runs(source, target)
+
+
+@pytest.mark.parametrize("patch_format, make_patch", [("IPS", make_ips), ("BPS", make_bps)])
+@pytest.mark.parametrize("source_size, target_size", [(70000, 70000), (70000, 90000), (90000, 70000), (0x460000, 0x460000)])
+def test_patch_round_trip(tmp_path, patch_format, make_patch, source_size, target_size):
+    source, target = make_pair(source_size, target_size, source_size * 3 + target_size)
+    (tmp_path / "a.gb").write_bytes(source)
+    (tmp_path / "b.gb").write_bytes(target)
+    with RomImage(str(tmp_path / "a.gb")) as rom_a, RomImage(str(tmp_path / "b.gb")) as rom_b:
+        patch = make_patch(rom_a, rom_b, diff_roms(rom_a, rom_b))
+    patch_path = tmp_path / f"patch.{patch_format.lower()}"
+    patch_path.write_bytes(patch)
+    output_path = tmp_path / "patched.gb"
+
+    assert apply_patch(str(tmp_path / "a.gb"), str(patch_path), str(output_path)) == (patch_format, target_size)
+    assert output_path.read_bytes() == target
+
+
+def test_ips_rejects_changes_beyond_16_mb(tmp_path):
+    size = 0x1000010
+    (tmp_path / "a.gb").write_bytes(bytes(size))
+    (tmp_path / "b.gb").write_bytes(bytes(size - 1) + b"\x01")
+    with RomImage(str(tmp_path / "a.gb")) as rom_a, RomImage(str(tmp_path / "b.gb")) as rom_b:
+        with pytest.raises(ValueError):
+            make_ips(rom_a, rom_b, diff_roms(rom_a, rom_b))
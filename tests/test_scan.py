@@ -0,0 +1,68 @@
+import gzip
+import random
+import zipfile
+
+import pytest
+
+from rom_common import PatternScanner, RomImage
+
+PATTERNS = (b"ABAB", b"AB", b"BA", b"Nintendo", b"\x00\xFF\x00")
+
+
+def make_data(size=20000, seed=0):
+    """Random bytes with every pattern sprinkled in, also back to back and overlapping."""
+    rng = random.Random(seed)
+    data = bytearray(rng.randbytes(size))
+    for offset in range(7, size - 16, 333):
+        data[offset:offset + 16] = rng.choice((b"ABABABA", b"Nintendo", b"\x00\xFF\x00\xFF\x00", b"BABAB")).ljust(16, b"A")
+    return bytes(data)
+
+def brute_force(data, patterns):
+    """Every (offset, pattern) found with bytes.find, in the order scan() yields them."""
+    found = []
+    for pattern in set(patterns):
+        position = data.find(pattern)
+        while position != -1:
+            found.append((position, pattern))
+            position = data.find(pattern, position + 1)
+    return sorted(found)
+
+def write_input(tmp_path, kind, data):
+    """Writes `data` as a plain ROM, a gzip file or a stored/deflated zip entry and returns the RomImage path."""
+    if kind == "plain":
+        (tmp_path / "game.gb").write_bytes(data)
+        return str(tmp_path / "game.gb")
+    if kind == "gzip":
+        with gzip.open(tmp_path / "game.gb.gz", "wb") as gz_file:
+            gz_file.write(data)
+        return str(tmp_path / "game.gb.gz")
+    compression = zipfile.ZIP_STORED if kind == "zip-stored" else zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(tmp_path / "games.zip", "w", compression) as archive:
+        archive.writestr("readme.txt", b"not this one")
+        archive.writestr("game.gb", data)
+    return f"{tmp_path / 'games.zip'}::game.gb"
+
+
+@pytest.mark.parametrize("kind", ["plain", "gzip", "zip-stored", "zip-deflated"])
+@pytest.mark.parametrize("window_size", [5, 64, 1000, 1 << 20])
+def test_scan_matches_brute_force(tmp_path, kind, window_size):
+    data = make_data()
+    with RomImage(write_input(tmp_path, kind, data)) as rom:
+        found = list(PatternScanner(PATTERNS).scan(rom, window_size))
+    assert [offset for offset, pattern in found] == sorted(offset for offset, pattern in found)
+    assert sorted(found) == brute_force(data, PATTERNS)
+
+
+@pytest.mark.parametrize("kind", ["plain", "gzip", "zip-deflated"])
+@pytest.mark.parametrize("window_size", [5, 1000])
+def test_matches_carry_the_context_bytes(tmp_path, kind, window_size):
+    data = make_data(seed=1)
+    with RomImage(write_input(tmp_path, kind, data)) as rom:
+        found = list(PatternScanner(PATTERNS).matches(rom, 12, window_size))
+    assert sorted((offset, pattern) for offset, pattern, context in found) == brute_force(data, PATTERNS)
+    assert all(context == data[offset:offset + 12] for offset, pattern, context in found)
+
+
+def test_empty_patterns_are_rejected():
+    with pytest.raises(ValueError):
+        PatternScanner([b""])
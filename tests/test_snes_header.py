@@ -0,0 +1,64 @@
+import os
+import struct
+
+import pytest
+
+from conftest import ROOT_DIR
+from rom_common import RomImage
+
+SMC_ROM = os.path.join(ROOT_DIR, "NES, SNES (beta)", "roms", "supermario.smc")
+
+
+def make_header(map_mode=0x20, title=b"SUPER MARIO WORLD", rom_size=0x09, checksum=0x1234, complement=None, reset=0x8000):
+    header = bytearray(0x40)
+    header[0x00:0x15] = title.ljust(21)
+    header[0x15] = map_mode
+    header[0x17] = rom_size
+    struct.pack_into("<HH", header, 0x1C, checksum ^ 0xFFFF if complement is None else complement, checksum)
+    struct.pack_into("<H", header, 0x3C, reset)
+    return bytes(header)
+
+
+@pytest.mark.parametrize("changes, layout, score", [
+    ({}, "LoROM", 11),
+    ({"map_mode": 0x21}, "HiROM", 11),
+    ({"map_mode": 0x35}, "ExHiROM", 11),
+    ({"map_mode": 0x21}, "LoROM", 9),  # Map mode of another layout
+    ({"map_mode": 0x00}, "LoROM", 8),  # No map mode at all
+    ({"complement": 0x0000}, "LoROM", 7),  # Checksum without its complement
+    ({"title": b"\x00" * 21}, "LoROM", 9),
+    ({"title": b"SUPER MARIO\x00\x00\x00\x00WORLD"}, "LoROM", 10),
+    ({"rom_size": 0x0E}, "LoROM", 10),
+    ({"reset": 0x7FFF}, "LoROM", 10),
+])
+def test_score_header_points(nes_script, changes, layout, score):
+    assert nes_script.score_header(make_header(**changes), layout) == score
+
+
+def test_score_header_needs_64_bytes(nes_script):
+    assert nes_script.score_header(make_header()[:0x3F], "LoROM") is None
+
+
+@pytest.mark.parametrize("layout, size, offset", [
+    ("LoROM", 512 * 1024, 0x7FC0),
+    ("LoROM", 512 + 512 * 1024, 512 + 0x7FC0),
+    ("HiROM", 0x180000, 0xFFC0),
+    ("HiROM", 512 + 4 * 1024 * 1024, 512 + 0xFFC0),
+    ("ExHiROM", 512 + 6 * 1024 * 1024, 512 + 0x40FFC0),
+])
+def test_detect_snes_header_of_synthetic_roms(tmp_path, nes_script, layout, size, offset):
+    nes_script.make_synthetic_rom(str(tmp_path / "game.smc"), layout, size)
+    with RomImage(str(tmp_path / "game.smc")) as rom:
+        assert nes_script.detect_snes_header(rom) == (layout, offset, 11)
+
+
+def test_detect_snes_header_of_the_tracked_rom(nes_script):
+    with RomImage(SMC_ROM) as rom:
+        assert nes_script.detect_snes_header(rom) == ("LoROM", 512 + 0x7FC0, 11)
+
+
+def test_detect_snes_header_of_a_short_image(tmp_path, nes_script):
+    # Only the LoROM candidate fits; the scores of the missing ones are None
+    (tmp_path / "game.smc").write_bytes(bytes(0x7FC0) + make_header())
+    with RomImage(str(tmp_path / "game.smc")) as rom:
+        assert nes_script.detect_snes_header(rom) == ("LoROM", 0x7FC0, 11)